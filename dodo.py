@@ -217,14 +217,22 @@ def task_test_unit():
             "pytest -q src/test_*.py",
         ],
         "file_dep": [
+            "./src/conftest.py",
             "./src/test_curve_fitting_utils.py",
             "./src/test_dodo.py",
             "./src/test_error_metrics.py",
             "./src/test_replication_tables.py",
             "./src/test_correlation_metrics.py",
+            "./src/test_curve_conversions.py",
+            "./src/test_curve_store.py",
             "./src/test_run_mcc_yield_curve.py",
             "./src/test_run_fisher_yield_curve.py",
             "./src/test_run_waggoner_yield_curve.py",
+            "./src/test_fisher1995_yield_curve.py",
+            "./src/test_waggoner1997_yield_curve.py",
+            "./src/test_mcc1975_yield_curve.py",
+            "./src/test_gsw2006_yield_curve.py",
+            "./src/test_run_gsw_yield_curve.py",
         ],
         "clean": [],
     }
@@ -310,13 +318,17 @@ def task_build_mcc_yield_curve():
             "ipython ./src/run_mcc_yield_curve.py",
         ],
         "targets":[
-            DATA_DIR / "mcc_discount_curve.parquet",
+            DATA_DIR / "mcc_curve_params.parquet",
+            DATA_DIR / "mcc_bond_fits.parquet",
+            DATA_DIR / "mcc_fit_quality_by_date.csv",
             DATA_DIR / "mcc_error_metrics.csv",
+            DATA_DIR / "mcc_oos_bond_fits.parquet",
             DATA_DIR / "mcc_oos_error_metrics.csv",
         ],
         "file_dep":[
             "./src/settings.py",
             "./src/run_mcc_yield_curve.py",
+            "./src/curve_store.py",
             "./src/mcc1975_yield_curve.py",
             "./src/curve_fitting_utils.py",
             "./src/curve_conversions.py",
@@ -336,7 +348,7 @@ def task_build_fisher_yield_curve():
             "ipython ./src/run_fisher_yield_curve.py",
         ],
         "targets": [
-            DATA_DIR / "fisher_forward_curve.parquet",
+            DATA_DIR / "fisher_curve_params.parquet",
             DATA_DIR / "fisher_bond_fits.parquet",
             DATA_DIR / "fisher_fit_quality_by_date.csv",
             DATA_DIR / "fisher_error_metrics.csv",
@@ -346,6 +358,7 @@ def task_build_fisher_yield_curve():
         "file_dep": [
             "./src/settings.py",
             "./src/run_fisher_yield_curve.py",
+            "./src/curve_store.py",
             "./src/fisher1995_yield_curve.py",
             "./src/curve_fitting_utils.py",
             "./src/error_metrics.py",
@@ -364,13 +377,17 @@ def task_build_waggoner_yield_curve():
             "ipython ./src/run_waggoner_yield_curve.py",
         ],
         "targets": [
-            DATA_DIR / "waggoner_forward_curve.parquet",
+            DATA_DIR / "waggoner_curve_params.parquet",
+            DATA_DIR / "waggoner_bond_fits.parquet",
+            DATA_DIR / "waggoner_fit_quality_by_date.csv",
             DATA_DIR / "waggoner_error_metrics.csv",
+            DATA_DIR / "waggoner_oos_bond_fits.parquet",
             DATA_DIR / "waggoner_oos_error_metrics.csv",
         ],
         "file_dep": [
             "./src/settings.py",
             "./src/run_waggoner_yield_curve.py",
+            "./src/curve_store.py",
             "./src/waggoner1997_yield_curve.py",
             "./src/fisher1995_yield_curve.py",
             "./src/curve_fitting_utils.py",
@@ -381,6 +398,28 @@ def task_build_waggoner_yield_curve():
         "clean": True,
     }
 
+def task_build_gsw_yield_curve():
+    """Run Gurkaynak, Sack, and Wright (2006) daily re-estimation from CRSP Treasury data"""
+    return {
+        "actions": [
+            "ipython ./src/settings.py",
+            "ipython ./src/run_gsw_yield_curve.py",
+        ],
+        "targets": [
+            DATA_DIR / "gsw_yield_curve_all.parquet",
+            DATA_DIR / "gsw_fit_quality_by_date.csv",
+        ],
+        "file_dep": [
+            "./src/settings.py",
+            "./src/run_gsw_yield_curve.py",
+            "./src/gsw2006_yield_curve.py",
+            "./src/curve_fitting_utils.py",
+            DATA_DIR / "TFZ_with_runness.parquet",
+        ],
+        "task_dep": ["pull_CRSP_treasury"],
+        "clean": True,
+    }
+
 # Modern (rolling 20-year) sample tasks
 def task_build_mcc_yield_curve_modern():
     """Run McCulloch yield curve on rolling modern (last 20 years) sample"""
@@ -390,14 +429,18 @@ def task_build_mcc_yield_curve_modern():
             "ipython ./src/run_mcc_yield_curve_modern.py",
         ],
         "targets": [
-            DATA_DIR / "modern_mcc_discount_curve.parquet",
+            DATA_DIR / "modern_mcc_curve_params.parquet",
+            DATA_DIR / "modern_mcc_bond_fits.parquet",
+            DATA_DIR / "modern_mcc_fit_quality_by_date.csv",
             DATA_DIR / "modern_mcc_error_metrics.csv",
+            DATA_DIR / "modern_mcc_oos_bond_fits.parquet",
             DATA_DIR / "modern_mcc_oos_error_metrics.csv",
         ],
         "file_dep": [
             "./src/settings.py",
             "./src/run_mcc_yield_curve_modern.py",
             "./src/run_mcc_yield_curve.py",
+            "./src/curve_store.py",
             "./src/mcc1975_yield_curve.py",
             "./src/curve_fitting_utils.py",
             "./src/curve_conversions.py",
@@ -417,7 +460,7 @@ def task_build_fisher_yield_curve_modern():
             "ipython ./src/run_fisher_yield_curve_modern.py",
         ],
         "targets": [
-            DATA_DIR / "modern_fisher_forward_curve.parquet",
+            DATA_DIR / "modern_fisher_curve_params.parquet",
             DATA_DIR / "modern_fisher_bond_fits.parquet",
             DATA_DIR / "modern_fisher_fit_quality_by_date.csv",
             DATA_DIR / "modern_fisher_error_metrics.csv",
@@ -428,6 +471,7 @@ def task_build_fisher_yield_curve_modern():
             "./src/settings.py",
             "./src/run_fisher_yield_curve_modern.py",
             "./src/run_fisher_yield_curve.py",
+            "./src/curve_store.py",
             "./src/fisher1995_yield_curve.py",
             "./src/curve_fitting_utils.py",
             "./src/error_metrics.py",
@@ -446,14 +490,18 @@ def task_build_waggoner_yield_curve_modern():
             "ipython ./src/run_waggoner_yield_curve_modern.py",
         ],
         "targets": [
-            DATA_DIR / "modern_waggoner_forward_curve.parquet",
+            DATA_DIR / "modern_waggoner_curve_params.parquet",
+            DATA_DIR / "modern_waggoner_bond_fits.parquet",
+            DATA_DIR / "modern_waggoner_fit_quality_by_date.csv",
             DATA_DIR / "modern_waggoner_error_metrics.csv",
+            DATA_DIR / "modern_waggoner_oos_bond_fits.parquet",
             DATA_DIR / "modern_waggoner_oos_error_metrics.csv",
         ],
         "file_dep": [
             "./src/settings.py",
             "./src/run_waggoner_yield_curve_modern.py",
             "./src/run_waggoner_yield_curve.py",
+            "./src/curve_store.py",
             "./src/waggoner1997_yield_curve.py",
             "./src/fisher1995_yield_curve.py",
             "./src/curve_fitting_utils.py",
@@ -524,6 +572,7 @@ def task_build_fisher_lambda_tables():
         "file_dep": [
             "./src/settings.py",
             "./src/fisher_lambda_exploration.py",
+            "./src/curve_store.py",
             DATA_DIR / "fisher_fit_quality_by_date.csv",
             DATA_DIR / "modern_fisher_fit_quality_by_date.csv",
         ],
@@ -535,6 +584,39 @@ def task_build_fisher_lambda_tables():
     }
 
 
+def task_build_common_curves():
+    """Convert every method's curves and the GSW curve to the common form on one maturity grid"""
+    return {
+        "actions": [
+            "ipython ./src/settings.py",
+            "ipython ./src/build_common_curves.py",
+        ],
+        "targets": [
+            DATA_DIR / "common_curves.arrow",
+        ],
+        "file_dep": [
+            "./src/settings.py",
+            "./src/build_common_curves.py",
+            "./src/correlation_metrics.py",
+            "./src/curve_conversions.py",
+            "./src/curve_store.py",
+            "./src/gsw2006_yield_curve.py",
+            "./src/pull_yield_curve_data.py",
+            DATA_DIR / "mcc_curve_params.parquet",
+            DATA_DIR / "fisher_curve_params.parquet",
+            DATA_DIR / "waggoner_curve_params.parquet",
+            DATA_DIR / "fed_yield_curve_all.parquet",
+        ],
+        "task_dep": [
+            "build_mcc_yield_curve",
+            "build_fisher_yield_curve",
+            "build_waggoner_yield_curve",
+            "pull_fed_yield_curve",
+        ],
+        "clean": True,
+    }
+
+
 def task_build_correlation_metrics():
     """Compute date-level correlation metrics across replication methods vs GSW"""
     return {
@@ -557,17 +639,14 @@ def task_build_correlation_metrics():
         "file_dep": [
             "./src/settings.py",
             "./src/correlation_metrics.py",
-            "./src/curve_conversions.py",
+            "./src/curve_store.py",
+            "./src/gsw2006_yield_curve.py",
             "./src/pull_yield_curve_data.py",
-            DATA_DIR / "mcc_discount_curve.parquet",
-            DATA_DIR / "fisher_forward_curve.parquet",
-            DATA_DIR / "waggoner_forward_curve.parquet",
+            DATA_DIR / "common_curves.arrow",
             DATA_DIR / "fed_yield_curve_all.parquet",
         ],
         "task_dep": [
-            "build_mcc_yield_curve",
-            "build_fisher_yield_curve",
-            "build_waggoner_yield_curve",
+            "build_common_curves",
             "pull_fed_yield_curve",
         ],
         "clean": True,
@@ -633,15 +712,11 @@ def task_build_curve_plots():
             "./src/settings.py",
             "./src/plot_curves.py",
             "./src/correlation_metrics.py",
-            "./src/curve_conversions.py",
-            "./src/pull_yield_curve_data.py",
-            DATA_DIR / "mcc_discount_curve.parquet",
-            DATA_DIR / "fisher_forward_curve.parquet",
-            DATA_DIR / "waggoner_forward_curve.parquet",
-            DATA_DIR / "fed_yield_curve_all.parquet",
+            DATA_DIR / "common_curves.arrow",
             DATA_DIR / "correlation_selected_dates.csv",
         ],
         "task_dep": [
+            "build_common_curves",
             "build_correlation_metrics",
         ],
         "clean": True,
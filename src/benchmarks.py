@@ -0,0 +1,176 @@
+"""
+Timing scripts for the vectorized fitting code, each against the slow reference
+implementation kept next to its equivalence test in the matching test_*.py module.
+Nothing here runs as part of the pipeline.
+
+Usage:
+  python src/benchmarks.py                   (run every benchmark)
+  python src/benchmarks.py NAME [NAME ...]    (run only the named ones)
+
+Benchmarks:
+  - fisher_price_and_jac: fisher1995_yield_curve.price_and_jac against the
+      per-column bincount reference on synthetic cashflow panels
+  - mcc_fit: mcc1975_yield_curve.fit + predict_prices against the
+      per-bond reference on a synthetic 1970-1995-sized monthly panel
+  - split_in_out_sample: curve_fitting_utils.split_in_out_sample_data against
+      the groupby.apply reference on the full tidy panel (needs
+      DATA_DIR/tidy_CRSP_treasury.parquet)
+  - gsw_fit: gsw2006_yield_curve.fit with each method on a synthetic
+      year of daily quote dates
+"""
+import sys
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+import curve_fitting_utils as cfu
+import fisher1995_yield_curve as fisher
+import gsw2006_yield_curve as gsw
+import mcc1975_yield_curve as mcc
+from test_curve_fitting_utils import _split_in_out_sample_data_apply
+from test_fisher1995_yield_curve import _price_and_jac_bincount
+from test_mcc1975_yield_curve import _fit_per_bond, _predict_prices_per_bond
+
+
+def fisher_price_and_jac(sizes=((300, 20, 19), (800, 30, 40), (800, 60, 64), (2000, 30, 64)),
+                         repeats=20, seed=0):
+    """
+    Time the segment-sum price_and_jac against the per-column bincount loop.
+
+    sizes holds (N bonds, mean cashflows per bond, p basis functions); the last two
+    rows are in the range of the modern CRSP cross-sections.
+    """
+    rng = np.random.default_rng(seed)
+    for N, cf_per_bond, p in sizes:
+        bond_idx = np.repeat(np.arange(N), rng.integers(1, 2 * cf_per_bond, N))
+        n = bond_idx.size
+        A_all = np.sort(rng.uniform(0.0, 1.0, (n, p)), axis=1)
+        c_all = rng.uniform(1.0, 100.0, n)
+        beta = rng.normal(0.0, 0.05, p)
+        offsets = fisher.cashflow_offsets(bond_idx, N)
+
+        timings = {}
+        for name, func in (
+            ("bincount", lambda: _price_and_jac_bincount(beta, c_all, bond_idx, A_all, N)),
+            ("segment", lambda: fisher.price_and_jac(beta, c_all, bond_idx, A_all, N, offsets)),
+        ):
+            func()
+            t0 = perf_counter()
+            for _ in range(repeats):
+                func()
+            timings[name] = (perf_counter() - t0) / repeats * 1e3
+
+        print(f"N={N:5d} cf={n:6d} p={p:3d}  bincount {timings['bincount']:7.2f} ms"
+              f"  segment {timings['segment']:6.2f} ms  ({timings['bincount'] / timings['segment']:.1f}x)")
+
+
+
+def mcc_fit(n_dates=312, n_bonds=(60, 250), seed=0):
+    """
+    Time fit + predict_prices per date against the per-bond reference on a synthetic
+    monthly 1970-1995-sized panel (n_dates cross-sections of semiannual coupon bonds).
+    """
+    rng = np.random.default_rng(seed)
+    panel = []
+    for _ in range(n_dates):
+        n = rng.integers(*n_bonds)
+        ttm = np.sort(rng.uniform(0.1, 30.0, n))
+        cpn = rng.uniform(2.0, 14.0, n)
+        times = [np.arange(t % 0.5 or 0.5, t + 1e-9, 0.5) for t in ttm]
+        cashflows = [np.r_[np.full(len(t) - 1, c / 2), 100 + c / 2] for t, c in zip(times, cpn)]
+        ai = rng.uniform(0.0, 3.0, n)
+        prices = np.array([np.sum(c * np.exp(-0.07 * t)) for c, t in zip(cashflows, times)]) - ai
+        d, ncoef = mcc.get_nodes(ttm, ttm)
+        panel.append((cashflows, times, prices, ai, d, ncoef))
+
+    t0 = perf_counter()
+    for cashflows, times, prices, ai, d, ncoef in panel:
+        beta = _fit_per_bond(cashflows, times, prices, ai, d, ncoef)
+        _predict_prices_per_bond(beta, cashflows, times, d, ncoef, ai)
+    t_loop = perf_counter() - t0
+
+    t0 = perf_counter()
+    for cashflows, times, prices, ai, d, ncoef in panel:
+        design = mcc.cashflow_design(cashflows, times, d, ncoef)
+        beta = mcc.fit(cashflows, times, prices, ai, d, ncoef, design)
+        mcc.predict_prices(beta, cashflows, times, d, ncoef, ai, design)
+    t_vec = perf_counter() - t0
+
+    print(f"{n_dates} dates: per-bond {t_loop:.2f} s, vectorized {t_vec:.3f} s ({t_loop / t_vec:.0f}x)")
+
+
+
+def split_in_out_sample(data_dir=cfu.DATA_DIR, repeat=3):
+    """Time split_in_out_sample_data against the groupby.apply reference on the full
+    tidy panel (every date, with the Waggoner filters applied)."""
+    treasury = cfu.load_tidy_CRSP_treasury(data_dir)
+    treasury_filtered = cfu.filter_waggoner_treasury_data(
+        treasury, treasury["date"].min(), treasury["date"].max())
+
+    timings = {}
+    for name, split in [("apply", _split_in_out_sample_data_apply),
+                        ("vectorized", cfu.split_in_out_sample_data)]:
+        best = np.inf
+        for _ in range(repeat):
+            t0 = perf_counter()
+            split(treasury_filtered)
+            best = min(best, perf_counter() - t0)
+        timings[name] = best
+
+    print(f"{len(treasury_filtered)} rows, {treasury_filtered['date'].nunique()} dates: "
+          f"apply {timings['apply']:.2f} s, vectorized {timings['vectorized']:.3f} s "
+          f"({timings['apply'] / timings['vectorized']:.0f}x)")
+
+
+
+def gsw_fit(n_dates=252, n_bonds=150, seed=0):
+    """
+    Time fit with each method on a synthetic year of daily quote dates: n_bonds notes and
+    bonds priced off a slowly moving Svensson curve plus noise, each date started from a
+    perturbed copy of the true parameters.
+    """
+    rng = np.random.default_rng(seed)
+    quote_dates = pd.bdate_range("2019-01-02", periods=n_dates)
+    maturity = quote_dates[-1] + pd.to_timedelta(rng.integers(100, 30 * 365, n_bonds), unit="D")
+    coupon = rng.uniform(1.0, 8.0, n_bonds).round(3)
+    true = np.array([1.5, 8.0, 0.04, -0.02, 0.01, 0.02])
+
+    panel = []
+    for quote_date in quote_dates:
+        quotes = pd.DataFrame({"caldt": quote_date, "tcusip": np.arange(n_bonds),
+                               "tmatdt": maturity, "tcouprt": coupon})
+        CF, payment_dates = gsw.cashflow_matrix(quotes)
+        times = (payment_dates - quote_date).days / 365.25
+        params = true + rng.normal(0, [0.05, 0.2, 0.001, 0.001, 0.001, 0.001])
+        quotes["price"] = CF @ gsw.discount(times, params) + rng.normal(0, 0.02, n_bonds)
+        quotes["tdduratn"] = (maturity - quote_date).days / 365.25 * 0.8
+        params0 = params * rng.uniform(0.8, 1.2, 6)
+        panel.append((quote_date, quotes, (CF, payment_dates), params0))
+
+    for method in ["finite_difference", "gradient", "least_squares", "variable_projection"]:
+        mse, failed = [], 0
+        t0 = perf_counter()
+        for quote_date, quotes, cashflows, params0 in panel:
+            try:
+                mse.append(gsw.fit(quote_date, quotes, params0, cashflows, method=method)[1])
+            except RuntimeError:
+                failed += 1
+        elapsed = perf_counter() - t0
+        print(f"{method:>17}: {elapsed:6.2f} s for {n_dates} dates, {failed} failed, "
+              f"median mse {np.median(mse):.3e}")
+
+
+
+BENCHMARKS = {
+    "fisher_price_and_jac": fisher_price_and_jac,
+    "mcc_fit": mcc_fit,
+    "split_in_out_sample": split_in_out_sample,
+    "gsw_fit": gsw_fit,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        print(f"== {name}")
+        BENCHMARKS[name]()
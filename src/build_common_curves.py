@@ -0,0 +1,101 @@
+"""
+Converts every method's saved curves (and the Fed GSW curve) to the common
+(date, T, discount, spot_cc, forward_instant_cc) form once, on a fixed maturity grid,
+so correlation_metrics.py and plot_curves.py can read them instead of reconverting
+
+Inputs:
+  - DATA_DIR/mcc_curve_params.parquet   (curves rebuilt on each runner's native grid,
+  - DATA_DIR/fisher_curve_params.parquet     see correlation_metrics.load_method_curve)
+  - DATA_DIR/waggoner_curve_params.parquet
+  - DATA_DIR/fed_yield_curve_all.parquet
+
+Outputs:
+  - DATA_DIR/common_curves.arrow   (uncompressed Arrow IPC file, one record batch per
+        source "mcc", "fisher", "waggoner", "gsw", rows sorted by (date, T) on
+        correlation_metrics.COMMON_T_GRID; read it with correlation_metrics.load_common_curves,
+        which memory-maps it)
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import correlation_metrics as cm
+from settings import config
+
+DATA_DIR = Path(config("DATA_DIR"))
+
+GSW_SOURCE = "gsw"
+
+
+def build_common_curves(curves_by_method=None, t_grid=cm.COMMON_T_GRID, data_dir=DATA_DIR):
+    """Common-format curves of each method and of GSW on `t_grid`.
+
+    GSW is evaluated on every date any method has, using the latest Fed parameters on or
+    before it; dates before the first Fed parameters are left out.
+
+    Returns:
+        dict: source -> (dates, as-of dates, (n_dates, len(CURVE_TYPES), len(t_grid)) array)
+    """
+    if curves_by_method is None:
+        curves_by_method = cm.load_all_method_curves(data_dir=data_dir)
+
+    out = {}
+    all_keys = []
+    for method in cm.METHOD_FILE_MAP:
+        keys = np.unique(cm._date_keys(curves_by_method[method]["date"]))
+        dates = pd.DatetimeIndex(keys)
+        curves = cm.resample_method_curves(curves_by_method, dates, t_grid, cm.CURVE_TYPES, [method])[0]
+        out[method] = (dates, dates, curves)
+        all_keys.append(keys)
+
+    keys = np.unique(np.concatenate(all_keys))
+    first_param_key = cm.load_gsw_param_store(data_dir).keys[0]
+    dates = pd.DatetimeIndex(keys[keys >= first_param_key])
+    asof_dates, gsw_curves = cm.build_gsw_curves(dates, t_grid, data_dir=data_dir)
+    curves = np.stack([gsw_curves[ct] for ct in cm.CURVE_TYPES], axis=1)
+    out[GSW_SOURCE] = (dates, asof_dates, curves)
+    return out
+
+
+def write_common_curves(common, path, t_grid=cm.COMMON_T_GRID):
+    """Write the output of build_common_curves to an uncompressed Arrow IPC file, one
+    record batch per source, via a temporary file and os.replace."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    t_grid = np.asarray(t_grid, dtype=float)
+    n_t = len(t_grid)
+
+    schema = pa.schema(
+        [("date", pa.timestamp("ns")), ("asof_date", pa.timestamp("ns")), ("T", pa.float64())]
+        + [(ct, pa.float64()) for ct in cm.CURVE_TYPES],
+        metadata={"sources": json.dumps(list(common)), "n_maturities": str(n_t)},
+    )
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for dates, asof_dates, curves in common.values():
+            n_dates = len(dates)
+            columns = [
+                pa.array(np.repeat(dates.as_unit("ns").to_numpy(), n_t), pa.timestamp("ns")),
+                pa.array(np.repeat(asof_dates.as_unit("ns").to_numpy(), n_t), pa.timestamp("ns")),
+                pa.array(np.tile(t_grid, n_dates)),
+            ]
+            columns += [pa.array(np.ascontiguousarray(curves[:, c]).ravel()) for c in range(len(cm.CURVE_TYPES))]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+    os.replace(tmp_path, path)
+
+
+def main():
+    """Run the module's main workflow."""
+    common = build_common_curves(data_dir=DATA_DIR)
+    path = DATA_DIR / cm.COMMON_CURVES_FILE
+    write_common_curves(common, path)
+    print("Wrote common curves to:", path.resolve())
+    for source, (dates, _, _) in common.items():
+        print(f"  {source}: {len(dates)} dates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Shared pytest fixtures for the unit tests in src/test_*.py.
+
+Fixtures:
+- treasury_sample: builder for a small CRSP-style treasury panel priced off a
+    smooth forward curve, in the layout of tidy_CRSP_treasury.parquet.
+- gsw_quotes: builder for one quote date of synthetic notes and bonds in the
+    column layout used by gsw2006_yield_curve (caldt, tcusip, tmatdt, tcouprt).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from curve_fitting_utils import get_cashflows_from_bonds
+
+
+def _treasury_sample(dates=("2000-01-31", "2000-02-29", "2000-03-31", "2000-04-28"), n_bonds=12):
+    """Build a small treasury panel priced off a smooth forward curve."""
+    rows = []
+    for d in pd.to_datetime(list(dates)):
+        for i in range(n_bonds):
+            maturity = d + pd.DateOffset(months=6 * (i + 1) + 1)
+            coupon = 0.0 if i < 2 else 4.0 + 0.25 * i
+            rows.append({"date": d, "cusip": f"C{i:02d}", "maturity_date": maturity, "coupon": coupon})
+    sample = pd.DataFrame(rows)
+    sample["ttm_days"] = (sample["maturity_date"] - sample["date"]).dt.days
+
+    cashflows, times = get_cashflows_from_bonds(sample)
+    # f(t) = 0.04 + 0.01 (1 - exp(-t/3))  =>  integral in closed form
+    prices = [
+        float(np.sum(cf * np.exp(-(0.05 * t - 0.03 * (1 - np.exp(-t / 3))))))
+        for cf, t in zip(cashflows, times)
+    ]
+    sample["accrued_interest"] = 0.0
+    sample["mid_price"] = prices
+    sample["bid"] = sample["mid_price"] - 0.05
+    sample["ask"] = sample["mid_price"] + 0.05
+    sample["duration"] = sample["ttm_days"] / 365
+    return sample
+
+
+@pytest.fixture
+def treasury_sample():
+    """Builder: treasury_sample(dates=..., n_bonds=...) returns a fresh synthetic panel."""
+    return _treasury_sample
+
+
+def _gsw_quotes(quote_date, n=40, seed=0):
+    """One quote date of synthetic notes and bonds with mixed maturity days."""
+    rng = np.random.default_rng(seed)
+    quote_date = pd.Timestamp(quote_date)
+    maturity = quote_date + pd.to_timedelta(rng.integers(93, 30 * 365, n), unit="D")
+    maturity = maturity.where(rng.random(n) > 0.4, maturity + pd.offsets.MonthEnd(0))
+    return pd.DataFrame(
+        {
+            "caldt": quote_date,
+            "tcusip": [f"C{i:03d}" for i in range(n)],
+            "tmatdt": maturity,
+            "tcouprt": np.where(rng.random(n) < 0.1, 0.0, rng.uniform(1.0, 10.0, n).round(3)),
+        },
+        index=rng.permutation(n) + 100,
+    )
+
+
+@pytest.fixture
+def gsw_quotes():
+    """Builder: gsw_quotes(quote_date, n=..., seed=...) returns one date of GSW-style quotes."""
+    return _gsw_quotes
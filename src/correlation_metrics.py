@@ -3,19 +3,25 @@ Compute two sets of date-level correlation metrics:
     1. Between replication methods (MCC, Fisher, Waggonner) and GSW.
     2. Between replication methods themselves
 
-This module loads saved curve outputs from `_data`, converts each method to a
-common representation, computes correlations on a shared maturity grid, and
-writes summary artifacts to `_data`. 
+This module converts each method's saved curve outputs in `_data` to a common
+representation (build_common_curves.py stores them once on a fixed maturity grid,
+and load_common_curves memory-maps that store), computes correlations on a shared
+maturity grid, and writes summary artifacts to `_data`. 
 The correlation heatmaps are saved to both `_output` (PNG) and `docs/charts` (HTML).
 """
+import json
+from functools import lru_cache
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+import pyarrow as pa
 
 import curve_conversions as cc
+import curve_store
+import gsw2006_yield_curve as gsw
 import pull_yield_curve_data
 from settings import config
 
@@ -40,53 +46,10 @@ METHOD_LABELS = {
 CURVE_TYPES = ["discount", "spot_cc", "forward_instant_cc"]
 METHOD_PAIR_CURVE_TYPES = ["spot_cc", "forward_instant_cc"]
 
-
-def _gsw_spot(maturities, params):
-    """Compute GSW spot rates for given maturities and parameters."""
-    tau1, tau2, beta1, beta2, beta3, beta4 = params
-    t = np.asarray(maturities, dtype=float)
-    t_safe = np.where(t == 0.0, 1e-6, t)
-
-    tau1_exp = (1 - np.exp(-t_safe / tau1)) / (t_safe / tau1)
-    tau2_exp = (1 - np.exp(-t_safe / tau2)) / (t_safe / tau2)
-
-    return (
-        beta1
-        + beta2 * tau1_exp
-        + beta3 * (tau1_exp - np.exp(-t_safe / tau1))
-        + beta4 * (tau2_exp - np.exp(-t_safe / tau2))
-    )
-
-
-def _forward_curve_to_common(curve_df):
-    """Convert a forward curve DataFrame to the common format with discount, spot_cc, and forward_instant_cc."""
-    df = curve_df.rename(columns={"t": "T"}).copy()
-    df = df[["T", "forward", "date"]].sort_values("T").reset_index(drop=True)
-
-    t = df["T"].to_numpy(dtype=float)
-    f = df["forward"].to_numpy(dtype=float)
-    dt = np.diff(t)
-    integral = np.concatenate([[0.0], np.cumsum(0.5 * (f[1:] + f[:-1]) * dt)])
-    discount = np.exp(-integral)
-
-    base = pd.DataFrame({"T": t, "discount": discount})
-    dt_fwd = float(np.median(dt)) if len(dt) else 0.25
-    converted = cc.add_spot_and_forwards(base, dt=dt_fwd, t_col="T", d_col="discount")
-    converted["forward_instant_cc"] = f
-    converted["date"] = pd.to_datetime(df["date"].iloc[0]).normalize()
-    return converted[["date", "T", "discount", "spot_cc", "forward_instant_cc"]]
-
-
-def _mcc_curve_to_common(curve_df):
-    """Convert an MCC curve DataFrame to the common format with discount, spot_cc, and forward_instant_cc."""
-    df = curve_df.rename(columns={"t": "T"}).copy()
-    df = df[["T", "discount", "date"]].sort_values("T").reset_index(drop=True)
-    t = df["T"].to_numpy(dtype=float)
-    dt = np.diff(t)
-    dt_fwd = float(np.median(dt)) if len(dt) else 0.25
-    converted = cc.add_spot_and_forwards(df[["T", "discount"]], dt=dt_fwd, t_col="T", d_col="discount")
-    converted["date"] = pd.to_datetime(df["date"].iloc[0]).normalize()
-    return converted[["date", "T", "discount", "spot_cc", "forward_instant_cc"]]
+# Common-curve store written by build_common_curves.py. Its grid is the plotting grid
+# (1/48 of a year) plus the default correlation grid, so both are read without interpolation.
+COMMON_CURVES_FILE = "common_curves.arrow"
+COMMON_T_GRID = np.union1d(np.linspace(0.0, 30.0, 30 * 48 + 1), np.linspace(0.25, 30.0, 240))
 
 
 def load_method_curve(method, data_dir=DATA_DIR):
@@ -95,24 +58,27 @@ def load_method_curve(method, data_dir=DATA_DIR):
     if method not in METHOD_FILE_MAP:
         raise ValueError(f"Unknown method: {method}")
 
+    # the coefficient table rebuilds the runner's native grid exactly; the dense curve
+    # parquet is only read for outputs written before the table existed
     path = Path(data_dir) / METHOD_FILE_MAP[method]
-    if not path.exists():
+    if (Path(data_dir) / curve_store.PARAMS_FILES[method]).exists():
+        raw = curve_store.load_method_curves(method, data_dir=data_dir)
+    elif path.exists():
+        raw = pd.read_parquet(path)
+    else:
         raise FileNotFoundError(f"Missing curve artifact for '{method}': {path}")
 
-    raw = pd.read_parquet(path)
     raw["date"] = pd.to_datetime(raw["date"]).dt.normalize()
+    raw = raw.rename(columns={"t": "T"}).sort_values(["date", "T"], kind="stable", ignore_index=True)
 
-    converted = []
-    for dt, grp in raw.groupby("date", sort=True):
-        grp = grp.copy()
-        if method == "mcc":
-            out = _mcc_curve_to_common(grp)
-        else:
-            out = _forward_curve_to_common(grp)
-        out["date"] = dt
-        converted.append(out)
-
-    return pd.concat(converted, ignore_index=True)
+    # discrete forwards use each date's median grid spacing, as in the per-date converters
+    starts, lengths = cc.curve_segments(raw["date"].to_numpy())
+    dt_fwd = np.nan_to_num(cc.segment_median_spacing(raw["T"].to_numpy(dtype=float), starts, lengths), nan=0.25)
+    if method == "mcc":
+        converted = cc.add_spot_and_forwards_panel(raw[["date", "T", "discount"]], dt=dt_fwd, t_col="T", d_col="discount")
+    else:
+        converted = cc.add_spot_and_forwards_panel(raw[["date", "T", "forward"]], dt=dt_fwd, t_col="T", f_col="forward")
+    return converted[["date", "T", "discount", "spot_cc", "forward_instant_cc"]]
 
 
 def load_all_method_curves(data_dir=DATA_DIR):
@@ -120,11 +86,11 @@ def load_all_method_curves(data_dir=DATA_DIR):
     return {m: load_method_curve(m, data_dir=data_dir) for m in METHOD_FILE_MAP}
 
 
-def build_gsw_curve_for_date(gsw_date, t_grid, dt_fwd=0.25, data_dir=DATA_DIR):
-    """Build the GSW curve for a given date and maturity grid using the loaded parameters."""
-    gsw_date = pd.to_datetime(gsw_date).normalize()
-    params_raw = pull_yield_curve_data.load_fed_yield_curve_all(data_dir=Path(data_dir))
+GSW_PARAM_COLS = ["TAU1", "TAU2", "BETA0", "BETA1", "BETA2", "BETA3"]
+
 
+def _normalized_fed_params(params_raw):
+    """Fed parameter table indexed by normalized date, sorted, with incomplete rows dropped."""
     if not isinstance(params_raw.index, pd.DatetimeIndex):
         if "date" in params_raw.columns:
             params_df = params_raw.copy()
@@ -136,34 +102,98 @@ def build_gsw_curve_for_date(gsw_date, t_grid, dt_fwd=0.25, data_dir=DATA_DIR):
         params_df = params_raw.copy()
 
     params_df.index = pd.to_datetime(params_df.index).normalize()
-    params_df = params_df.sort_index()
+    return params_df.sort_index(kind="stable").dropna(subset=GSW_PARAM_COLS)
+
+
+def _date_keys(dates):
+    """Normalized dates as int64 nanoseconds since the epoch."""
+    return pd.DatetimeIndex(dates).normalize().as_unit("ns").asi8
+
+
+class GSWParamStore:
+    """In-memory Fed GSW parameters with as-of lookup by date.
+
+    Dates are kept as sorted int64 keys next to a contiguous, read-only (n_dates, 6)
+    array of (tau1, tau2, beta1, ..., beta4) with betas in decimals, so a lookup is a
+    single searchsorted. Use load_gsw_param_store to share one store per data directory.
+    """
+
+    def __init__(self, params_raw):
+        valid_params = _normalized_fed_params(params_raw)
+        params = valid_params[GSW_PARAM_COLS].to_numpy(dtype=float, copy=True)
+        # the Fed publishes betas in percent; rows already in decimals are left alone
+        scale = np.where(np.abs(params[:, 2:]).max(axis=1) > 1.0, 0.01, 1.0)
+        params[:, 2:] *= scale[:, None]
+
+        self.keys = _date_keys(valid_params.index)
+        self.params = np.ascontiguousarray(params)
+        self.keys.setflags(write=False)
+        self.params.setflags(write=False)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _positions(self, keys):
+        """Index of the last key on or before each of `keys`."""
+        pos = np.searchsorted(self.keys, keys, side="right") - 1
+        if np.any(pos < 0):
+            first = pd.Timestamp(np.min(np.asarray(keys)[pos < 0]))
+            raise ValueError(f"No valid GSW parameters found on/before {first.date()}")
+        return pos
+
+    def asof(self, date):
+        """Parameter date and (6,) parameter vector in effect on `date`."""
+        pos = int(self._positions(pd.Timestamp(date).normalize().value))
+        return pd.Timestamp(self.keys[pos]), self.params[pos]
+
+    def asof_many(self, dates):
+        """Parameter dates (DatetimeIndex) and (n, 6) parameters in effect on each of `dates`."""
+        pos = self._positions(_date_keys(pd.to_datetime(dates)))
+        return pd.DatetimeIndex(self.keys[pos]), self.params[pos]
+
 
-    required_cols = ["TAU1", "TAU2", "BETA0", "BETA1", "BETA2", "BETA3"]
-    valid_params = params_df.dropna(subset=required_cols)
-    idx = valid_params.index[valid_params.index <= gsw_date]
-    if len(idx) == 0:
-        raise ValueError(f"No valid GSW parameters found on/before {gsw_date.date()}")
-    actual_date = idx[-1]
-    row = valid_params.loc[actual_date]
+@lru_cache(maxsize=None)
+def _load_gsw_param_store(data_dir):
+    """Cached store keyed by the data directory string."""
+    return GSWParamStore(pull_yield_curve_data.load_fed_yield_curve_all(data_dir=Path(data_dir)))
 
-    tau1 = float(row["TAU1"])
-    tau2 = float(row["TAU2"])
 
-    b0 = float(row["BETA0"])
-    b1 = float(row["BETA1"])
-    b2 = float(row["BETA2"])
-    b3 = float(row["BETA3"])
+def load_gsw_param_store(data_dir=DATA_DIR):
+    """Fed GSW parameter store for `data_dir`, read from disk on first use only.
 
-    scale = 0.01 if max(abs(b0), abs(b1), abs(b2), abs(b3)) > 1.0 else 1.0
-    params = (tau1, tau2, b0 * scale, b1 * scale, b2 * scale, b3 * scale)
+    Call `_load_gsw_param_store.cache_clear()` after rewriting fed_yield_curve_all.parquet
+    in a running session.
+    """
+    return _load_gsw_param_store(str(Path(data_dir)))
 
-    spot = _gsw_spot(t_grid, params)
-    discount = np.exp(-spot * t_grid)
-    gsw_curve = pd.DataFrame({"T": t_grid, "discount": discount})
-    converted = cc.add_spot_and_forwards(gsw_curve, dt=dt_fwd, t_col="T", d_col="discount")
-    converted["date"] = actual_date
 
-    return actual_date, converted[["date", "T", "discount", "spot_cc", "forward_instant_cc"]]
+def gsw_params_asof(dates, data_dir=DATA_DIR):
+    """Latest Fed GSW parameter date and parameter set on or before each of `dates`."""
+    return load_gsw_param_store(data_dir).asof_many(dates)
+
+
+def build_gsw_curves(dates, t_grid, data_dir=DATA_DIR):
+    """GSW discount, spot and instantaneous forward curves for many dates in one call.
+
+    Returns:
+        tuple: (actual parameter dates, dict of curve type -> (n_dates, len(t_grid)) array)
+    """
+    actual_dates, params = gsw_params_asof(dates, data_dir=data_dir)
+    discount, spot, forward = gsw.nss_curves(params, t_grid)
+    return actual_dates, {"discount": discount, "spot_cc": spot, "forward_instant_cc": forward}
+
+
+def build_gsw_curve_for_date(gsw_date, t_grid, dt_fwd=0.25, data_dir=DATA_DIR):
+    """Build the GSW curve for a given date and maturity grid using the loaded parameters.
+
+    `dt_fwd` is no longer used: forwards are evaluated in closed form.
+    """
+    t_grid = np.sort(np.asarray(t_grid, dtype=float))
+    actual_dates, curves = build_gsw_curves([gsw_date], t_grid, data_dir=data_dir)
+    converted = pd.DataFrame({"date": actual_dates[0], "T": t_grid})
+    for curve_type in CURVE_TYPES:
+        converted[curve_type] = curves[curve_type][0]
+    return actual_dates[0], converted
 
 
 def _interp(y_df, t_grid, col):
@@ -186,51 +216,190 @@ def _safe_corr(x, y):
     return float(np.corrcoef(x_m, y_m)[0, 1])
 
 
+def _batched_corr(x, y):
+    """_safe_corr along the last axis of two broadcastable arrays, as centered dot products."""
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    mask = np.isfinite(x) & np.isfinite(y)
+    n = mask.sum(axis=-1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_c = np.where(mask, x - np.where(mask, x, 0.0).sum(axis=-1, keepdims=True) / n[..., None], 0.0)
+        y_c = np.where(mask, y - np.where(mask, y, 0.0).sum(axis=-1, keepdims=True) / n[..., None], 0.0)
+        sxx = np.einsum("...i,...i->...", x_c, x_c)
+        syy = np.einsum("...i,...i->...", y_c, y_c)
+        sxy = np.einsum("...i,...i->...", x_c, y_c)
+        corr = np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0)
+        # same cut-offs as _safe_corr: fewer than 3 points or np.isclose(std, 0)
+        flat = (np.sqrt(sxx / n) <= 1e-8) | (np.sqrt(syy / n) <= 1e-8)
+    return np.where((n < 3) | flat, np.nan, corr)
+
+
+def _common_dates(curves_by_method, methods):
+    """Sorted dates present in every method's curve output."""
+    common = np.unique(_date_keys(curves_by_method[methods[0]]["date"]))
+    for m in methods[1:]:
+        common = np.intersect1d(common, _date_keys(curves_by_method[m]["date"]))
+    if common.size == 0:
+        raise ValueError("No common dates across method curve outputs.")
+    return pd.DatetimeIndex(common)
+
+
+def resample_method_curves(curves_by_method, dates, t_grid, curve_types=CURVE_TYPES, methods=None):
+    """Dense array of every method's curves interpolated onto `t_grid`.
+
+    Each long curve table is sorted once by (date, T) and sliced per date, with the
+    same linear interpolation and flat extrapolation as _interp. Entries of
+    `curves_by_method` may also be common-curve store entries (see load_common_curves),
+    which are already on a grid and are only reindexed.
+
+    Returns:
+        array: shape (method, date, curve_type, maturity), NaN where a date or curve
+        type has no valid points
+    """
+    methods = list(METHOD_FILE_MAP) if methods is None else list(methods)
+    t_grid = np.asarray(t_grid, dtype=float)
+    out = np.full((len(methods), len(dates), len(curve_types), len(t_grid)), np.nan)
+    keys = _date_keys(dates)
+
+    for m, method in enumerate(methods):
+        df = curves_by_method[method]
+        if not isinstance(df, pd.DataFrame):
+            out[m] = _stored_curves_on_grid(df, keys, t_grid, curve_types)
+            continue
+        row_keys = _date_keys(df["date"])
+        T = df["T"].to_numpy(dtype=float)
+        order = np.lexsort((T, row_keys))
+        row_keys, T = row_keys[order], T[order]
+        starts = np.searchsorted(row_keys, keys, side="left")
+        ends = np.searchsorted(row_keys, keys, side="right")
+
+        for c, curve_type in enumerate(curve_types):
+            values = df[curve_type].to_numpy(dtype=float)[order]
+            valid = ~(np.isnan(T) | np.isnan(values))
+            for d, (lo, hi) in enumerate(zip(starts, ends)):
+                ok = valid[lo:hi]
+                if ok.any():
+                    out[m, d, c] = np.interp(t_grid, T[lo:hi][ok], values[lo:hi][ok])
+    return out
+
+
+def _stored_curves_on_grid(entry, keys, t_grid, curve_types):
+    """(date, curve_type, maturity) array from a common-curve store entry.
+
+    Columns are taken as stored when `t_grid` is part of the store's grid and linearly
+    interpolated (flat beyond the ends) otherwise; dates missing from the store are NaN.
+    """
+    grid = entry["T"]
+    out = np.full((len(keys), len(curve_types), len(t_grid)), np.nan)
+    stored_keys = _date_keys(entry["date"])
+    rows = np.searchsorted(stored_keys, keys)
+    found = rows < len(stored_keys)
+    found[found] = stored_keys[rows[found]] == keys[found]
+    rows = rows[found]
+
+    cols = np.minimum(np.searchsorted(grid, t_grid), len(grid) - 1)
+    exact = bool(np.all(grid[cols] == t_grid))
+    if not exact:
+        lo = np.clip(np.searchsorted(grid, t_grid, side="right") - 1, 0, len(grid) - 2)
+        w = np.clip((t_grid - grid[lo]) / (grid[lo + 1] - grid[lo]), 0.0, 1.0)
+
+    for c, curve_type in enumerate(curve_types):
+        values = entry[curve_type][rows]
+        if exact:
+            out[found, c] = values[:, cols]
+        else:
+            out[found, c] = values[:, lo] * (1.0 - w) + values[:, lo + 1] * w
+    return out
+
+
+def load_common_curves(data_dir=DATA_DIR, sources=None):
+    """Memory-map the common-curve store written by build_common_curves.py.
+
+    Returns:
+        dict: source ("mcc", "fisher", "waggoner", "gsw") -> dict with "date" and
+        "asof_date" (DatetimeIndex; for GSW the parameter date used), "T" (the maturity
+        grid) and, for each of CURVE_TYPES, a read-only (n_dates, len(T)) array that is
+        a view of the file rather than a copy
+    """
+    path = Path(data_dir) / COMMON_CURVES_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"Missing common-curve store: {path}")
+
+    reader = pa.ipc.open_file(pa.memory_map(str(path)))
+    meta = reader.schema.metadata
+    stored = json.loads(meta[b"sources"])
+    n_t = int(meta[b"n_maturities"])
+
+    out = {}
+    for i, source in enumerate(stored):
+        if sources is not None and source not in sources:
+            continue
+        batch = reader.get_batch(i)
+        entry = {
+            "date": pd.DatetimeIndex(batch.column("date").to_numpy()[::n_t]),
+            "asof_date": pd.DatetimeIndex(batch.column("asof_date").to_numpy()[::n_t]),
+            "T": batch.column("T").to_numpy()[:n_t],
+        }
+        if entry["T"].size == 0:
+            entry["T"] = COMMON_T_GRID
+        for curve_type in CURVE_TYPES:
+            entry[curve_type] = batch.column(curve_type).to_numpy().reshape(-1, n_t)
+        out[source] = entry
+    return out
+
+
+def common_curve_frames(store, sources=None):
+    """Long frames in the common (date, T, discount, spot_cc, forward_instant_cc) format,
+    plus asof_date, from a loaded common-curve store."""
+    frames = {}
+    for source, entry in store.items():
+        if sources is not None and source not in sources:
+            continue
+        n_dates, n_t = len(entry["date"]), len(entry["T"])
+        frame = pd.DataFrame(
+            {
+                "date": np.repeat(entry["date"].to_numpy(), n_t),
+                "asof_date": np.repeat(entry["asof_date"].to_numpy(), n_t),
+                "T": np.tile(entry["T"], n_dates),
+            }
+        )
+        for curve_type in CURVE_TYPES:
+            frame[curve_type] = np.asarray(entry[curve_type]).ravel()
+        frames[source] = frame
+    return frames
+
+
 def compute_correlation_metrics(curves_by_method=None, t_grid=None, data_dir=DATA_DIR):
-    """Compute date-level correlation metrics between each method and GSW, as well as summary statistics."""
+    """Compute date-level correlation metrics between each method and GSW, as well as summary statistics.
+
+    Without `curves_by_method` the method curves are read from the common-curve store.
+    """
     if curves_by_method is None:
-        curves_by_method = load_all_method_curves(data_dir=data_dir)
+        curves_by_method = load_common_curves(data_dir=data_dir, sources=list(METHOD_FILE_MAP))
 
     if t_grid is None:
         t_grid = np.linspace(0.25, 30.0, 240)
 
-    method_dates = []
-    for method in METHOD_FILE_MAP:
-        dts = set(pd.to_datetime(curves_by_method[method]["date"]).dt.normalize())
-        method_dates.append(dts)
-
-    common_dates = sorted(set.intersection(*method_dates))
-    if not common_dates:
-        raise ValueError("No common dates across method curve outputs.")
+    methods = list(METHOD_FILE_MAP)
+    common_dates = _common_dates(curves_by_method, methods)
+
+    gsw_dates, gsw_curves = build_gsw_curves(common_dates, t_grid, data_dir=data_dir)
+    method_curves = resample_method_curves(curves_by_method, common_dates, t_grid, CURVE_TYPES, methods)
+    gsw_stack = np.stack([gsw_curves[ct] for ct in CURVE_TYPES], axis=1)
+    corr = _batched_corr(method_curves, gsw_stack[None])  # (method, date, curve_type)
+
+    m_idx, d_idx, c_idx = np.indices(corr.shape).reshape(3, -1)
+    rows = pd.DataFrame(
+        {
+            "date": common_dates[d_idx],
+            "gsw_date": gsw_dates[d_idx],
+            "method": np.array(methods, dtype=object)[m_idx],
+            "curve_type": np.array(CURVE_TYPES, dtype=object)[c_idx],
+            "correlation": corr.ravel(),
+        }
+    )
 
-    rows = []
-    dt_fwd = float(np.median(np.diff(t_grid)))
-
-    for dt in common_dates:
-        gsw_actual_date, gsw_curve = build_gsw_curve_for_date(dt, t_grid=t_grid, dt_fwd=dt_fwd, data_dir=data_dir)
-
-        for method in METHOD_FILE_MAP:
-            method_df = curves_by_method[method]
-            m_curve = method_df.loc[method_df["date"] == dt]
-            if m_curve.empty:
-                continue
-
-            for curve_type in CURVE_TYPES:
-                c = _safe_corr(
-                    _interp(m_curve, t_grid, curve_type),
-                    _interp(gsw_curve, t_grid, curve_type),
-                )
-                rows.append(
-                    {
-                        "date": pd.to_datetime(dt),
-                        "gsw_date": pd.to_datetime(gsw_actual_date),
-                        "method": method,
-                        "curve_type": curve_type,
-                        "correlation": c,
-                    }
-                )
-
-    detail = pd.DataFrame(rows).sort_values(["date", "method", "curve_type"]).reset_index(drop=True)
+    detail = rows.sort_values(["date", "method", "curve_type"]).reset_index(drop=True)
     summary = detail.groupby("date", as_index=False)["correlation"].mean().rename(columns={"correlation": "overall_corr"})
 
     for method in METHOD_FILE_MAP:
@@ -279,6 +448,8 @@ def select_representative_dates(summary_by_date):
 
 def compute_and_save_correlation_metrics(curves_by_method=None, data_dir=DATA_DIR):
     """Compute correlation metrics and save the results to CSV files or html plots in the specified data directory."""
+    if curves_by_method is None:
+        curves_by_method = load_common_curves(data_dir=data_dir, sources=list(METHOD_FILE_MAP))
     detail, summary, selected = compute_correlation_metrics(curves_by_method=curves_by_method, data_dir=data_dir)
 
     data_dir = Path(data_dir)
@@ -334,47 +505,36 @@ def compute_and_save_correlation_metrics(curves_by_method=None, data_dir=DATA_DI
 
 
 def compute_method_pairwise_correlations(curves_by_method=None, t_grid=None, data_dir=DATA_DIR):
-    """Compute pairwise correlation metrics between replication methods for each curve type, and summary statistics."""
+    """Compute pairwise correlation metrics between replication methods for each curve type, and summary statistics.
+
+    Without `curves_by_method` the method curves are read from the common-curve store.
+    """
     if curves_by_method is None:
-        curves_by_method = load_all_method_curves(data_dir=data_dir)
+        curves_by_method = load_common_curves(data_dir=data_dir, sources=list(METHOD_FILE_MAP))
 
     if t_grid is None:
         t_grid = np.linspace(0.25, 30.0, 240)
 
     methods = list(METHOD_FILE_MAP.keys())
-    method_dates = []
-    for method in methods:
-        dts = set(pd.to_datetime(curves_by_method[method]["date"]).dt.normalize())
-        method_dates.append(dts)
-
-    common_dates = sorted(set.intersection(*method_dates))
-    if not common_dates:
-        raise ValueError("No common dates across method curve outputs.")
-
-    rows = []
-    for dt in common_dates:
-        date_curves = {
-            m: curves_by_method[m].loc[pd.to_datetime(curves_by_method[m]["date"]).dt.normalize() == dt]
-            for m in methods
+    common_dates = _common_dates(curves_by_method, methods)
+
+    method_curves = resample_method_curves(curves_by_method, common_dates, t_grid, METHOD_PAIR_CURVE_TYPES, methods)
+    first, second = np.triu_indices(len(methods), k=1)
+    corr = _batched_corr(method_curves[first], method_curves[second])  # (pair, date, curve_type)
+
+    p_idx, d_idx, c_idx = np.indices(corr.shape).reshape(3, -1)
+    names = np.array(methods, dtype=object)
+    rows = pd.DataFrame(
+        {
+            "date": common_dates[d_idx],
+            "method_1": names[first[p_idx]],
+            "method_2": names[second[p_idx]],
+            "curve_type": np.array(METHOD_PAIR_CURVE_TYPES, dtype=object)[c_idx],
+            "correlation": corr.ravel(),
         }
-        for i, m1 in enumerate(methods):
-            for m2 in methods[i + 1:]:
-                for curve_type in METHOD_PAIR_CURVE_TYPES:
-                    c = _safe_corr(
-                        _interp(date_curves[m1], t_grid, curve_type),
-                        _interp(date_curves[m2], t_grid, curve_type),
-                    )
-                    rows.append(
-                        {
-                            "date": pd.to_datetime(dt),
-                            "method_1": m1,
-                            "method_2": m2,
-                            "curve_type": curve_type,
-                            "correlation": c,
-                        }
-                    )
-
-    detail = pd.DataFrame(rows).sort_values(["date", "curve_type", "method_1", "method_2"]).reset_index(drop=True)
+    )
+
+    detail = rows.sort_values(["date", "curve_type", "method_1", "method_2"]).reset_index(drop=True)
     overall = (
         detail.groupby(["curve_type", "method_1", "method_2"], as_index=False)["correlation"]
         .mean()
@@ -9,6 +9,10 @@ Provides Curve Conversions for our different replication methods:
 
 Compiles a set of functions to perform these conversions, and a 
 wrapper to add all the columns to the curve DataFrame at once.
+
+The panel functions at the bottom do the same conversions for many curves
+stacked in one long frame sorted by (date, T), with segment-aware integrals,
+gradients and interpolation instead of a loop over dates.
 """
 
 import pandas as pd
@@ -118,4 +122,196 @@ def add_spot_and_forwards(curve, dt, t_col, d_col):
     out = forward_rate_instant_cc(out, t_col, d_col, "forward_instant_cc")
     out = forward_rate_discrete_cc(out, dt, t_col, d_col, f"forward_{dt:g}y_cc")
     return out
-    
\ No newline at end of file
+    
+### Panel (many curves at once) ###
+def curve_segments(groups):
+    """Start offsets and lengths of the runs of equal keys in a sorted key array."""
+    groups = np.asarray(groups)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    lengths = np.diff(np.r_[starts, groups.size])
+    return starts, lengths
+
+
+def _padded(values, starts, lengths, fill=np.nan):
+    """Lay out a long array as a (segments, longest segment) 2-D array, padded with `fill`."""
+    seg = np.repeat(np.arange(starts.size), lengths)
+    pos = np.arange(values.size) - starts[seg]
+    out = np.full((starts.size, lengths.max(initial=0)), fill, dtype=float)
+    out[seg, pos] = values
+    return out, seg, pos
+
+
+def segment_cumtrapz(y, x, starts, lengths):
+    """Cumulative trapezoid integral of y(x) restarting at 0 at the start of every segment."""
+    inc = np.zeros(len(y))
+    inc[1:] = 0.5 * (y[1:] + y[:-1]) * np.diff(x)
+    inc[starts] = 0.0
+    padded, seg, pos = _padded(inc, starts, lengths, fill=0.0)
+    return np.cumsum(padded, axis=1)[seg, pos]
+
+
+def segment_gradient(y, x, starts, lengths):
+    """np.gradient(y, x) within every segment: second order in the interior and at the
+    edges, first order for two-point segments."""
+    if np.any(lengths < 2):
+        raise ValueError("Each curve needs at least two points to compute gradients.")
+    n = len(y)
+    ends = starts + lengths - 1
+    dx = np.diff(x)
+    out = np.empty(n)
+
+    interior = np.ones(n, dtype=bool)
+    interior[starts] = False
+    interior[ends] = False
+    i = np.flatnonzero(interior)
+    dx1, dx2 = dx[i - 1], dx[i]
+    out[i] = (
+        -(dx2) / (dx1 * (dx1 + dx2)) * y[i - 1]
+        + (dx2 - dx1) / (dx1 * dx2) * y[i]
+        + dx1 / (dx2 * (dx1 + dx2)) * y[i + 1]
+    )
+
+    two = lengths == 2
+    s, e = starts[two], ends[two]
+    out[s] = out[e] = (y[e] - y[s]) / dx[s]
+
+    s, e = starts[~two], ends[~two]
+    dx1, dx2 = dx[s], dx[s + 1]
+    out[s] = (
+        -(2.0 * dx1 + dx2) / (dx1 * (dx1 + dx2)) * y[s]
+        + (dx1 + dx2) / (dx1 * dx2) * y[s + 1]
+        - dx1 / (dx2 * (dx1 + dx2)) * y[s + 2]
+    )
+    dx1, dx2 = dx[e - 2], dx[e - 1]
+    out[e] = (
+        dx2 / (dx1 * (dx1 + dx2)) * y[e - 2]
+        - (dx2 + dx1) / (dx1 * dx2) * y[e - 1]
+        + (2.0 * dx2 + dx1) / (dx2 * (dx1 + dx2)) * y[e]
+    )
+    return out
+
+
+def segment_interp(xq, x, y, starts, lengths):
+    """np.interp(xq, x, y) within every segment, with flat extrapolation at both ends.
+    xq[k] is looked up in the segment that holds row k."""
+    seg = np.repeat(np.arange(starts.size), lengths)
+    # complex numbers sort lexicographically (real, then imaginary), so (segment, x)
+    # pairs can be searched exactly with one searchsorted
+    j = np.searchsorted(seg + 1j * x, seg + 1j * xq, side="right") - 1
+    first, last = starts[seg], starts[seg] + lengths[seg] - 1
+    lo = np.clip(j, first, np.maximum(last - 1, first))
+    hi = np.minimum(lo + 1, last)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (y[hi] - y[lo]) / (x[hi] - x[lo])
+        out = slope * (xq - x[lo]) + y[lo]
+    out = np.where(xq <= x[first], y[first], out)
+    return np.where(xq >= x[last], y[last], out)
+
+
+def segment_median_spacing(x, starts, lengths):
+    """Median spacing of x within every segment, repeated for each row."""
+    dx = np.diff(x, prepend=np.nan)
+    padded, seg, _ = _padded(dx, starts, lengths)
+    spacing = np.sort(padded[:, 1:], axis=1)  # the NaN padding sorts last
+    k = lengths - 1
+    rows = np.arange(starts.size)
+    lo, hi = np.maximum((k - 1) // 2, 0), np.maximum(k // 2, 0)
+    if spacing.shape[1] == 0:
+        return np.full(len(x), np.nan)
+    med = np.where(k > 0, 0.5 * (spacing[rows, lo] + spacing[rows, hi]), np.nan)
+    return med[seg]
+
+
+def convert_panel(T, groups, dt, discount=None, forward=None):
+    """Spot and forward rates for many curves stacked in long arrays, in one pass.
+
+    Args:
+        T: Times, sorted ascending within each group
+        groups: Curve keys (e.g. dates), sorted so that each curve is one contiguous run
+        dt: Discrete forward tenor, a scalar or one value per row
+        discount: Discount factors D(T); give this or `forward`
+        forward: Instantaneous forward rates f(T); the discount curve is then
+            exp(-cumulative trapezoid integral of f) and f is returned unchanged as
+            forward_instant_cc
+
+    Returns:
+        dict: arrays "discount", "spot_cc", "spot_simple", "forward_instant_cc" and
+        "forward_discrete_cc", each aligned with T
+    """
+    T = np.asarray(T, dtype=float)
+    starts, lengths = curve_segments(groups)
+    if (discount is None) == (forward is None):
+        raise ValueError("Pass exactly one of discount or forward.")
+
+    if forward is not None:
+        forward = np.asarray(forward, dtype=float)
+        D = np.exp(-segment_cumtrapz(forward, T, starts, lengths))
+    else:
+        D = np.asarray(discount, dtype=float)
+
+    #sanity checks
+    if np.any(np.isnan(T)) or np.any(np.isnan(D)):
+        raise ValueError("Input curve contains NaN values.")
+    if np.any(T < 0) or np.any(D <= 0):
+        raise ValueError("Times must be non-negative and discount factors must be positive.")
+    dx = np.diff(T)
+    dx[starts[1:] - 1] = 0.0
+    if np.any(dx < 0):
+        raise ValueError("Times must be sorted within each curve.")
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), T.shape)
+    if np.any(dt <= 0):
+        raise ValueError("dt must be positive.")
+
+    lnD = np.log(D)
+    pos = T > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spot_cc = np.where(pos, -lnD / T, np.nan)
+        spot_simple = np.where(pos, D ** (-1.0 / T) - 1.0, np.nan)
+
+    #fill T=0 with first positive rate of the same curve (T is sorted, so zeros lead)
+    if not pos.all():
+        n_zero = np.add.reduceat((~pos).astype(np.int64), starts)
+        first_pos = np.repeat(np.minimum(starts + n_zero, len(T) - 1), lengths)
+        has_pos = np.repeat(n_zero < lengths, lengths)
+        for r in (spot_cc, spot_simple):
+            r[~pos] = np.where(has_pos, r[first_pos], 0.0)[~pos]
+
+    if forward is None:
+        forward = -segment_gradient(lnD, T, starts, lengths)
+    D2 = segment_interp(T + dt, T, D, starts, lengths)
+    forward_discrete = (lnD - np.log(D2)) / dt
+
+    return {
+        "discount": D,
+        "spot_cc": spot_cc,
+        "spot_simple": spot_simple,
+        "forward_instant_cc": forward,
+        "forward_discrete_cc": forward_discrete,
+    }
+
+
+def add_spot_and_forwards_panel(curve, dt, t_col, d_col=None, f_col=None, group_col="date"):
+    """Panel version of add_spot_and_forwards for a long frame of many curves.
+
+    `curve` must be sorted by (group_col, t_col). Give `d_col` for a discount curve or
+    `f_col` for an instantaneous forward curve (then a "discount" column is added).
+    With a scalar dt the discrete forward column is named as in add_spot_and_forwards,
+    otherwise "forward_discrete_cc".
+    """
+    out = convert_panel(
+        curve[t_col].to_numpy(dtype=float),
+        curve[group_col].to_numpy(),
+        dt,
+        discount=None if d_col is None else curve[d_col].to_numpy(dtype=float),
+        forward=None if f_col is None else curve[f_col].to_numpy(dtype=float),
+    )
+    discrete_col = f"forward_{dt:g}y_cc" if np.ndim(dt) == 0 else "forward_discrete_cc"
+    new_cols = {
+        "spot_cc": out["spot_cc"],
+        "spot_simple": out["spot_simple"],
+        "forward_instant_cc": out["forward_instant_cc"],
+        discrete_col: out["forward_discrete_cc"],
+    }
+    if d_col is None:
+        new_cols = {"discount": out["discount"], **new_cols}
+    return curve.assign(**new_cols)
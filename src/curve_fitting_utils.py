@@ -6,11 +6,14 @@ preparation and cashflow construction. This includes:
     - Constructing cashflows and payment times for each bond, 
         including handling of stubs and missing first coupon dates
 """
+import hashlib
+import os
 from pathlib import Path
 import numpy as np
 import pandas as pd
-from pandas.tseries.offsets import DateOffset, MonthEnd
-import error_metrics
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scipy import sparse
 
 from settings import config
 
@@ -20,15 +23,71 @@ OUTPUT_DIR = Path(config("OUTPUT_DIR"))
 START_DATE = "1970-01-01"
 END_DATE = "1995-12-31"
 
+CASHFLOW_CACHE_FILE = "cashflow_cache.parquet"
+CASHFLOW_CACHE_KEY = b"cashflow_cache_key"
+
+# dates per warm-started chunk in the chunked fitting loops; fixed, so that fitted
+# results never depend on how many workers the chunks are spread over
+DATE_CHUNK_SIZE = 12
+
 ERROR_COLS = ["bid", "ask", "duration", "model_price", "ttm"]
 ID_COLS = ["date", "cusip"]
 
-def load_tidy_CRSP_treasury(data_dir = DATA_DIR):
-    """Loads the tidy CRSP treasury data from the specified directory"""
+def load_tidy_CRSP_treasury(data_dir = DATA_DIR, start_date=None, end_date=None, columns=None):
+    """Loads the tidy CRSP treasury data from the specified directory, optionally only
+    rows with start_date <= date <= end_date and only `columns`.
+
+    Both are pushed down to pyarrow: tidy_CRSP_treasury.py writes the file sorted by date
+    in fixed-size row groups, so row groups outside the range are skipped by their date
+    statistics."""
+    data_dir = Path(data_dir)
+    start = pd.Timestamp(start_date) if start_date is not None else None
+    end = pd.Timestamp(end_date) if end_date is not None else None
+
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", start))
+    if end is not None:
+        filters.append(("date", "<=", end))
     treasury_path = data_dir / "tidy_CRSP_treasury.parquet"
-    treasury = pd.read_parquet(treasury_path)
+    treasury = pd.read_parquet(treasury_path, columns=columns, filters=filters or None)
     return treasury
 
+def iter_date_slices(sample, dates=None):
+    """Yields (date, rows of `sample` on that date) in order of first appearance, or for
+    each of `dates` in order if given. Rows are grouped once, so each slice costs
+    O(rows on that date) instead of a full boolean mask over the sample."""
+    codes, uniques = pd.factorize(sample["date"])
+    order = np.argsort(codes, kind="stable")
+    # rows with a missing date sort first (code -1) and belong to no slice
+    offsets = np.r_[0, np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))]
+    offsets += np.count_nonzero(codes < 0)
+
+    if dates is None:
+        dates = uniques
+        positions = range(len(uniques))
+    else:
+        positions = pd.Index(uniques).get_indexer(pd.DatetimeIndex(dates))
+    for date, pos in zip(dates, positions):
+        rows = order[offsets[pos]:offsets[pos + 1]] if pos >= 0 else order[:0]
+        yield date, sample.iloc[rows]
+
+def date_chunks(dates, chunk_size=DATE_CHUNK_SIZE):
+    """Split dates into contiguous chunks of chunk_size, as used by the chunked, optionally
+    parallel, fitting loops. chunk_size=None gives a single chunk (fully sequential)."""
+    if chunk_size is None:
+        return [dates]
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    return [dates[i:i + chunk_size] for i in range(0, len(dates), chunk_size)]
+
+def print_progress(date, idx, n_total=None):
+    """Progress line printed by the per-date fitting loops (n_total is unknown when streaming)."""
+    if n_total:
+        print(f"{date.to_period('M')}: {idx} / {n_total} ({int(idx/n_total*100)}%)")
+    else:
+        print(f"{date.to_period('M')}: {idx}")
+
 def filter_waggoner_treasury_data(treasury, start_date=START_DATE, end_date=END_DATE):
     """
     Filters the treasury data according to the following criteria:
@@ -52,145 +111,476 @@ def filter_waggoner_treasury_data(treasury, start_date=START_DATE, end_date=END_
 def split_in_out_sample_data(treasury_filtered):
     """Splits the filtered treasury data into in-sample and out-of-sample groups 
     according to Waggoner's method"""
-    # 1) Sort so cumcount follows maturity order within each month
-    treasury_filtered = treasury_filtered.sort_values(["date", "maturity_date"])
-
-    # 2) Rank within month by maturity (0,1,2,...)
-    treasury_filtered["maturity_rank_in_month"] = treasury_filtered.groupby("date").cumcount()
-
-    # 3) Every other security -> parity of the rank
-    treasury_filtered["group"] = (treasury_filtered["maturity_rank_in_month"] % 2)  # 0 or 1
-
-    # Ensure longest maturity each month ends up in the in-sample group
-    def enforce_longest_in_sample(group):
-        """
-        Ensure the longest-maturity security is in group 0.
-        If not, flip the entire month's assignment.
-        """
-        # Longest maturity = last row (already sorted ascending)
-        if group.iloc[-1]["group"] == 1:
-            group["group"] = 1 - group["group"]
-        return group
-
-    treasury_filtered = treasury_filtered.groupby("date", group_keys=False).apply(enforce_longest_in_sample)
-
-    # Create in-sample indicator
-    treasury_filtered["is_in_sample"] = treasury_filtered["group"] == 0
-
-    # Build dataframes of in-sample and out-of-sample data
-    in_sample = treasury_filtered.loc[
-        treasury_filtered.is_in_sample].drop(
-            ["maturity_rank_in_month",
-             "group",
-             "is_in_sample"],
-            axis=1)
-    out_of_sample = treasury_filtered.loc[
-        ~treasury_filtered.is_in_sample].drop(
-            ["maturity_rank_in_month",
-             "group",
-             "is_in_sample"],
-            axis=1)
+    # 1) Order rows by maturity within each month; only the two key columns are sorted
+    keys = treasury_filtered[["date", "maturity_date"]].reset_index(drop=True)
+    keys = keys.sort_values(["date", "maturity_date"])
+    order = keys.index.to_numpy()
 
-    return in_sample, out_of_sample
-
-def get_cashflows_from_bonds(bonds, face=100, freq=2, stub_tol_days=3):
-    """Returns cashflows and times for each bond in the input dataframe."""
-    cashflows, times = [], []
+    # 2) Every other security -> parity of the rank within month (0,1,2,...)
+    parity = keys.groupby("date").cumcount().to_numpy() % 2
 
-    months = int(12 / freq)
-
-    for _, row in bonds.iterrows():
-        settle = row["date"]
-        maturity_date = row["maturity_date"]
-        first_coupon = row.get("first_coupon_date", pd.NaT) #account for missing first_coupon_date (treat as NaT, which will be handled as regular schedule)
-        cpn_rate = row["coupon"] / 100.0
-        coupon_amt = face * cpn_rate / freq
-
-        # Infer first_coupon_date if missing for coupon bonds
-        if coupon_amt > 0 and pd.isna(first_coupon):
-            month_end = (maturity_date == maturity_date + MonthEnd(0))
-            d = maturity_date
-            while d > settle:
-                prev = d - DateOffset(months=months)
-                if month_end:
-                    prev = prev + MonthEnd(0)
-                if prev <= settle < d:
-                    first_coupon = d
-                    break
-                d = prev
-            if pd.isna(first_coupon):
-                raise ValueError(f"Could not determine first coupon date for bond with maturity {maturity_date} and settle {settle}")
-
-        if coupon_amt > 0:
-            # build coupon schedule forward from first_coupon
-            month_end = (first_coupon == first_coupon + MonthEnd(0))
-
-            payment_dates = []
-            d = first_coupon
-            while d.to_period("M") <= maturity_date.to_period("M"):
-                if d > settle:
-                    payment_dates.append(d)
-                d = d + DateOffset(months=months) + MonthEnd(0) if month_end else d + DateOffset(months=months)
-
-            payment_dates = pd.to_datetime(payment_dates)
-            
-            # Handle the case of no payment dates
-            if len(payment_dates) == 0:
-                maturity_t = (maturity_date - settle).days / 365.0
-                payment_times = np.array([maturity_t], dtype=float)
-                cf = np.array([coupon_amt + face], dtype=float)
-            else:
-                payment_times = np.array([(dt - settle).days / 365.0 for dt in payment_dates], dtype=float)
-                cf = np.full(payment_times.shape[0], coupon_amt, dtype=float)
-                cf[-1] += face
+    # 3) Flip a month's assignment when its longest maturity (last rank) has parity 1,
+    #    so the longest-maturity security is always in-sample
+    last_parity = pd.Series(parity).groupby(keys["date"].to_numpy()).transform("last").to_numpy()
+    is_in_sample = (parity ^ last_parity) == 0
 
-                # Stub handling
-                first_pay = payment_dates[0]
-                prev_coupon = first_pay - DateOffset(months=months)
-                if month_end:
-                    prev_coupon = prev_coupon + MonthEnd(0)
+    in_sample = treasury_filtered.iloc[order[is_in_sample]]
+    out_of_sample = treasury_filtered.iloc[order[~is_in_sample]]
+    return in_sample, out_of_sample
 
-                regular_days = (first_pay - prev_coupon).days
+def _month_index(days):
+    """Months since the epoch for an array of datetime64[D] values."""
+    return days.astype("datetime64[M]").astype(np.int64)
 
-                issue_date = row.get("issue_date", pd.NaT)
-                accrual_start = max(issue_date, prev_coupon) if pd.notna(issue_date) else prev_coupon
-                stub_days = (first_pay - accrual_start).days
+def _month_start(months):
+    """Epoch day of the first calendar day of each month index."""
+    return months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
 
-                if abs(stub_days - regular_days) > stub_tol_days and regular_days != 0:
-                    cf[0] = coupon_amt * (stub_days / regular_days)
+def _days_in_month(months):
+    """Number of calendar days in each month index."""
+    return _month_start(months + 1) - _month_start(months)
 
-        else:
-            maturity_t = (maturity_date - settle).days / 365.0
-            payment_times = np.array([maturity_t], dtype=float)
-            cf = np.array([face], dtype=float)
+def _roll_schedule(months0, day0, month_end, step, n_steps):
+    """
+    Roll a date forward (step > 0) or backward (step < 0) n_steps-1 times by
+    `step` months, reproducing the day clamping of repeated DateOffset steps
+    (plus MonthEnd(0) for month-end schedules). Returns a (rows, n_steps) array
+    of epoch days, column k being the k-th date of each schedule.
+    """
+    months = months0[:, None] + step * np.arange(n_steps)[None, :]
+    dim = _days_in_month(months)
+    # DateOffset clamps the day to the month length at each step, and the clamp persists
+    day = np.where(month_end[:, None], dim,
+                   np.minimum(day0[:, None], np.minimum.accumulate(dim, axis=1)))
+    return _month_start(months) + day - 1
+
+def _as_epoch_days(bonds, col):
+    """Epoch days (int64) for a date column, with a NaT mask; all NaT if the column is missing."""
+    if col not in bonds.columns:
+        n = len(bonds)
+        return np.zeros(n, dtype=np.int64), np.ones(n, dtype=bool)
+    values = pd.to_datetime(bonds[col]).to_numpy().astype("datetime64[D]")
+    missing = np.isnat(values)
+    return np.where(missing, 0, values.astype(np.int64)), missing
+
+def build_cashflow_arrays(bonds, face=100, freq=2, stub_tol_days=3):
+    """
+    Vectorized cashflow engine: builds coupon schedules, stub coupons and year
+    fractions for every row of `bonds` at once (a single date panel or the whole
+    sample, since each row carries its own settle date).
+
+    Returns
+    -------
+    c_all    : (total_cf,) concatenated cashflows across all bonds
+    times_all: (total_cf,) cashflow times in years (ACT/365) from each bond's settle date
+    bond_idx : (total_cf,) positional index of the bond each cashflow belongs to
+
+    Cashflows are grouped contiguously per bond in row order and match
+    get_cashflows_from_bonds exactly.
+    """
+    months = int(12 / freq)
+    N = len(bonds)
+    if N == 0:
+        return np.empty(0, dtype=float), np.empty(0, dtype=float), np.empty(0, dtype=np.int64)
+
+    settle, _ = _as_epoch_days(bonds, "date")
+    maturity, _ = _as_epoch_days(bonds, "maturity_date")
+    first_coupon, fc_missing = _as_epoch_days(bonds, "first_coupon_date")
+    issue, issue_missing = _as_epoch_days(bonds, "issue_date")
+
+    cpn_rate = bonds["coupon"].to_numpy(dtype=float) / 100.0
+    coupon_amt = face * cpn_rate / freq
+    is_coupon = coupon_amt > 0
+
+    m_settle = _month_index(settle.astype("datetime64[D]"))
+    m_mat = _month_index(maturity.astype("datetime64[D]"))
+
+    # Infer first_coupon_date if missing for coupon bonds: the earliest date of
+    # the schedule rolled backward from maturity that falls after settle
+    infer = is_coupon & fc_missing
+    if infer.any():
+        rows = np.flatnonzero(infer)
+        mat_dim = _days_in_month(m_mat[rows])
+        mat_day = maturity[rows] - _month_start(m_mat[rows]) + 1
+        n_back = max(1, int(np.max((m_mat[rows] - m_settle[rows]) // months)) + 2)
+        back = _roll_schedule(m_mat[rows], mat_day, mat_day == mat_dim, -months, n_back)
+        n_after = (back > settle[rows, None]).sum(axis=1)
+        if np.any(n_after == 0):
+            bad = rows[np.argmax(n_after == 0)]
+            raise ValueError(
+                f"Could not determine first coupon date for bond with maturity "
+                f"{pd.Timestamp(bonds['maturity_date'].iloc[bad])} and settle {pd.Timestamp(bonds['date'].iloc[bad])}"
+            )
+        first_coupon = first_coupon.copy()
+        first_coupon[rows] = back[np.arange(rows.size), n_after - 1]
+
+    # Build coupon schedules forward from first_coupon through the maturity month
+    m_fc = _month_index(first_coupon.astype("datetime64[D]"))
+    fc_day = first_coupon - _month_start(m_fc) + 1
+    fc_month_end = fc_day == _days_in_month(m_fc)
+    n_fwd = np.where(is_coupon & (m_mat >= m_fc), (m_mat - m_fc) // months + 1, 0)
+
+    rows = np.flatnonzero(n_fwd > 0)
+    n_pay = np.zeros(N, dtype=np.int64)
+    pay_dates = np.empty(0, dtype=np.int64)
+    if rows.size:
+        width = int(n_fwd[rows].max())
+        fwd = _roll_schedule(m_fc[rows], fc_day[rows], fc_month_end[rows], months, width)
+        valid = (np.arange(width)[None, :] < n_fwd[rows, None]) & (fwd > settle[rows, None])
+        n_pay[rows] = valid.sum(axis=1)
+        pay_dates = fwd[valid]
+
+    # Bonds without coupon dates after settle pay a single cashflow at maturity
+    has_pay = n_pay > 0
+    counts = np.where(has_pay, n_pay, 1)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    bond_idx = np.repeat(np.arange(N), counts)
+
+    pay_flat = has_pay[bond_idx]
+    dates_all = np.repeat(maturity, counts)
+    dates_all[pay_flat] = pay_dates
+    c_all = np.repeat(np.where(is_coupon, coupon_amt + face, float(face)), counts)
+    c_all[pay_flat] = coupon_amt[bond_idx[pay_flat]]
+
+    first = offsets[:-1][has_pay]
+    last = offsets[1:][has_pay] - 1
+    c_all[last] += face
+
+    # Stub handling: prorate the first coupon if its accrual period is irregular
+    coupon_rows = np.flatnonzero(has_pay)
+    if coupon_rows.size:
+        first_pay = dates_all[first]
+        m_fp = _month_index(first_pay.astype("datetime64[D]"))
+        m_prev = m_fp - months
+        prev_dim = _days_in_month(m_prev)
+        fp_day = first_pay - _month_start(m_fp) + 1
+        prev_day = np.where(fc_month_end[coupon_rows], prev_dim, np.minimum(fp_day, prev_dim))
+        prev_coupon = _month_start(m_prev) + prev_day - 1
+
+        regular_days = first_pay - prev_coupon
+        accrual_start = np.where(issue_missing[coupon_rows], prev_coupon,
+                                 np.maximum(issue[coupon_rows], prev_coupon))
+        stub_days = first_pay - accrual_start
+
+        is_stub = (np.abs(stub_days - regular_days) > stub_tol_days) & (regular_days != 0)
+        c_all[first[is_stub]] = coupon_amt[coupon_rows[is_stub]] * (
+            stub_days[is_stub] / regular_days[is_stub])
+
+    times_all = (dates_all - np.repeat(settle, counts)) / 365.0
+    return c_all, times_all, bond_idx
+
+def _cashflow_cache_key(source_path, face, freq, stub_tol_days):
+    """Hash of the tidy treasury file contents and the schedule parameters."""
+    h = hashlib.sha256()
+    with open(source_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    h.update(f"face={face};freq={freq};stub_tol_days={stub_tol_days}".encode())
+    return h.hexdigest()
+
+def _cashflow_store(keys, c_all, times_all, bond_idx, face, freq, stub_tol_days, key=None):
+    """Assemble the in-memory cashflow store used by lookup_cashflow_arrays."""
+    counts = np.bincount(bond_idx, minlength=len(keys))
+    return {
+        "keys": keys,
+        "offsets": np.concatenate([[0], np.cumsum(counts)]),
+        "c_all": np.asarray(c_all, float),
+        "times_all": np.asarray(times_all, float),
+        "params": (face, freq, stub_tol_days),
+        "key": key,
+    }
+
+def _read_cashflow_cache(path, key):
+    """Read the on-disk cashflow cache, or None if it is missing or stale."""
+    if not path.exists():
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    if metadata.get(CASHFLOW_CACHE_KEY, b"").decode() != key:
+        return None
+    df = pd.read_parquet(path)
+    cusip = df["cusip"].to_numpy()
+    date = df["date"].to_numpy()
+    new_bond = np.ones(len(df), dtype=bool)
+    new_bond[1:] = (cusip[1:] != cusip[:-1]) | (date[1:] != date[:-1])
+    starts = np.flatnonzero(new_bond)
+    keys = pd.MultiIndex.from_arrays([cusip[starts], date[starts]], names=["cusip", "date"])
+    bond_idx = np.cumsum(new_bond) - 1
+    return keys, df["c"].to_numpy(), df["t"].to_numpy(), bond_idx
+
+def _write_cashflow_cache(path, store):
+    """Atomically write the cashflow store as one row per cashflow, tagged with its cache key."""
+    counts = np.diff(store["offsets"])
+    df = pd.DataFrame({
+        "cusip": np.repeat(store["keys"].get_level_values("cusip").to_numpy(), counts),
+        "date": np.repeat(store["keys"].get_level_values("date").to_numpy(), counts),
+        "c": store["c_all"],
+        "t": store["times_all"],
+    })
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           CASHFLOW_CACHE_KEY: store["key"].encode()})
+    tmp_path = path.with_suffix(".tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+def load_cashflow_cache(treasury, data_dir=DATA_DIR, face=100, freq=2, stub_tol_days=3):
+    """
+    Returns a cashflow store keyed by (cusip, settle date) covering every row of
+    `treasury`, so all fitting methods (and their out-of-sample and modern runs)
+    share one set of schedules instead of regenerating them per date.
 
-        cashflows.append(cf)
-        times.append(payment_times)
+    The store is persisted to DATA_DIR/cashflow_cache.parquet and invalidated
+    whenever tidy_CRSP_treasury.parquet or (face, freq, stub_tol_days) change.
+    Rows missing from a valid cache are computed and appended.
+    """
+    data_dir = Path(data_dir)
+    source_path = data_dir / "tidy_CRSP_treasury.parquet"
+    cache_path = data_dir / CASHFLOW_CACHE_FILE
+    key = _cashflow_cache_key(source_path, face, freq, stub_tol_days) if source_path.exists() else None
+
+    cached = _read_cashflow_cache(cache_path, key) if key is not None else None
+    if cached is None:
+        keys = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=["cusip", "date"])
+        cached = (keys, np.empty(0), np.empty(0), np.empty(0, dtype=np.int64))
+    keys, c_all, times_all, bond_idx = cached
+
+    bonds = treasury.drop_duplicates(["cusip", "date"])
+    new_keys = pd.MultiIndex.from_arrays([bonds["cusip"], bonds["date"]], names=["cusip", "date"])
+    missing = keys.get_indexer(new_keys) < 0
+    if missing.any():
+        c_new, t_new, idx_new = build_cashflow_arrays(
+            bonds.loc[missing], face=face, freq=freq, stub_tol_days=stub_tol_days)
+        bond_idx = np.concatenate([bond_idx, idx_new + len(keys)])
+        keys = keys.append(new_keys[missing])
+        c_all = np.concatenate([c_all, c_new])
+        times_all = np.concatenate([times_all, t_new])
+
+    store = _cashflow_store(keys, c_all, times_all, bond_idx, face, freq, stub_tol_days, key=key)
+    if key is not None and missing.any():
+        _write_cashflow_cache(cache_path, store)
+    return store
+
+def lookup_cashflow_arrays(store, bonds):
+    """
+    Flat (c_all, times_all, bond_idx) arrays for `bonds` gathered from a cashflow
+    store built by load_cashflow_cache. Bonds absent from the store are computed.
+    """
+    face, freq, stub_tol_days = store["params"]
+    query = pd.MultiIndex.from_arrays([bonds["cusip"], bonds["date"]])
+    pos = store["keys"].get_indexer(query)
+    if np.any(pos < 0):
+        return build_cashflow_arrays(bonds, face=face, freq=freq, stub_tol_days=stub_tol_days)
+
+    starts = store["offsets"][pos]
+    counts = store["offsets"][pos + 1] - starts
+    bond_idx = np.repeat(np.arange(len(pos)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    take = np.repeat(starts, counts) + within
+    return store["c_all"][take], store["times_all"][take], bond_idx
+
+def get_cashflows_from_bonds(bonds, face=100, freq=2, stub_tol_days=3, cache=None):
+    """Returns cashflows and times for each bond in the input dataframe.
+
+    If `cache` is a store from load_cashflow_cache built with the same schedule
+    parameters, the schedules are looked up rather than recomputed."""
+    if cache is not None and cache["params"] == (face, freq, stub_tol_days):
+        c_all, times_all, bond_idx = lookup_cashflow_arrays(cache, bonds)
+    else:
+        c_all, times_all, bond_idx = build_cashflow_arrays(
+            bonds, face=face, freq=freq, stub_tol_days=stub_tol_days)
+    if len(bonds) == 0:
+        return [], []
+    splits = np.cumsum(np.bincount(bond_idx, minlength=len(bonds)))[:-1]
+    return np.split(c_all, splits), np.split(times_all, splits)
+
+def cashflow_offsets(bond_idx, N):
+    """
+    (N + 1,) start offsets of each bond's cashflows in the concatenated arrays.
 
-    return cashflows, times
+    Cashflows must be stored contiguously per bond (bond_idx non-decreasing), which
+    is how every caller builds c_all / bond_idx.
+    """
+    bond_idx = np.asarray(bond_idx)
+    if bond_idx.size and np.any(bond_idx[1:] < bond_idx[:-1]):
+        raise ValueError("bond_idx must be non-decreasing (cashflows grouped by bond).")
+    return np.searchsorted(bond_idx, np.arange(N + 1))
 
+def bond_cashflow_matrix(weights, offsets):
+    """Sparse (N x total_cf) CSR matrix whose row i sums bond i's weighted cashflows."""
+    n = len(weights)
+    return sparse.csr_array((weights, np.arange(n), offsets), shape=(len(offsets) - 1, n))
 
+def date_input_hashes(sample):
+    """
+    sha256 of each date's input rows (columns and rows in canonical order), indexed by
+    date. Incremental runs compare these against stored hashes to find new or
+    changed dates.
+    """
+    rows = sample[sorted(sample.columns)].sort_values(["date", "cusip"], kind="stable")
+    row_hash = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    dates = rows["date"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]]) if len(dates) else np.empty(0, int)
+    ends = np.r_[starts[1:], len(dates)]
+    return pd.Series(
+        [hashlib.sha256(row_hash[s:e].tobytes()).hexdigest() for s, e in zip(starts, ends)],
+        index=pd.DatetimeIndex(dates[starts], name="date"),
+        name="input_hash",
+        dtype=object,
+    )
+
+def replace_dates(existing, new, dates, date_col="date"):
+    """Rows of `existing` outside `dates`, plus all rows of `new`, stably sorted by date."""
+    if existing is None or existing.empty:
+        merged = new
+    elif new.empty:
+        merged = existing.loc[~existing[date_col].isin(dates)]
+    else:
+        merged = pd.concat([existing.loc[~existing[date_col].isin(dates)], new], ignore_index=True)
+    return merged.sort_values(date_col, kind="stable").reset_index(drop=True)
 
-def _load_error_input(results_or_bonds, id_cols=ID_COLS, error_cols=ERROR_COLS):
-    """Normalize supported inputs into a single prediction DataFrame.
+def fit_state(dates, in_hashes, oos_hashes):
+    """Per-date in-sample and out-of-sample input hashes kept by incremental runs."""
+    dates = list(dates)
+    return pd.DataFrame({
+        "date": pd.to_datetime(dates),
+        "in_sample_hash": [in_hashes.get(dt) for dt in dates],
+        "oos_hash": [oos_hashes.get(dt) for dt in dates],
+    })
+
+def stale_dates(state, in_hashes, oos_hashes):
+    """Dates that are new or whose in-sample/out-of-sample inputs changed since `state`,
+    and stored dates that no longer appear in the inputs."""
+    current = pd.DataFrame({"in_sample_hash": in_hashes, "oos_hash": oos_hashes})
+    stored = state.set_index("date")[["in_sample_hash", "oos_hash"]]
+    changed = (current.fillna("") != stored.reindex(current.index).fillna("")).any(axis=1)
+    removed = stored.index.difference(current.index)
+    return current.index[changed.to_numpy()], removed
+
+def write_atomic(df, path):
+    """Write `df` to a parquet or csv `path` via a temporary file and os.replace."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if path.suffix == ".parquet":
+        df.to_parquet(tmp_path, index=False)
+    elif path.suffix == ".csv":
+        df.to_csv(tmp_path, index=False)
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+    os.replace(tmp_path, path)
+
+def write_parquet_stream(results, to_frames, paths, batch_dates=12):
+    """Consume a stream of (date, result) pairs, writing the DataFrames returned by
+    `to_frames(date, result)` (one per entry of `paths`) to parquet one row group per
+    `batch_dates` dates, so only a batch of dates is held in memory at a time.
+
+    Files are written to `<path>.tmp` and moved into place once the stream is exhausted;
+    every batch is cast to the schema of the first one."""
+    paths = [Path(path) for path in paths]
+    tmp_paths = [path.with_name(path.name + ".tmp") for path in paths]
+    writers = [None] * len(paths)
+    pending = [[] for _ in paths]
+
+    def _flush():
+        for i, frames in enumerate(pending):
+            if not frames:
+                continue
+            df = pd.concat(frames, ignore_index=True)
+            if writers[i] is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                writers[i] = pq.ParquetWriter(tmp_paths[i], table.schema)
+            else:
+                table = pa.Table.from_pandas(df, schema=writers[i].schema, preserve_index=False)
+            writers[i].write_table(table)
+            frames.clear()
+
+    try:
+        for n, (date, out) in enumerate(results, start=1):
+            for frames, df in zip(pending, to_frames(date, out)):
+                frames.append(df)
+            if n % batch_dates == 0:
+                _flush()
+        _flush()
+    finally:
+        for writer in writers:
+            if writer is not None:
+                writer.close()
+
+    for path, tmp_path, writer in zip(paths, tmp_paths, writers):
+        if writer is None:
+            pd.DataFrame().to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+def date_frames(dt, out, t_col="t", quality_keys=()):
+    """One date's curve, nodes and bond-fit rows and its fit-quality record from a runner
+    results entry. The curve's T column is renamed to `t_col`; `quality_keys` are extra
+    scalar entries of `out` (e.g. "lambda") recorded ahead of wmae and hit_rate."""
+    date = pd.to_datetime(dt)
+    c = out["curve"].rename(columns={"T": t_col}).assign(date=date)
+    n = out["nodes"].assign(date=date)
+    b = out["bonds"].assign(date=date)
+
+    quality = {"date": date}
+    quality.update({key: float(out.get(key, np.nan)) for key in quality_keys})
+    quality["wmae"] = float(out["wmae"])
+    quality["hit_rate"] = float(out["hit_rate"])
+    return c, n, b, quality
+
+def collect_results(results, t_col="t", quality_keys=()):
+    """Curve, node, bond-fit and fit-quality tables of a runner results dict (see date_frames)."""
+    curves, nodes, bond_fits, fit_quality = [], [], [], []
+    for dt, out in results.items():
+        c, n, b, quality = date_frames(dt, out, t_col, quality_keys)
+        curves.append(c)
+        nodes.append(n)
+        bond_fits.append(b)
+        fit_quality.append(quality)
+
+    return (
+        pd.concat(curves, ignore_index=True) if curves else pd.DataFrame(),
+        pd.concat(nodes, ignore_index=True) if nodes else pd.DataFrame(),
+        pd.concat(bond_fits, ignore_index=True) if bond_fits else pd.DataFrame(),
+        pd.DataFrame(fit_quality).sort_values("date") if fit_quality else pd.DataFrame(),
+    )
+
+def stream_results(results, paths, keep, t_col="t", quality_keys=()):
+    """Write the tables named in `paths` ("curves" and/or "bonds") from a stream of per-date
+    runner results as they are produced (see write_parquet_stream).
+
+    Returns the fit-quality table, the bond columns needed for the error metrics and a
+    dict of date -> keep(result), e.g. the parameters for out-of-sample pricing; nothing
+    else is held for the whole history."""
+    fit_quality, error_rows, kept = [], [], {}
+
+    def _frames(dt, out):
+        c, _, b, quality = date_frames(dt, out, t_col, quality_keys)
+        fit_quality.append(quality)
+        error_rows.append(b[ID_COLS + ERROR_COLS])
+        kept[dt] = keep(out)
+        frames = {"curves": c, "bonds": b}
+        return [frames[name] for name in paths]
+
+    write_parquet_stream(results, _frames, paths.values())
+    fit_quality_df = pd.DataFrame(fit_quality).sort_values("date") if fit_quality else pd.DataFrame()
+    return fit_quality_df, pd.concat(error_rows, ignore_index=True), kept
+
+
+def _error_input_frame(results_or_bonds, id_cols=ID_COLS, error_cols=ERROR_COLS, extra_cols=()):
+    """Normalize supported inputs into a single prediction DataFrame with id_cols as columns.
 
     Supported inputs:
     - results dict from run_mcculloch/run_fisher/run_waggoner
     - DataFrame with required columns (date, cusip, bid, ask, duration, model_price, ttm)
     - Path/str to a parquet/csv file containing that DataFrame
+
+    `extra_cols` (e.g. grouping keys such as "method" or "sample") are kept as columns.
     """
-    cols = id_cols + error_cols
+    cols = id_cols + error_cols + [c for c in extra_cols if c not in id_cols + error_cols]
 
     if isinstance(results_or_bonds, dict):
-        return pd.concat(
-            [
-                results_or_bonds[r]["bonds"][cols].set_index(id_cols)
-                for r in results_or_bonds
-            ],
-            axis=0,
-        )
-
-    if isinstance(results_or_bonds, (str, Path)):
+        frames = [results_or_bonds[r]["bonds"] for r in results_or_bonds]
+        df = pd.concat([f[[c for c in cols if c in f.columns]] for f in frames], axis=0)
+    elif isinstance(results_or_bonds, (str, Path)):
         path = Path(results_or_bonds)
         if path.suffix == ".parquet":
             df = pd.read_parquet(path)
@@ -208,57 +598,69 @@ def _load_error_input(results_or_bonds, id_cols=ID_COLS, error_cols=ERROR_COLS):
     missing = set(cols) - set(df.columns)
     if missing:
         raise ValueError(f"Input is missing required columns: {sorted(missing)}")
-    return df[cols].set_index(id_cols)
-
+    return df[cols]
 
-def get_full_error_metrics(results_or_bonds, id_cols=ID_COLS, error_cols=ERROR_COLS):
-    """Compute WMAE and hit rate for each TTM bin and overall, given a results dict, DataFrame, or path to a csv/parquet file."""
-    ttm_bins = [(0, 1), (1, 3), (3, 5), (5, 10), (10, np.inf)]
-    wmae_list = []
-    hit_rate_list = []
 
-    preds = _load_error_input(results_or_bonds, id_cols=id_cols, error_cols=error_cols)
+TTM_BUCKET_EDGES = np.array([0.0, 1.0, 3.0, 5.0, 10.0])
+TTM_BUCKET_LABELS = ["0-1", "1-3", "3-5", "5-10", ">10", "All"]
 
-    for start, stop in ttm_bins:
-        preds_bin = preds.loc[(preds["ttm"] >= start) & (preds["ttm"] < stop)]
 
-        wmae = error_metrics.wmae(
-            preds_bin["model_price"],
-            preds_bin["bid"],
-            preds_bin["ask"],
-            preds_bin["duration"]
-            )
-        wmae_list.append(wmae)
+def get_full_error_metrics(results_or_bonds, id_cols=ID_COLS, error_cols=ERROR_COLS, by=None):
+    """Compute WMAE and hit rate for each TTM bin and overall, given a results dict, DataFrame, or path to a csv/parquet file.
 
-        hit_rate = error_metrics.hit_rate(
-            preds_bin["model_price"],
-            preds_bin["bid"],
-            preds_bin["ask"]
-            )
-        hit_rate_list.append(hit_rate)
-
-    wmae_list.append(
-        error_metrics.wmae(
-            preds["model_price"],
-            preds["bid"],
-            preds["ask"],
-            preds["duration"]
-        ))
-    
-    hit_rate_list.append(
-        error_metrics.hit_rate(
-            preds["model_price"],
-            preds["bid"],
-            preds["ask"]
-        ))
-
-    labels = [f"{start}-{stop}"
-              if stop < np.inf
-              else f">{start}"
-              for start, stop in ttm_bins
-              ] + ["All"]
+    Buckets are assigned with np.digitize and every (group, bucket) weighted error sum,
+    weight sum, hit count and bond count comes from one np.bincount each.
 
-    return pd.DataFrame({
-        "wmae": wmae_list,
-        "hit_rate": hit_rate_list},
-        index=labels)
+    With `by=None` the result is indexed by bucket label ("0-1", ..., ">10", "All").
+    With `by` a list of keys (any of id_cols, extra input columns such as "method" or
+    "sample", or "year", the calendar year of the date), the result is a long table
+    with columns by + ["bucket", "wmae", "hit_rate"]: one row per group and bucket,
+    groups sorted, empty buckets NaN.
+    """
+    keys = [] if by is None else list(by)
+    extra = [k for k in keys if k not in id_cols and k != "year"]
+    preds = _error_input_frame(results_or_bonds, id_cols=id_cols, error_cols=error_cols, extra_cols=extra)
+    if "year" in keys and "year" not in id_cols:
+        preds["year"] = pd.to_datetime(preds["date"]).dt.year
+
+    n_buckets = len(TTM_BUCKET_LABELS)
+    if keys:
+        codes, groups = pd.MultiIndex.from_frame(preds[keys]).factorize(sort=True)
+        in_group = codes >= 0      # rows with a missing key are left out, as in groupby
+        preds, codes = preds.loc[in_group], codes[in_group]
+    else:
+        codes, groups = np.zeros(len(preds), dtype=np.int64), None
+    n_groups = len(groups) if keys else 1
+
+    ttm = preds["ttm"].to_numpy(dtype=float)
+    bid = preds["bid"].to_numpy(dtype=float)
+    ask = preds["ask"].to_numpy(dtype=float)
+    model_price = preds["model_price"].to_numpy(dtype=float)
+    weights = 1.0 / preds["duration"].to_numpy(dtype=float)
+    abs_err = weights * np.abs(model_price - (bid + ask) * 0.5)
+    # NaN terms are skipped, as the pandas sums in error_metrics.wmae do
+    weights, abs_err = np.where(np.isnan(weights), 0.0, weights), np.where(np.isnan(abs_err), 0.0, abs_err)
+    hits = ((model_price >= bid) & (model_price <= ask)).astype(float)
+
+    # bucket b covers [edges[b], edges[b+1]); rows outside [0, inf) only count towards "All"
+    bucket = np.digitize(ttm, TTM_BUCKET_EDGES) - 1
+    in_bucket = (ttm >= 0) & (ttm < np.inf)
+    cells = np.concatenate([codes[in_bucket] * n_buckets + bucket[in_bucket], codes * n_buckets + n_buckets - 1])
+    rows = np.concatenate([np.flatnonzero(in_bucket), np.arange(len(ttm))])
+
+    size = n_groups * n_buckets
+    sums = [np.bincount(cells, values[rows], minlength=size) for values in (abs_err, weights, hits)]
+    counts = np.bincount(cells, minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wmae = sums[0] / sums[1]
+        hit_rate = sums[2] / counts
+
+    if not keys:
+        return pd.DataFrame({"wmae": wmae, "hit_rate": hit_rate}, index=TTM_BUCKET_LABELS)
+
+    out = groups.set_names(keys).to_frame(index=False).loc[np.repeat(np.arange(n_groups), n_buckets)]
+    out = out.reset_index(drop=True)
+    out["bucket"] = np.tile(TTM_BUCKET_LABELS, n_groups)
+    out["wmae"] = wmae
+    out["hit_rate"] = hit_rate
+    return out
@@ -0,0 +1,364 @@
+"""
+Stores fitted McCulloch, Fisher and Waggoner curves as their coefficients and
+evaluates them on demand
+
+Every fitted curve is fully determined by its coefficients: beta_hat and the
+McCulloch nodes d (discount D(T) = 1 + F(T; d) @ beta_hat), or beta_hat and the
+cubic B-spline knots (forward f(t) = sum_k beta_k B_k(t)). One row per date of
+(beta_hat, knots or d, native grid) replaces the 1000 (T, value) rows per date of the
+dense curve parquets, and evaluate_curves rebuilds those rows, or any other grid.
+CurveEvaluator answers discount, spot, forward and par-yield queries at arbitrary
+(date, maturity) pairs from the same table, without a grid.
+
+Outputs (written by every runner; the dense curve parquets only with curve_points=True):
+  - DATA_DIR/mcc_curve_params.parquet
+  - DATA_DIR/fisher_curve_params.parquet
+  - DATA_DIR/waggoner_curve_params.parquet
+
+Optional float32 dense-grid cache for plotting (python curve_store.py):
+  - DATA_DIR/<method>_curve_grid_f32.parquet   (one row per date: date, t_min, t_max and
+        a fixed-size list of float32 values on linspace(t_min, t_max, n_grid))
+"""
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scipy.interpolate import BSpline, PPoly
+
+import mcc1975_yield_curve as mcc
+from settings import config
+
+DATA_DIR = Path(config("DATA_DIR"))
+
+SPLINE_DEGREE = 3
+
+# method -> (basis column, value column, maturity column of the dense curve parquet)
+CURVE_METHODS = {
+    "mcc": ("d", "discount", "T"),
+    "fisher": ("knots", "forward", "t"),
+    "waggoner": ("knots", "forward", "t"),
+}
+
+PARAMS_FILES = {m: f"{m}_curve_params.parquet" for m in CURVE_METHODS}
+GRID_CACHE_FILES = {m: f"{m}_curve_grid_f32.parquet" for m in CURVE_METHODS}
+
+
+def _check_method(method):
+    """Lower-cased method name, or ValueError if it is not a coefficient-store method."""
+    method = method.lower()
+    if method not in CURVE_METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    return method
+
+
+def curve_params(out, method):
+    """One date's coefficients and native grid from a runner results entry."""
+    method = _check_method(method)
+    T = out["curve"]["T"].to_numpy(dtype=float)
+    if method == "mcc":
+        basis = out["nodes"]["T"].to_numpy(dtype=float)
+    else:
+        basis = np.asarray(out["knots"], dtype=float)
+    row = {
+        "beta_hat": np.asarray(out["beta_hat"], dtype=float),
+        CURVE_METHODS[method][0]: basis,
+        "t_min": float(T[0]),
+        "t_max": float(T[-1]),
+        "n_grid": len(T),
+    }
+    if "lambda" in out:
+        row["lambda"] = float(out["lambda"])
+    return row
+
+
+def params_frame(rows):
+    """Parameter table from a dict of date -> curve_params row, sorted by date."""
+    if not rows:
+        return pd.DataFrame()
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    table.insert(0, "date", pd.to_datetime(table.index))
+    return table.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def curve_params_table(results, method):
+    """Parameter table (date, beta_hat, knots or d, t_min, t_max, n_grid[, lambda]) of a
+    runner results dict."""
+    return params_frame({dt: curve_params(out, method) for dt, out in results.items()})
+
+
+def load_curve_params(method, data_dir=DATA_DIR, output_prefix=""):
+    """Read a method's parameter table written by its runner."""
+    method = _check_method(method)
+    path = Path(data_dir) / f"{output_prefix}{PARAMS_FILES[method]}"
+    if not path.exists():
+        raise FileNotFoundError(f"Missing curve parameters for '{method}': {path}")
+    table = pd.read_parquet(path)
+    table["date"] = pd.to_datetime(table["date"])
+    return table
+
+
+def evaluate_curve(method, beta_hat, basis, t):
+    """Discount (McCulloch) or forward (Fisher/Waggoner) values of one fitted curve at `t`.
+
+    Forwards outside the spline domain [knots[3], knots[-4]] are NaN, as in
+    fisher_curve_points_to_dfs.
+    """
+    beta_hat = np.asarray(beta_hat, dtype=float)
+    t = np.asarray(t, dtype=float)
+    if _check_method(method) == "mcc":
+        return 1.0 + mcc.build_basis_matrix(t, np.asarray(basis, dtype=float), beta_hat.size) @ beta_hat
+    return BSpline(np.asarray(basis, dtype=float), beta_hat, SPLINE_DEGREE, extrapolate=False)(t)
+
+
+def native_grid(row):
+    """The grid a runner evaluated a date's curve on: linspace(t_min, t_max, n_grid)."""
+    return np.linspace(row["t_min"], row["t_max"], int(row["n_grid"]))
+
+
+def evaluate_curves(params, method, t_grid=None):
+    """Long curve frame in the layout of the method's dense curve parquet.
+
+    With `t_grid=None` each date is evaluated on its native grid, which reproduces the
+    runner's curve rows; otherwise every date is evaluated on `t_grid`.
+    """
+    method = _check_method(method)
+    basis_col, value_col, t_col = CURVE_METHODS[method]
+    ts, values = [], []
+    for row in params.to_dict("records"):
+        t = native_grid(row) if t_grid is None else np.asarray(t_grid, dtype=float)
+        ts.append(t)
+        values.append(evaluate_curve(method, row["beta_hat"], row[basis_col], t))
+
+    lengths = [len(t) for t in ts]
+    return pd.DataFrame({
+        t_col: np.concatenate(ts) if ts else np.empty(0),
+        value_col: np.concatenate(values) if values else np.empty(0),
+        "date": np.repeat(pd.to_datetime(params["date"]).to_numpy(), lengths),
+    })
+
+
+def load_method_curves(method, data_dir=DATA_DIR, output_prefix="", t_grid=None):
+    """A method's curves rebuilt from its parameter table (see evaluate_curves)."""
+    return evaluate_curves(load_curve_params(method, data_dir, output_prefix), method, t_grid)
+
+
+# Curve objects
+# -------------
+
+def _mcc_discount_ppoly(beta_hat, d):
+    """McCulloch D(T) = 1 + F(T; d) @ beta_hat as an exact piecewise cubic.
+
+    Every basis column is cubic between consecutive nodes and linear past the last one,
+    so each piece is recovered from four evaluations of build_basis_matrix.
+    """
+    nodes = np.unique(np.r_[0.0, d])
+    breaks = np.r_[nodes, nodes[-1] + 1.0]           # the last piece is linear and extrapolated
+    h = np.diff(breaks)
+    u = np.array([0.0, 1.0 / 3.0, 2.0 / 3.0, 1.0])
+    t = breaks[:-1, None] + h[:, None] * u
+    D = 1.0 + mcc.build_basis_matrix(t.ravel(), d, beta_hat.size) @ beta_hat
+    coef = np.linalg.solve(np.vander(u, 4), D.reshape(t.shape).T)   # powers of u, highest first
+    return PPoly(coef / h ** np.arange(3, -1, -1)[:, None], breaks)
+
+
+class FittedCurve:
+    """One date's fitted curve, converted once to piecewise polynomials so that discount
+    factors, spot rates, forwards and par yields at any maturities are exact polynomial
+    evaluations (no grid, no interpolation).
+
+    McCulloch curves are defined for T >= 0 (linear in T past the last node);
+    Fisher/Waggoner curves on the spline domain [knots[3], knots[-4]], NaN outside.
+    Rates are continuously compounded, in decimals.
+    """
+
+    def __init__(self, method, beta_hat, basis):
+        self.method = _check_method(method)
+        beta_hat = np.asarray(beta_hat, dtype=float)
+        basis = np.asarray(basis, dtype=float)
+        if self.method == "mcc":
+            self._discount = _mcc_discount_ppoly(beta_hat, basis)
+            self._slope = self._discount.derivative()
+            self.t_min, self.t_max = 0.0, np.inf
+        else:
+            self._forward = PPoly.from_spline((basis, beta_hat, SPLINE_DEGREE), extrapolate=False)
+            self._integral = self._forward.antiderivative()
+            self.t_min, self.t_max = float(basis[SPLINE_DEGREE]), float(basis[-SPLINE_DEGREE - 1])
+
+    def _in_domain(self, t):
+        """Maturities as a float array with NaN outside the curve's domain."""
+        t = np.asarray(t, dtype=float)
+        return np.where((t >= self.t_min) & (t <= self.t_max), t, np.nan)
+
+    def log_discount(self, t):
+        """log D(t)."""
+        t = self._in_domain(t)
+        if self.method == "mcc":
+            with np.errstate(invalid="ignore"):
+                return np.log(self._discount(t))
+        return -(self._integral(t) - self._integral(self.t_min))
+
+    def discount(self, t):
+        """Discount factors D(t)."""
+        if self.method == "mcc":
+            return self._discount(self._in_domain(t))
+        return np.exp(self.log_discount(t))
+
+    def forward(self, t):
+        """Instantaneous forward rates f(t) = -d log D(t) / dt."""
+        t = self._in_domain(t)
+        if self.method == "mcc":
+            return -self._slope(t) / self._discount(t)
+        return self._forward(t)
+
+    def spot(self, t):
+        """Zero rates -log D(t) / t, with the instantaneous forward at t = 0."""
+        t = self._in_domain(t)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(t > 0, -self.log_discount(t) / t, self.forward(t))
+
+    def par_yield(self, t, freq=2):
+        """Coupon rates (annual, paid `freq` times a year) that price a bond maturing at t
+        at par, with coupons at t, t - 1/freq, ... down to the first one after 0."""
+        t = np.atleast_1d(self._in_domain(t))
+        n_cpn = np.ceil(np.nan_to_num(t) * freq - 1e-9).clip(1).astype(int)
+        rows = np.repeat(np.arange(t.size), n_cpn)
+        k = np.arange(n_cpn.sum()) - np.repeat(np.cumsum(n_cpn) - n_cpn, n_cpn)
+        annuity = np.bincount(rows, self.discount(t[rows] - k / freq), minlength=t.size) / freq
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(t > 0, (1.0 - self.discount(t)) / annuity, np.nan)
+
+
+CURVE_QUANTITIES = ("discount", "spot", "forward", "par_yield")
+
+
+class CurveEvaluator:
+    """Fitted curves of one method from its parameter table, answering vectorized
+    queries at (date, maturity) pairs.
+
+    The FittedCurve of a date is built on first use and kept in an LRU cache of
+    `maxsize` curves (`evaluator.curve.cache_info()` reports hits and misses).
+    """
+
+    def __init__(self, params, method, maxsize=256):
+        self.method = _check_method(method)
+        self._basis_col = CURVE_METHODS[self.method][0]
+        dates = pd.DatetimeIndex(pd.to_datetime(params["date"])).normalize()
+        self._rows = dict(zip(dates.asi8, params[["beta_hat", self._basis_col]].itertuples(index=False)))
+        self.dates = dates.sort_values()
+        self.curve = lru_cache(maxsize=maxsize)(self._build_curve)
+
+    @classmethod
+    def from_store(cls, method, data_dir=DATA_DIR, output_prefix="", maxsize=256):
+        """Evaluator over the parameter table a runner wrote to `data_dir`."""
+        return cls(load_curve_params(method, data_dir, output_prefix), method, maxsize=maxsize)
+
+    def _build_curve(self, key):
+        """FittedCurve of the date with int64 key `key`."""
+        try:
+            beta_hat, basis = self._rows[key]
+        except KeyError:
+            raise KeyError(f"No fitted {self.method} curve on {pd.Timestamp(key).date()}") from None
+        return FittedCurve(self.method, beta_hat, basis)
+
+    def evaluate(self, dates, maturities, quantity="spot", **kwargs):
+        """`quantity` ("discount", "spot", "forward" or "par_yield") at each (date,
+        maturity) pair, with `dates` and `maturities` broadcast against each other."""
+        if quantity not in CURVE_QUANTITIES:
+            raise ValueError(f"Unknown quantity: {quantity}")
+        keys = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates))).normalize().asi8
+        keys, t = np.broadcast_arrays(keys, np.asarray(maturities, dtype=float))
+        shape = t.shape
+        keys, t = keys.ravel(), t.ravel()
+
+        out = np.empty(t.size)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(inverse, minlength=unique_keys.size))]
+        for i, key in enumerate(unique_keys):
+            idx = order[bounds[i]:bounds[i + 1]]
+            out[idx] = getattr(self.curve(int(key)), quantity)(t[idx], **kwargs)
+        return out.reshape(shape)
+
+    def discount(self, dates, maturities):
+        """Discount factors at (date, maturity) pairs."""
+        return self.evaluate(dates, maturities, "discount")
+
+    def spot(self, dates, maturities):
+        """Continuously compounded zero rates at (date, maturity) pairs."""
+        return self.evaluate(dates, maturities, "spot")
+
+    def forward(self, dates, maturities):
+        """Instantaneous forward rates at (date, maturity) pairs."""
+        return self.evaluate(dates, maturities, "forward")
+
+    def par_yield(self, dates, maturities, freq=2):
+        """Par coupon rates at (date, maturity) pairs."""
+        return self.evaluate(dates, maturities, "par_yield", freq=freq)
+
+
+# Float32 dense-grid cache
+# -----------------------
+
+def write_grid_cache(params, method, path):
+    """Write each date's curve on its native grid as one fixed-size list of float32 values.
+
+    All dates must share the same n_grid; the grid itself is kept as (t_min, t_max).
+    """
+    method = _check_method(method)
+    n_grid = params["n_grid"].unique()
+    if len(n_grid) != 1:
+        raise ValueError("All dates must share the same n_grid to be cached on a dense grid.")
+    n_grid = int(n_grid[0])
+
+    basis_col = CURVE_METHODS[method][0]
+    values = np.stack([
+        evaluate_curve(method, row["beta_hat"], row[basis_col], native_grid(row))
+        for row in params.to_dict("records")
+    ]).astype(np.float32)
+
+    table = pa.table({
+        "date": pa.array(pd.to_datetime(params["date"]).to_numpy(), pa.timestamp("ns")),
+        "t_min": pa.array(params["t_min"].to_numpy(dtype=float)),
+        "t_max": pa.array(params["t_max"].to_numpy(dtype=float)),
+        "values": pa.FixedSizeListArray.from_arrays(pa.array(values.ravel()), n_grid),
+    })
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    pq.write_table(table, tmp_path)
+    tmp_path.replace(path)
+
+
+def load_grid_cache(method, path):
+    """Long curve frame, in the layout of the dense curve parquet, from a float32 grid cache."""
+    method = _check_method(method)
+    _, value_col, t_col = CURVE_METHODS[method]
+    table = pq.read_table(path)
+    n_grid = table.schema.field("values").type.list_size
+    t_min = table.column("t_min").to_numpy()
+    t_max = table.column("t_max").to_numpy()
+    values = table.column("values").combine_chunks().flatten().to_numpy()
+    t = np.linspace(t_min, t_max, n_grid, axis=1)
+    return pd.DataFrame({
+        t_col: t.ravel(),
+        value_col: values.astype(float),
+        "date": np.repeat(table.column("date").to_numpy(), n_grid),
+    })
+
+
+def main():
+    """Write the float32 grid cache of every method whose parameter table exists."""
+    for method in CURVE_METHODS:
+        try:
+            params = load_curve_params(method, DATA_DIR)
+        except FileNotFoundError:
+            continue
+        path = DATA_DIR / GRID_CACHE_FILES[method]
+        write_grid_cache(params, method, path)
+        print(f"Wrote {method} float32 grid cache ({len(params)} dates) to:", path.resolve())
+
+
+if __name__ == "__main__":
+    main()
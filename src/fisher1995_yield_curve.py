@@ -1,10 +1,16 @@
 """Utilities for fisher1995 yield curve in this project."""
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+
 import numpy as np
 import pandas as pd
 from scipy.interpolate import BSpline
 from scipy.optimize import least_squares, minimize_scalar
 import curve_fitting_utils
+from curve_fitting_utils import bond_cashflow_matrix, cashflow_offsets
 import error_metrics
 
 # -----------------------------
@@ -84,10 +90,100 @@ def integrated_basis_matrix(times: np.ndarray, basis: list[BSpline], t0: float =
         raise ValueError("Some times fall outside spline domain. Check knots / clamping.")
     return A
 
+def integrated_basis_banded(times: np.ndarray, knots: np.ndarray, degree: int = 3) -> dict:
+    """
+    Banded form of A[m,k] = ∫_{knots[0]}^{times[m]} N_k(s) ds.
+
+    ∫N_k is zero before the support of N_k and the constant (t_{k+d+1} - t_k)/(d+1)
+    after it, so each row only has degree+1 partially integrated columns:
+
+        A[m, k] = full[k]                    for k <  first[m]
+                = band[m, k - first[m]]      for first[m] <= k <= first[m] + degree
+                = 0                          for k >  first[m] + degree
+
+    The band comes from ∫_0^x N_{k,d} = full[k] Σ_{j>=k} N_{j,d+1}(x) on the knot
+    vector padded with one extra knot at each end (d+2 nonzeros per row).
+    """
+    times = np.asarray(times, float)
+    knots = np.asarray(knots, float)
+    d = int(degree)
+    p = len(knots) - d - 1
+    if np.any((times < knots[0]) | (times > knots[-1])) or np.isnan(times).any():
+        raise ValueError("Some times fall outside spline domain. Check knots / clamping.")
+
+    full = (knots[d + 1:] - knots[:p]) / (d + 1)
+    knots_ext = np.concatenate([[knots[0]], knots, [knots[-1]]])
+    M = BSpline.design_matrix(times, knots_ext, d + 1)     # CSR, d+2 entries per row
+    vals = M.data.reshape(len(times), d + 2)
+    last = M.indices.reshape(len(times), d + 2)[:, -1]    # span in knots_ext
+    first = last - 1 - d                                   # first partial column in A
+
+    # suffix sums Σ_{j>=k} N_{j,d+1} for the degree+1 partial columns
+    tail = np.cumsum(vals[:, :0:-1], axis=1)[:, ::-1]
+    band = tail * full[first[:, None] + np.arange(d + 1)]
+    return {"first": first, "band": band, "full": full, "shape": (len(times), p)}
+
+def banded_to_dense(A: dict) -> np.ndarray:
+    """Expand an integrated_basis_banded representation into the dense (total_cf, p) matrix."""
+    n, p = A["shape"]
+    cols = np.arange(p)
+    dense = np.where(cols[None, :] < A["first"][:, None], A["full"][None, :], 0.0)
+    width = A["band"].shape[1]
+    dense[np.arange(n)[:, None], A["first"][:, None] + np.arange(width)] = A["band"]
+    return dense
+
+def _banded_matvec(A: dict, beta: np.ndarray) -> np.ndarray:
+    """A @ beta for the banded representation, without forming the dense matrix."""
+    width = A["band"].shape[1]
+    prefix = np.concatenate([[0.0], np.cumsum(A["full"] * beta)])
+    return prefix[A["first"]] + np.sum(A["band"] * beta[A["first"][:, None] + np.arange(width)], axis=1)
+
 # -----------------------------
 # Roughness penalty matrix K = ∫ N''_k N''_l
 # -----------------------------
-def roughness_matrix(knots: np.ndarray, degree: int = 3, grid_size: int = 1000):
+@lru_cache(maxsize=512)
+def _exact_roughness_matrix(knots: tuple, degree: int, breaks: tuple = (), levels: tuple = (1.0,)):
+    """
+    K_{kl} = ∫ w(t) N''_k(t) N''_l(t) dt computed exactly, cached per knot vector.
+
+    w(t) is piecewise constant: levels[i] on (breaks[i-1], breaks[i]]. On each knot
+    interval (split at the breaks) N''_k N''_l is a polynomial of degree 2(degree-2),
+    so Gauss-Legendre with degree-1 nodes integrates it exactly. K is banded:
+    K_{kl} = 0 for |k - l| > degree.
+    """
+    knots = np.asarray(knots, float)
+    p = len(knots) - degree - 1
+    t_min = knots[degree]
+    t_max = knots[-degree - 1]
+
+    inner_breaks = [b for b in breaks if t_min < b < t_max]
+    edges = np.unique(np.concatenate([knots[degree:-degree], inner_breaks]))
+    a, b = edges[:-1], edges[1:]
+    mid, half = 0.5 * (a + b), 0.5 * (b - a)
+
+    x_ref, w_ref = np.polynomial.legendre.leggauss(max(1, degree - 1))
+    x = (mid[:, None] + half[:, None] * x_ref).ravel()
+    level = np.asarray(levels, float)[np.searchsorted(breaks, mid, side="left")]
+    w = ((half * level)[:, None] * w_ref).ravel()
+
+    # One vector-valued spline gives every N''_k at once
+    B2 = BSpline(knots, np.eye(p), degree).derivative(2)(x)   # (n_points, p)
+    K = (B2.T * w) @ B2
+    K.setflags(write=False)
+    return K
+
+def roughness_matrix(knots: np.ndarray, degree: int = 3, grid_size: int | None = None):
+    """
+    K_{kl} = ∫ N''_k(t) N''_l(t) dt, exact (see _exact_roughness_matrix).
+
+    Passing grid_size instead uses the trapezoid approximation on a dense grid.
+    """
+    if grid_size is not None:
+        return roughness_matrix_quadrature(knots, degree=degree, grid_size=grid_size)
+    knots = tuple(np.asarray(knots, float))
+    return _exact_roughness_matrix(knots, int(degree)).copy()
+
+def roughness_matrix_quadrature(knots: np.ndarray, degree: int = 3, grid_size: int = 1000):
     """
     K_{kl} = ∫ N''_k(t) N''_l(t) dt approximated with trapezoid on a dense grid.
     """
@@ -115,7 +211,7 @@ def roughness_matrix(knots: np.ndarray, degree: int = 3, grid_size: int = 1000):
 # -----------------------------
 # Price + Jacobian (w.r.t beta)
 # -----------------------------
-def price_and_jac(beta, c_all, bond_idx, A_all, N):
+def price_and_jac(beta, c_all, bond_idx, A_all, N, offsets=None):
     """
     Returns:
       P_hat: (N,)
@@ -124,25 +220,50 @@ def price_and_jac(beta, c_all, bond_idx, A_all, N):
     Parameters
     ----------
     c_all    : (total_cf,) concatenated cashflows across all bonds
-    bond_idx : (total_cf,) integer bond index for each cashflow
-    A_all    : (total_cf, p) integrated basis matrix
+    bond_idx : (total_cf,) integer bond index for each cashflow (non-decreasing)
+    A_all    : (total_cf, p) integrated basis matrix, dense or from integrated_basis_banded
     N        : number of bonds
+    offsets  : optional (N + 1,) cashflow_offsets(bond_idx, N), precomputed by callers
+               that price the same bonds many times
     """
-    p = len(beta)
+    if offsets is None:
+        offsets = cashflow_offsets(bond_idx, N)
+
+    if isinstance(A_all, dict):
+        return _price_and_jac_banded(beta, c_all, bond_idx, A_all, N, offsets)
+
     z = A_all @ beta                   # (total_cf,) — one BLAS call
     d = np.exp(-z)
     wd = c_all * d                     # (total_cf,)
 
-    P_hat = np.bincount(bond_idx, weights=wd, minlength=N).astype(float)
-
-    wd_A = wd[:, np.newaxis] * A_all   # (total_cf, p)
-    J = np.empty((N, p))
-    for k in range(p):
-        J[:, k] = np.bincount(bond_idx, weights=wd_A[:, k], minlength=N)
-    J = -J
+    # Segment sums over each bond's contiguous cashflows: P_hat = S 1, J = -S A
+    S = bond_cashflow_matrix(wd, offsets)
+    P_hat = S.sum(axis=1)
+    J = -(S @ A_all)
 
     return P_hat, J
 
+def _price_and_jac_banded(beta, c_all, bond_idx, A, N, offsets):
+    """price_and_jac on the banded integrated basis, with no (total_cf x p) temporary."""
+    p = len(beta)
+    first, band, full = A["first"], A["band"], A["full"]
+    width = band.shape[1]
+
+    d = np.exp(-_banded_matvec(A, beta))
+    wd = c_all * d
+
+    P_hat = bond_cashflow_matrix(wd, offsets).sum(axis=1)
+
+    # fully integrated columns: J[i,k] gets full[k] * Σ wd over cashflows of i with first > k
+    W = np.bincount(bond_idx * (p + 1) + first, weights=wd, minlength=N * (p + 1)).reshape(N, p + 1)
+    J = np.cumsum(W[:, :0:-1], axis=1)[:, ::-1] * full
+
+    # partially integrated band
+    cols = bond_idx[:, None] * p + first[:, None] + np.arange(width)
+    J += np.bincount(cols.ravel(), weights=(wd[:, None] * band).ravel(), minlength=N * p).reshape(N, p)
+
+    return P_hat, -J
+
 # -----------------------------
 # Fit for a fixed lambda (Fisher objective via LS on augmented residuals)
 # -----------------------------
@@ -173,13 +294,16 @@ def fit_fisher_forward_fixed_lambda(
     beta0=None,
     c_all=None,
     bond_idx=None,
+    L=None,
 ):
     """
     Fits beta for fixed lam and returns fit dict incl. RSS, pricing Jacobian, etc.
+
+    L (the square root of K from sqrt_penalty_from_K) can be passed in so callers
+    fitting many lambdas on the same knots only eigendecompose K once.
     """
     knots = np.asarray(knots, float)
-    basis = bspline_basis_list(knots, degree)
-    p = len(basis)
+    p = n_basis_from_knots(knots, degree)
 
     # Build shared structures if not passed
     if A_all is None or idx_slices is None:
@@ -190,7 +314,7 @@ def fit_fisher_forward_fixed_lambda(
             n = len(b["times"])
             idx_slices.append(slice(start, start + n))
             start += n
-        A_all = integrated_basis_matrix(times_all, basis, t0=0.0)
+        A_all = integrated_basis_banded(times_all, knots, degree)
 
     if K is None:
         K = roughness_matrix(knots, degree=degree)
@@ -199,7 +323,8 @@ def fit_fisher_forward_fixed_lambda(
         c_all = np.concatenate([b["c"] for b in bonds])
         bond_idx = np.repeat(np.arange(len(bonds)), [len(b["c"]) for b in bonds])
 
-    L = sqrt_penalty_from_K(K, eps=1e-12)
+    if L is None:
+        L = sqrt_penalty_from_K(K, eps=1e-12)
 
     P_obs = np.array([b["P"] for b in bonds], float)
     N = len(P_obs)
@@ -210,10 +335,11 @@ def fit_fisher_forward_fixed_lambda(
     # Cache price_and_jac between fun() and jac() — scipy calls both with the
     # same beta on each iteration, so we avoid computing it twice.
     _cache = {"beta": None, "P_hat": None, "Jp": None}
+    offsets = cashflow_offsets(bond_idx, N)
 
     def _eval(beta):
         if _cache["beta"] is None or not np.array_equal(beta, _cache["beta"]):
-            _cache["P_hat"], _cache["Jp"] = price_and_jac(beta, c_all, bond_idx, A_all, N)
+            _cache["P_hat"], _cache["Jp"] = price_and_jac(beta, c_all, bond_idx, A_all, N, offsets)
             _cache["beta"] = beta.copy()
 
     def fun(beta):
@@ -231,7 +357,8 @@ def fit_fisher_forward_fixed_lambda(
     res = least_squares(fun, beta0, jac=jac, method="trf")
 
     beta_hat = res.x
-    P_hat, J_price = price_and_jac(beta_hat, c_all, bond_idx, A_all, N)
+    _eval(beta_hat)   # usually a cache hit: the solver's last evaluation is at res.x
+    P_hat, J_price = _cache["P_hat"], _cache["Jp"]
     r_price = P_obs - P_hat
     RSS = float(r_price @ r_price)
 
@@ -315,8 +442,7 @@ def select_lambda_gcv(
     lambda_grid = np.asarray(lambda_grid, float)
 
     # Precompute structures shared across all λ evaluations
-    basis = bspline_basis_list(knots, degree)
-    p = len(basis)
+    p = n_basis_from_knots(knots, degree)
 
     times_all = np.concatenate([b["times"] for b in bonds])
     idx_slices, start = [], 0
@@ -324,26 +450,34 @@ def select_lambda_gcv(
         n = len(b["times"])
         idx_slices.append(slice(start, start + n))
         start += n
-    A_all = integrated_basis_matrix(times_all, basis, t0=0.0)
+    A_all = integrated_basis_banded(times_all, knots, degree)
     K = roughness_matrix(knots, degree=degree)
+    L = sqrt_penalty_from_K(K, eps=1e-12)   # eigendecompose K once, reused for every λ
     N = len(bonds)
     c_all = np.concatenate([b["c"] for b in bonds])
     bond_idx = np.repeat(np.arange(N), [len(b["c"]) for b in bonds])
 
+    # Fits by λ: the Brent stage never refits a λ it (or the grid) has already seen
+    fits_by_lambda = {}
+
     def eval_gcv(lam: float, beta_init=None):
         """Compute eval gcv."""
+        if lam in fits_by_lambda:
+            return fits_by_lambda[lam]
         fit = fit_fisher_forward_fixed_lambda(
             bonds=bonds, knots=knots, lam=lam, degree=degree,
             A_all=A_all, idx_slices=idx_slices, K=K,
             beta0=(beta_init if beta_init is not None else np.zeros(p)),
-            c_all=c_all, bond_idx=bond_idx,
+            c_all=c_all, bond_idx=bond_idx, L=L,
         )
         ep = effective_params(fit["J_price"], K, lam)
+        fit["ep"] = ep
         gcv = gcv_score(fit["RSS"], N=N, ep=ep, theta=theta)
+        fits_by_lambda[lam] = (float(gcv), fit)
         return float(gcv), fit
 
     # ----------------------------------
-    # Stage 1: Grid search
+    # Stage 1: Grid search (warm-started sweep)
     # ----------------------------------
     grid_gcvs = np.full(len(lambda_grid), np.inf)
     grid_fits = {}
@@ -352,7 +486,7 @@ def select_lambda_gcv(
 
     for i, lam in enumerate(lambda_grid):
         gcv, fit = eval_gcv(float(lam), beta_init=beta0)
-        ep = effective_params(fit["J_price"], K, float(lam))
+        ep = fit["ep"]
         grid_gcvs[i] = gcv
         grid_fits[float(lam)] = fit
         grid_rows.append((float(lam), float(fit["RSS"]), float(ep), float(gcv), bool(fit["success"])))
@@ -518,10 +652,9 @@ def fisher_predict_prices(beta, knots, bonds_dict, degree=3):
     """
     beta = np.asarray(beta, float)
     knots = np.asarray(knots, float)
-    basis = bspline_basis_list(knots, degree)
 
     times_all = np.concatenate([b["times"] for b in bonds_dict])
-    A_all = integrated_basis_matrix(times_all, basis, t0=0.0)
+    A_all = integrated_basis_banded(times_all, knots, degree)
     c_all = np.concatenate([b["c"] for b in bonds_dict])
     N = len(bonds_dict)
     bond_idx = np.repeat(np.arange(N), [len(b["c"]) for b in bonds_dict])
@@ -538,25 +671,24 @@ def fisher_predict_prices(beta, knots, bonds_dict, degree=3):
 # ----------------
 
 
-def run_fisher(sample, pre_trained_results=None, node_ratio: int = 3):
-    """DOCSTRING"""
-    results = {}
-
-    dates = sample["date"].unique()
-
-    prev_beta = None   # warm-start: reuse previous date's solution as beta0
+def iter_fisher(panels, pre_trained_results=None, node_ratio: int = 3, cashflow_cache=None,
+                start_idx: int = 0, n_total: int | None = None, beta_warmstart=None):
+    """Streaming variant of the Fisher fit: consumes (date, bonds) panels in date order, e.g. from
+    curve_fitting_utils.iter_date_slices, and yields (date, result) one date at a time, warm-starting
+    each date from the previous one (and the first from `beta_warmstart`, if given)."""
+    prev_beta = beta_warmstart   # warm-start: reuse previous date's solution as beta0
 
-    for idx, DATE in enumerate(dates):
+    for idx, (DATE, bonds) in enumerate(panels, start=start_idx):
         if idx % 50 == 0:
-            print(f"{DATE.to_period('M')}: {idx} / {len(dates)} ({int(idx/len(dates)*100)}%)")
+            curve_fitting_utils.print_progress(DATE, idx, n_total)
 
-        bonds = sample.loc[sample["date"] == DATE].reset_index(drop=True)
+        bonds = bonds.reset_index(drop=True)
 
         bonds["ttm"] = bonds["ttm_days"] / 365
         bonds.sort_values(by="ttm", inplace=True)
         n_bonds = bonds.shape[0]
 
-        cashflows, times = curve_fitting_utils.get_cashflows_from_bonds(bonds)
+        cashflows, times = curve_fitting_utils.get_cashflows_from_bonds(bonds, cache=cashflow_cache)
 
         maturities = bonds["ttm"].to_numpy()
         prices = bonds["mid_price"].to_numpy()
@@ -596,14 +728,73 @@ def run_fisher(sample, pre_trained_results=None, node_ratio: int = 3):
         wmae = error_metrics.wmae(bonds["model_price"], bonds["bid"], bonds["ask"], bonds["duration"])
         hit_rate = error_metrics.hit_rate(bonds["model_price"], bonds["bid"], bonds["ask"])
 
-        results[DATE] = {"beta_hat": beta_hat,
-                        "knots": knots,
-                        "lambda": best_lam,
-                        "bonds": bonds,
-                        "curve": curve_df,
-                        "nodes": nodes_df,
-                        "wmae": wmae,
-                        "hit_rate": hit_rate,
-                        }
-        
-    return results
\ No newline at end of file
+        yield DATE, {"beta_hat": beta_hat,
+                     "knots": knots,
+                     "lambda": best_lam,
+                     "bonds": bonds,
+                     "curve": curve_df,
+                     "nodes": nodes_df,
+                     "wmae": wmae,
+                     "hit_rate": hit_rate,
+                     }
+
+
+def _fit_fisher_dates(sample, dates, pre_trained_results=None, node_ratio: int = 3,
+                     cashflow_cache=None, start_idx: int = 0, n_total: int | None = None,
+                     beta_warmstart=None):
+    """Fit a contiguous run of dates sequentially (see iter_fisher) and collect the results."""
+    n_total = len(dates) if n_total is None else n_total
+    date_slices = curve_fitting_utils.iter_date_slices(sample, dates)
+    return dict(iter_fisher(date_slices, pre_trained_results, node_ratio, cashflow_cache,
+                            start_idx, n_total, beta_warmstart))
+
+
+def run_fisher(sample, pre_trained_results=None, node_ratio: int = 3, cashflow_cache=None,
+               n_jobs: int = 1, chunk_size: int | None = curve_fitting_utils.DATE_CHUNK_SIZE, executor=None,
+               beta_warmstart=None):
+    """Runs the Fisher (1995) smoothing-spline forward curve fit on each date of the sample,
+    with optional pre-trained results and a shared cashflow cache (see
+    curve_fitting_utils.load_cashflow_cache).
+
+    Dates are split into contiguous chunks of `chunk_size` dates; within a chunk each
+    fit is warm-started from the previous date's beta, and each chunk starts cold.
+    Chunks are fitted across `n_jobs` worker processes (-1 for all cores), or on a
+    caller-supplied `executor`. Results are merged in date order and depend only on
+    `chunk_size`, never on the number of workers. chunk_size=None keeps a single
+    chunk, i.e. the fully sequential warm-started run. `beta_warmstart` (e.g. the last
+    stored beta of an incremental run) warm-starts the first date of the first chunk.
+    """
+    dates = sample["date"].unique()
+    chunks = curve_fitting_utils.date_chunks(dates, chunk_size)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    starts = np.cumsum([0] + [len(c) for c in chunks[:-1]])
+
+    warmstarts = [beta_warmstart] + [None] * (len(chunks) - 1)
+
+    if executor is None and (n_jobs == 1 or len(chunks) == 1):
+        parts = [
+            _fit_fisher_dates(sample, c, pre_trained_results, node_ratio, cashflow_cache, start, len(dates), beta0)
+            for c, start, beta0 in zip(chunks, starts, warmstarts)
+        ]
+    else:
+        chunk_samples = [sample.loc[sample["date"].isin(c)] for c in chunks]
+        chunk_pre = [
+            None if pre_trained_results is None else {d: pre_trained_results[d] for d in c}
+            for c in chunks
+        ]
+        args = (
+            chunk_samples, chunks, chunk_pre,
+            repeat(node_ratio), repeat(cashflow_cache), starts, repeat(len(dates)), warmstarts,
+        )
+        if executor is not None:
+            parts = list(executor.map(_fit_fisher_dates, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                parts = list(pool.map(_fit_fisher_dates, *args))
+
+    results = {}
+    for part in parts:
+        results.update(part)
+    return results
@@ -20,6 +20,8 @@ import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+import curve_store
+
 
 # ---------------------------------------------------------------------------
 # Data loading
@@ -36,11 +38,11 @@ def load_lambda_data(data_dir: Path, sample: str = "original") -> pd.DataFrame:
 
 
 def load_curve_data(data_dir: Path, sample: str = "original") -> pd.DataFrame:
-    """Load the Fisher forward-curve points for the requested sample.
+    """Load the Fisher forward-curve points for the requested sample, rebuilt from
+    its curve parameter table.
     """
     prefix = "modern_" if sample == "modern" else ""
-    path = Path(data_dir) / f"{prefix}fisher_forward_curve.parquet"
-    df = pd.read_parquet(path)
+    df = curve_store.load_method_curves("fisher", data_dir=data_dir, output_prefix=prefix)
     df["date"] = pd.to_datetime(df["date"])
     df = df.sort_values(["date", "t"]).reset_index(drop=True)
     return df
@@ -20,13 +20,17 @@ Acknowledgements:
 
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from scipy.optimize import minimize
+from scipy import sparse
+from scipy.optimize import least_squares, minimize
 
-import pull_CRSP_treasury
-import pull_yield_curve_data
+import curve_fitting_utils
 from settings import config
 
 # --------------------------
@@ -37,6 +41,15 @@ DATA_DIR = config("DATA_DIR")
 # "tau1", "tau2", "beta1", "beta2", "beta3", "beta4"
 PARAM_NAMES = ("tau1", "tau2", "beta1", "beta2", "beta3", "beta4")
 PARAMS0 = np.array([1.0, 10.0, 3.0, 3.0, 3.0, 3.0])
+# (tau1, tau2) starting points of the multi-start fallback in run_gsw
+MULTI_START_TAUS = ((0.5, 5.0), (1.0, 10.0), (2.0, 15.0), (4.0, 25.0))
+# coarse (tau1, tau2) grid searched by fit_variable_projection before refinement
+VP_TAU1_GRID = np.geomspace(0.25, 5.0, 8)
+VP_TAU2_GRID = np.geomspace(2.0, 30.0, 8)
+
+# errors a single start can raise: no convergence, non-finite residuals at the start
+# (least_squares raises ValueError) or a failed linear solve in profile_betas
+FIT_ERRORS = (RuntimeError, ValueError, np.linalg.LinAlgError)
 
 
 def get_coupon_dates(quote_date, maturity_date):
@@ -96,29 +109,59 @@ def filter_treasury_cashflows(
     return CF_filtered
 
 
-def calc_cashflows(quote_data, filter_maturity_dates=False):
-    """Calculate cashflows."""
-    CF = pd.DataFrame(
-        dtype=float,
-        data=0,
-        index=quote_data.index,
-        columns=quote_data["tmatdt"].unique(),
-    )
+def cashflow_matrix(quote_data):
+    """Sparse cashflows of each security in `quote_data` (one row per security, with
+    caldt, tmatdt and tcouprt) on each payment date.
 
-    for i in quote_data.index:
-        coupon_dates = get_coupon_dates(
-            quote_data.loc[i, "caldt"], quote_data.loc[i, "tmatdt"]
-        )
+    Coupon dates are generated for all securities at once as integer day offsets,
+    following the same schedule as get_coupon_dates: ceil(days to maturity / 180)
+    dates stepped forward 6 months at a time from maturity - 6 * (n - 1) months, with
+    the day of month clamped to the shortest month along the way.
 
-        if coupon_dates is not None:
-            CF.loc[i, coupon_dates] = quote_data.loc[i, "tcouprt"] / 2
+    Returns:
+        tuple: (CF, payment_dates) where CF is a scipy.sparse.csr_array of shape
+        (securities, payment dates) and payment_dates is the sorted DatetimeIndex of
+        dates with a nonzero cashflow.
+    """
+    quote = quote_data["caldt"].to_numpy().astype("datetime64[D]")
+    maturity = quote_data["tmatdt"].to_numpy().astype("datetime64[D]")
+    coupon = quote_data["tcouprt"].to_numpy(dtype=float) / 2
+    n_bonds = len(quote_data)
+
+    n_dates = np.ceil((maturity - quote).astype(np.int64) / 180).astype(np.int64)
+    n_dates = np.maximum(n_dates, 0)
+    offsets = np.r_[0, np.cumsum(n_dates)]
+    bond_idx = np.repeat(np.arange(n_bonds), n_dates)
+    k = np.arange(offsets[-1]) - offsets[bond_idx]
+
+    maturity_month = maturity.astype("datetime64[M]")
+    maturity_day = (maturity - maturity_month.astype("datetime64[D]")).astype(np.int64) + 1
+    months = (maturity_month - 6 * (n_dates - 1))[bond_idx] + 6 * k
+    month_start = months.astype("datetime64[D]")
+    month_len = ((months + 1).astype("datetime64[D]") - month_start).astype(np.int64)
+
+    # each 6-month step keeps the previous day of month unless the new month is shorter,
+    # so the day is a running minimum within each security (a segmented cummin: shifting
+    # every security below the previous ones keeps them from interacting)
+    shift = 32 * bond_idx
+    day = np.minimum.accumulate(np.minimum(maturity_day[bond_idx], month_len) - shift) + shift
+    coupon_dates = month_start + (day - 1)
+
+    keep = (coupon_dates > quote[bond_idx]) & (coupon[bond_idx] != 0)
+    rows = np.r_[bond_idx[keep], np.arange(n_bonds)]
+    dates = np.r_[coupon_dates[keep], maturity]
+    values = np.r_[coupon[bond_idx[keep]], np.full(n_bonds, 100.0)]
+
+    payment_dates, cols = np.unique(dates, return_inverse=True)
+    CF = sparse.coo_array((values, (rows, cols)), shape=(n_bonds, len(payment_dates))).tocsr()
+    CF.sum_duplicates()
+    return CF, pd.DatetimeIndex(payment_dates.astype("datetime64[ns]"))
 
-        CF.loc[i, quote_data.loc[i, "tmatdt"]] += 100
 
-    # Sort columns by maturity date
-    CF = CF.fillna(0).sort_index(axis=1)
-    # Drop columns (dates) that are all zeros
-    CF.drop(columns=CF.columns[(CF == 0).all()], inplace=True)
+def calc_cashflows(quote_data, filter_maturity_dates=False):
+    """Calculate cashflows."""
+    CF, payment_dates = cashflow_matrix(quote_data)
+    CF = pd.DataFrame(CF.toarray(), index=quote_data.index, columns=payment_dates)
 
     if filter_maturity_dates:
         CF = filter_treasury_cashflows(CF, filter_maturity_dates=True)
@@ -170,24 +213,107 @@ def discount(t, params=PARAMS0):
     return np.exp(-spot(t, params=params) * t)
 
 
-def predict_prices(quote_date, df_all, params=PARAMS0):
-    """Calculate security prices from the parameters"""
+def nss_curves(params, maturities):
+    """Discount factors, spot rates and instantaneous forward rates for many
+    parameter sets at once.
+
+    Forward rates use the closed-form Svensson forward curve,
+    f(t) = beta1 + beta2 E1 + beta3 x1 E1 + beta4 x2 E2 with x = t / tau and
+    E = exp(-x), rather than a numerical derivative of the discount curve.
+
+    Args:
+        params: Array of shape (n_dates, 6) (or a single parameter vector)
+        maturities: Array of times to maturity in years; t = 0 is allowed
+
+    Returns:
+        tuple: (discount, spot, forward), each of shape (n_dates, n_maturities)
+    """
+    p = np.atleast_2d(np.asarray(params, dtype=float))
+    tau1, tau2, beta1, beta2, beta3, beta4 = (p[:, [i]] for i in range(6))
+
+    t = np.asarray(maturities, dtype=float).reshape(1, -1)
+    t_safe = np.where(t == 0.0, 1e-6, t)
+    x1, x2 = t_safe / tau1, t_safe / tau2
+    E1, E2 = np.exp(-x1), np.exp(-x2)
+    L1, L2 = (1 - E1) / x1, (1 - E2) / x2
+
+    spot_rates = beta1 + beta2 * L1 + beta3 * (L1 - E1) + beta4 * (L2 - E2)
+    forward = beta1 + beta2 * E1 + beta3 * x1 * E1 + beta4 * x2 * E2
+    return np.exp(-spot_rates * t), spot_rates, forward
+
+
+def discount_jac(t, params=PARAMS0):
+    """Discount factors and their analytic derivatives with respect to the six
+    Svensson parameters ("tau1", "tau2", "beta1", "beta2", "beta3", "beta4").
+
+    With x = t / tau, L = (1 - exp(-x)) / x and E = exp(-x), dL/dtau = (L - E) / tau
+    and dE/dtau = x E / tau, and d(discount)/dp = -t * discount * d(spot)/dp.
+
+    Returns:
+        tuple: (discount factors of shape (n,), Jacobian of shape (n, 6))
+    """
+    tau1, tau2, beta1, beta2, beta3, beta4 = params
+
+    t = np.asarray(t, dtype=float)
+    x1, x2 = t / tau1, t / tau2
+    E1, E2 = np.exp(-x1), np.exp(-x2)
+    L1, L2 = (1 - E1) / x1, (1 - E2) / x2
+    hump1, hump2 = L1 - E1, L2 - E2
+
+    y = beta1 + beta2 * L1 + beta3 * hump1 + beta4 * hump2
+    disc = np.exp(-y * t)
+
+    dy = np.empty((t.size, 6))
+    dy[:, 0] = (beta2 * hump1 + beta3 * (hump1 - x1 * E1)) / tau1
+    dy[:, 1] = beta4 * (hump2 - x2 * E2) / tau2
+    dy[:, 2] = 1.0
+    dy[:, 3] = L1
+    dy[:, 4] = hump1
+    dy[:, 5] = hump2
+
+    return disc, dy * (-t * disc)[:, None]
+
+
+def nss_loadings(t, tau1, tau2):
+    """Svensson spot-rate loadings on (beta1, beta2, beta3, beta4) for fixed (tau1, tau2):
+    spot(t, params) == nss_loadings(t, tau1, tau2) @ (beta1, beta2, beta3, beta4)."""
+    t = np.asarray(t, dtype=float)
+    x1, x2 = t / tau1, t / tau2
+    E1, E2 = np.exp(-x1), np.exp(-x2)
+    L1, L2 = (1 - E1) / x1, (1 - E2) / x2
+    return np.column_stack([np.ones_like(t), L1, L1 - E1, L2 - E2])
+
+
+def predict_prices(quote_date, df_all, params=PARAMS0, cashflows=None):
+    """Calculate security prices from the parameters
+
+    `cashflows` is an optional (CF, payment_dates) pair from cashflow_matrix for the
+    securities quoted on `quote_date`, so repeated calls can reuse it."""
     df = df_all[df_all["caldt"] == quote_date]
-    cashflows = calc_cashflows(df)
+    CF, payment_dates = cashflow_matrix(df) if cashflows is None else cashflows
     # Calculate time in years from quote date to each payment date
-    payment_dates = cashflows.columns
     time_deltas = payment_dates - quote_date
     times = time_deltas.days / 365.25  # Convert to fractional years
 
     disc = discount(times, params=params)
-    predicted_prices = cashflows @ disc
-    predicted_prices.index = df["tcusip"]
+    predicted_prices = pd.Series(CF @ disc, index=df["tcusip"])
     return predicted_prices
 
 
-def fit(quote_date, df_all, params0=PARAMS0):
+def fit(quote_date, df_all, params0=PARAMS0, cashflows=None, method="gradient"):
     """Fit NSS model to Treasury security data using nonlinear least squares.
 
+    `cashflows` is an optional (CF, payment_dates) pair from cashflow_matrix for the
+    securities quoted on `quote_date`; it is built if not given.
+
+    `method` selects the optimizer:
+    - "gradient": L-BFGS-B with the analytic gradient (see discount_jac)
+    - "least_squares": trust-region Gauss-Newton on the weighted price residuals,
+      with their analytic Jacobian
+    - "finite_difference": L-BFGS-B with finite-difference gradients
+    - "variable_projection": betas profiled out by weighted least squares and only
+      (tau1, tau2) searched, from a coarse grid (see fit_variable_projection)
+
     Optimization objective minimizes price errors weighted by duration:
         min Σ [(P_observed - P_model)^2 / D]
 
@@ -239,21 +365,36 @@ def fit(quote_date, df_all, params0=PARAMS0):
     """
     # Data preparation
     df = df_all[df_all["caldt"] == pd.to_datetime(quote_date)]
-    cashflows = calc_cashflows(df)
+    CF, payment_dates = cashflow_matrix(df) if cashflows is None else cashflows
 
     # Time calculations
-    payment_dates = cashflows.columns
     times = (payment_dates - quote_date).days / 365.25
 
     # Optimization components
-    observed_prices = df["price"].values
-    weights = 1 / np.sqrt(df["tdduratn"].values)  # Square root of duration, since it
+    observed_prices = df["price"].to_numpy(dtype=float)
+    weights = 1 / np.sqrt(df["tdduratn"].to_numpy(dtype=float))  # Square root of duration, since it
     # will be squared later
+    times = np.asarray(times, dtype=float)
+
+    def residuals(params):
+        """Duration-weighted price errors."""
+        return (observed_prices - CF @ discount(times, params)) * weights
+
+    def residuals_jac(params):
+        """Jacobian of the weighted price errors with respect to the parameters."""
+        _, disc_jac = discount_jac(times, params)
+        return -weights[:, None] * (CF @ disc_jac)
 
     def mean_squared_error(params):
         """Compute mean squared error."""
-        predicted_prices = cashflows @ discount(times, params)
-        return np.mean(((observed_prices - predicted_prices) * weights) ** 2)
+        return np.mean(residuals(params) ** 2)
+
+    def mean_squared_error_and_grad(params):
+        """Mean squared error and its analytic gradient."""
+        disc, disc_jac = discount_jac(times, params)
+        resid = (observed_prices - CF @ disc) * weights
+        grad = -2 / resid.size * ((resid * weights) @ (CF @ disc_jac))
+        return np.mean(resid ** 2), grad
 
     # Bounds and constraints
     bounds = [
@@ -264,9 +405,27 @@ def fit(quote_date, df_all, params0=PARAMS0):
         (None, None),
         (None, None),
     ]
-    result = minimize(
-        mean_squared_error, params0, bounds=bounds, options={"maxiter": 1e5}
-    )
+    if method == "variable_projection":
+        param_star = fit_variable_projection(
+            CF, times, observed_prices, df["tdduratn"].to_numpy(dtype=float), taus0=params0[:2]
+        )
+        return param_star, mean_squared_error(param_star)
+    elif method == "least_squares":
+        lower = [-np.inf if lo is None else lo for lo, _ in bounds]
+        result = least_squares(
+            residuals, params0, jac=residuals_jac, bounds=(lower, np.inf), method="trf"
+        )
+    elif method == "gradient":
+        result = minimize(
+            mean_squared_error_and_grad, params0, jac=True, bounds=bounds,
+            method="L-BFGS-B", options={"maxiter": 1e5}
+        )
+    elif method == "finite_difference":
+        result = minimize(
+            mean_squared_error, params0, bounds=bounds, options={"maxiter": 1e5}
+        )
+    else:
+        raise ValueError(f"Unknown method: {method}")
 
     if not result.success:
         raise RuntimeError(f"Optimization failed: {result.message}")
@@ -276,6 +435,241 @@ def fit(quote_date, df_all, params0=PARAMS0):
     return param_star, mean_squared_error(param_star)
 
 
+def _bond_yields(CF, times, prices, n_iter=50, tol=1e-12):
+    """Continuously compounded yield to maturity of each row of the sparse cashflow
+    matrix CF, by Newton's method on all securities at once."""
+    CF = CF.tocsr()
+    rows = np.repeat(np.arange(CF.shape[0]), np.diff(CF.indptr))
+    t = times[CF.indices]
+    y = np.zeros(CF.shape[0])
+    for _ in range(n_iter):
+        pv = CF.data * np.exp(-y[rows] * t)
+        price = np.bincount(rows, pv, minlength=len(y))
+        dprice = -np.bincount(rows, pv * t, minlength=len(y))
+        step = (price - prices) / dprice
+        y -= step
+        if np.max(np.abs(step)) < tol:
+            break
+    return y
+
+
+def profile_betas(tau1, tau2, CF, times, prices, durations, beta0=None, yields=None,
+                  n_iter=20, tol=1e-12):
+    """Best betas and duration-weighted price MSE for fixed (tau1, tau2).
+
+    The spot curve is linear in the betas, so the betas start from a closed-form
+    weighted least squares of the securities' yields on the loadings at their
+    durations (price errors / duration ~ duration * yield errors), unless `beta0` is
+    given, and are then polished by Gauss-Newton steps on the weighted price errors,
+    each also a linear least squares. `yields` (from _bond_yields) can be passed when
+    profiling many (tau1, tau2) pairs on the same date.
+    """
+    weights = 1 / np.sqrt(durations)
+    X = nss_loadings(times, tau1, tau2)
+
+    if beta0 is None:
+        if yields is None:
+            yields = _bond_yields(CF, times, prices)
+        sqrt_w = np.sqrt(durations) * prices   # price error ~ -price * duration * yield error
+        X_bond = nss_loadings(durations, tau1, tau2)
+        beta0 = np.linalg.lstsq(X_bond * sqrt_w[:, None], yields * sqrt_w, rcond=None)[0]
+
+    beta = np.asarray(beta0, dtype=float)
+    for _ in range(n_iter):
+        disc = np.exp(-(X @ beta) * times)
+        resid = (prices - CF @ disc) * weights
+        jac = weights[:, None] * (CF @ (X * (times * disc)[:, None]))
+        step = np.linalg.lstsq(jac, resid, rcond=None)[0]
+        beta = beta - step
+        if np.max(np.abs(step)) < tol:
+            break
+
+    disc = np.exp(-(X @ beta) * times)
+    return beta, np.mean(((prices - CF @ disc) * weights) ** 2)
+
+
+def fit_variable_projection(CF, times, prices, durations, taus0=None,
+                            tau1_grid=VP_TAU1_GRID, tau2_grid=VP_TAU2_GRID, n_refine=3):
+    """Variable-projection NSS fit: the four betas are profiled out with profile_betas,
+    so only (tau1, tau2) are searched, first on a coarse grid (plus `taus0`, e.g. the
+    previous date's optimum) and then refined by Nelder-Mead in log(tau) from the
+    `n_refine` best grid points.
+
+    The returned parameters are those of the best profiled evaluation seen, taus and
+    betas together. RuntimeError is raised if no evaluation has a finite objective
+    (e.g. non-finite prices).
+
+    Returns:
+        array: fitted ("tau1", "tau2", "beta1", "beta2", "beta3", "beta4")
+    """
+    times = np.asarray(times, dtype=float)
+    yields = _bond_yields(CF, times, prices)
+    candidates = [(t1, t2) for t1 in tau1_grid for t2 in tau2_grid if t2 > t1]
+    if taus0 is not None:
+        candidates.append(tuple(taus0))
+
+    best = {"score": np.inf, "log_taus": None, "beta": None}
+
+    def profile(log_taus, beta0=None):
+        """Profiled betas and objective in log(tau), keeping the best evaluation; a failed
+        linear solve scores inf."""
+        try:
+            beta, score = profile_betas(*np.exp(log_taus), CF, times, prices, durations,
+                                        beta0=beta0, yields=yields)
+        except np.linalg.LinAlgError:
+            return beta0, np.inf
+        if score < best["score"]:
+            best.update(score=score, log_taus=np.array(log_taus, dtype=float), beta=beta)
+        return beta, score
+
+    def refine_objective(log_taus, last):
+        """Profiled objective warm-started from the betas of the previous evaluation."""
+        last[0], score = profile(log_taus, last[0])
+        return score if np.isfinite(score) else np.inf
+
+    scores = np.array([profile(np.log(taus))[1] for taus in candidates])
+    scores[~np.isfinite(scores)] = np.inf
+    for i in np.argsort(scores, kind="stable")[:n_refine]:
+        if not np.isfinite(scores[i]):
+            break
+        start = np.log(candidates[i])
+        last = [profile(start)[0]]
+        minimize(refine_objective, start, args=(last,), method="Nelder-Mead",
+                 options={"xatol": 1e-4, "fatol": 1e-12})
+
+    if best["log_taus"] is None:
+        raise RuntimeError("Optimization failed: no (tau1, tau2) gave a finite profiled objective")
+    return np.r_[np.exp(best["log_taus"]), best["beta"]]
+
+
+def fit_multi_start(quote_date, quotes, cashflows=None, starts=(), start_taus=MULTI_START_TAUS):
+    """Best least-squares fit over several starting points: the given `starts` plus, for
+    each (tau1, tau2) in `start_taus`, those taus with their profiled betas (see
+    profile_betas). Starts that fail (any of FIT_ERRORS) are skipped; RuntimeError is
+    raised if every start fails.
+
+    Returns:
+        tuple: (optimized_parameters, objective_value)
+    """
+    CF, payment_dates = cashflow_matrix(quotes) if cashflows is None else cashflows
+    times = np.asarray((payment_dates - quote_date).days / 365.25)
+    prices = quotes["price"].to_numpy(dtype=float)
+    durations = quotes["tdduratn"].to_numpy(dtype=float)
+
+    starts = list(starts)
+    for tau1, tau2 in start_taus:
+        try:
+            starts.append(np.r_[tau1, tau2, profile_betas(tau1, tau2, CF, times, prices, durations)[0]])
+        except FIT_ERRORS:
+            continue
+
+    best = None
+    for params0 in starts:
+        try:
+            params, mse = fit(quote_date, quotes, params0, (CF, payment_dates), method="least_squares")
+        except FIT_ERRORS:
+            continue
+        if not np.isfinite(mse):
+            continue
+        if best is None or mse < best[1]:
+            best = (params, mse)
+    if best is None:
+        raise RuntimeError(f"Optimization failed from every start on {quote_date}")
+    return best
+
+
+def _fit_gsw_dates(sample, dates, params0=None, start_idx=0, n_total=None, jump_ratio=4.0,
+                   min_securities=6):
+    """Fit a contiguous run of quote dates sequentially, warm-starting each date from the
+    previous date's optimum (the first from `params0`, or a variable-projection fit if
+    None). If the warm-started fit fails or its objective jumps above `jump_ratio` times
+    the previous date's, the date is refitted with fit_multi_start. Dates with fewer than
+    `min_securities` securities, and dates where every multi-start fit fails (flagged
+    "fit_failed"), get NaN parameters; the next date warm-starts from the last good fit."""
+    results = {}
+    n_total = len(dates) if n_total is None else n_total
+    prev_params, prev_mse = params0, None
+
+    chunk = sample.loc[sample["caldt"].isin(dates)]
+    for idx, (quote_date, quotes) in enumerate(chunk.groupby("caldt"), start=start_idx):
+        if idx % 50 == 0:
+            curve_fitting_utils.print_progress(quote_date, idx, n_total)
+
+        if len(quotes) < min_securities:
+            results[quote_date] = {"params": np.full(6, np.nan), "mse": np.nan,
+                                   "n_securities": len(quotes), "multi_start": False, "fit_failed": False}
+            continue
+
+        cashflows = cashflow_matrix(quotes)
+        try:
+            if prev_params is None:
+                params, mse = fit(quote_date, quotes, PARAMS0, cashflows, method="variable_projection")
+            else:
+                params, mse = fit(quote_date, quotes, prev_params, cashflows, method="least_squares")
+        except FIT_ERRORS:
+            params, mse = None, np.inf
+
+        multi_start = (params is None or not np.isfinite(mse)
+                       or (prev_mse is not None and mse > jump_ratio * prev_mse))
+        if multi_start:
+            starts = [p for p in (params, prev_params) if p is not None]
+            try:
+                params, mse = fit_multi_start(quote_date, quotes, cashflows, starts=starts)
+            except RuntimeError:
+                results[quote_date] = {"params": np.full(6, np.nan), "mse": np.nan,
+                                       "n_securities": len(quotes), "multi_start": True, "fit_failed": True}
+                continue
+
+        results[quote_date] = {"params": params, "mse": mse,
+                               "n_securities": len(quotes), "multi_start": multi_start, "fit_failed": False}
+        prev_params, prev_mse = params, mse
+
+    return results
+
+
+def run_gsw(sample, params0=None, n_jobs=1, chunk_size=curve_fitting_utils.DATE_CHUNK_SIZE, executor=None,
+            jump_ratio=4.0):
+    """Fit the Nelson-Siegel-Svensson curve on every quote date (caldt) of `sample`,
+    already passed through gurkaynak_sack_wright_filters, with tdduratn in years.
+
+    Dates are split into contiguous chunks of `chunk_size` dates. Within a chunk each date
+    is warm-started from the previous date's optimum, with a multi-start fallback when
+    the objective jumps (see _fit_gsw_dates), and each chunk starts from `params0` or a
+    variable-projection fit. Chunks are fitted across `n_jobs` worker processes (-1 for
+    all cores), or on a caller-supplied `executor`; results depend only on `chunk_size`,
+    never on the number of workers. chunk_size=None keeps a single chunk, i.e. the fully
+    sequential warm-started run.
+
+    Returns:
+        dict: quote date -> {"params", "mse", "n_securities", "multi_start", "fit_failed"}
+    """
+    dates = np.sort(sample["caldt"].unique())
+    chunks = curve_fitting_utils.date_chunks(dates, chunk_size)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    starts = np.cumsum([0] + [len(c) for c in chunks[:-1]])
+
+    if executor is None and (n_jobs == 1 or len(chunks) == 1):
+        parts = [
+            _fit_gsw_dates(sample, c, params0, start, len(dates), jump_ratio)
+            for c, start in zip(chunks, starts)
+        ]
+    else:
+        chunk_samples = [sample.loc[sample["caldt"].isin(c)] for c in chunks]
+        args = (chunk_samples, chunks, repeat(params0), starts, repeat(len(dates)), repeat(jump_ratio))
+        if executor is not None:
+            parts = list(executor.map(_fit_gsw_dates, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                parts = list(pool.map(_fit_gsw_dates, *args))
+
+    results = {}
+    for part in parts:
+        results.update(part)
+    return results
+
+
 def gurkaynak_sack_wright_filters(dff):
     """Apply Treasury security filters based on Gürkaynak, Sack, and Wright (2006).
 
@@ -380,6 +774,9 @@ def _demo():
     """
     Demo of how the Nelson-Siegel-Svensson model works
     """
+    # data pulls need WRDS; the model functions above do not
+    import pull_CRSP_treasury
+    import pull_yield_curve_data
 
     actual_all = pull_yield_curve_data.load_fed_yield_curve_all(data_dir=DATA_DIR)
     # Create copy of parameter DataFrame to avoid view vs copy issues
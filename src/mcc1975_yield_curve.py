@@ -6,9 +6,11 @@ data using a cubic spline basis.
 
 import numpy as np
 import pandas as pd
+from scipy.linalg import solve_triangular
 
 import error_metrics
 import curve_fitting_utils
+from curve_fitting_utils import bond_cashflow_matrix, cashflow_offsets
 
 from curve_conversions import add_spot_and_forwards
 
@@ -33,11 +35,22 @@ def get_nodes(bonds, maturities):
 
     return d, ncoef
 
+def _basis_knots(d, k):
+    """Per-column (d_{j-1}, d_j, d_{j+1}) for f_1..f_{k-1}, with the paper's j=1 and j=k-1 conventions."""
+    d_jm1 = np.r_[0.0, d[:-1]]
+    d_j = d.copy()
+    d_jp1 = np.r_[d[1:], d[-1]]
+    return d_jm1, d_j, d_jp1
+
 def build_basis_matrix(m_grid, d, k):
     """
     Build the McCulloch (Appendix A) cubic spline basis matrix F where
     F[:, j-1] = f_j(m) for j=1..k, using formulas (A.2)-(A.6).
 
+    Each f_j is linear (A.5) once m >= d_{j+1}, so the columns are located with
+    searchsorted on the knots: for every m the linear columns come first, then
+    at most a few cubic (A.3)/(A.4) columns, then zeros (A.2).
+
     Parameters
     ----------
     m_grid : array-like
@@ -52,7 +65,7 @@ def build_basis_matrix(m_grid, d, k):
     F : np.ndarray shape (len(m_grid), k)
         Basis matrix with columns f_1,...,f_k evaluated at m_grid.
     """
-    m = np.asarray(m_grid, dtype=float)
+    m = np.asarray(m_grid, dtype=float).ravel()
     d = np.asarray(d, dtype=float)
 
     if len(d) != k - 1:
@@ -60,61 +73,42 @@ def build_basis_matrix(m_grid, d, k):
     if np.any(np.diff(d) < 0):
         raise ValueError("Knots d must be nondecreasing.")
 
+    d_jm1, d_j, d_jp1 = _basis_knots(d, k)
+
+    # Number of columns in (A.5), in (A.4) or beyond, and in (A.3) or beyond
+    n_lin = np.searchsorted(d_jp1, m, side="right")
+    n_mid = np.searchsorted(d_j, m, side="right")
+    n_low = np.searchsorted(d_jm1, m, side="right")
+
     F = np.zeros((m.size, k), dtype=float)
+    cols = np.arange(k - 1)
 
-    def f_j(mvals, j):
-        """
-        Evaluate f_j(m) for j=1..k-1 using A.2-A.5 (paper indexing, 1-based).
-        """
-        # Special-case note in paper: set d_{j-1} = d_j = 0 when j=1.
-        if j == 1:
-            d_jm1 = 0.0      # d_0 = 0
-            d_j   = d[0]     # d_1 (should be 0 if you want the classic setup)
-            d_jp1 = d[1]     # d_2
-        else:
-            d_jm1 = d[j-2]
-            d_j   = d[j-1]
-            d_jp1 = d[j] if (j < k-1) else d[-1]
-
-        out = np.zeros_like(mvals, dtype=float)
-
-        # (A.2) m < d_{j-1} => 0 (already)
-
-        # (A.3) d_{j-1} <= m < d_j
-        mask2 = (mvals >= d_jm1) & (mvals < d_j)
-        if np.any(mask2):
-            denom = 6.0 * (d_j - d_jm1)
-            if denom != 0.0:
-                out[mask2] = ((mvals[mask2] - d_jm1) ** 3) / denom
-
-        # (A.4) d_j <= m < d_{j+1}
-        mask3 = (mvals >= d_j) & (mvals < d_jp1)
-        if np.any(mask3):
-            c = d_j - d_jm1
-            e = mvals[mask3] - d_j
-            denom = 6.0 * (d_jp1 - d_j)
-            if denom != 0.0:
-                out[mask3] = (c**2)/6.0 + (c*e)/2.0 + (e**2)/2.0 - (e**3)/denom
-            else:
-                out[mask3] = (c**2)/6.0 + (c*e)/2.0 + (e**2)/2.0
-
-        # (A.5) d_{j+1} <= m
-        mask4 = (mvals >= d_jp1)
-        if np.any(mask4):
-            out[mask4] = (d_jp1 - d_jm1) * (
-                (2.0 * d_jp1 - d_j - d_jm1) / 6.0 + (mvals[mask4] - d_jp1) / 2.0
-            )
-
-        return out
-
-    # Columns 1..k-1: f_1..f_{k-1}
-    for j in range(1, k):
-        F[:, j - 1] = f_j(m, j)
+    # (A.5) d_{j+1} <= m
+    lin = (d_jp1 - d_jm1) * ((2.0 * d_jp1 - d_j - d_jm1) / 6.0 + (m[:, None] - d_jp1) / 2.0)
+    F[:, :-1] = np.where(cols < n_lin[:, None], lin, 0.0)
+
+    # (A.4) d_j <= m < d_{j+1}
+    c = d_j - d_jm1
+    c2 = c**2 / 6.0
+    rows, j = _ragged_ranges(n_lin, n_mid)
+    e = m[rows] - d_j[j]
+    F[rows, j] = c2[j] + (c[j]*e)/2.0 + (e**2)/2.0 - (e**3)/(6.0 * (d_jp1[j] - d_j[j]))
+
+    # (A.3) d_{j-1} <= m < d_j
+    rows, j = _ragged_ranges(n_mid, n_low)
+    F[rows, j] = ((m[rows] - d_jm1[j]) ** 3) / (6.0 * (d_j[j] - d_jm1[j]))
 
     # Last column: (A.6) f_k(m) = m
     F[:, k - 1] = m
     return F
 
+def _ragged_ranges(start, stop):
+    """Row and column indices of the ranges [start[i], stop[i]) for every row i."""
+    counts = stop - start
+    rows = np.repeat(np.arange(start.size), counts)
+    cols = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(start, counts)
+    return rows, cols
+
 def discount(beta, t, d, ncoef):
     """Compute discount."""
     t = np.asarray(t, dtype=float)
@@ -127,40 +121,84 @@ def discount(beta, t, d, ncoef):
 
     return D
 
-def predict_prices(beta, cashflows, times, d, ncoef, accrued_interest):
+def cashflow_design(cashflows, times, d, ncoef):
+    """
+    Evaluate the basis once for every cashflow of a date.
+
+    Returns S, the (n_bonds x total_cf) sparse cashflow matrix, and F, the
+    (total_cf x ncoef) basis at the cashflow times, so that X = S @ F.
+    """
+    lengths = [len(c) for c in cashflows]
+    offsets = np.r_[0, np.cumsum(lengths)]
+    S = bond_cashflow_matrix(np.concatenate(cashflows).astype(float), offsets)
+    F = build_basis_matrix(np.concatenate(times), d, ncoef)
+    return S, F
+
+def predict_prices(beta, cashflows, times, d, ncoef, accrued_interest, design=None):
     """
     cashflows: list (or iterable) of 1D arrays, cf_i[j] cashflow at time t_i[j]
     times:     list (or iterable) of 1D arrays, t_i[j] cashflow time in years for bond i
+    design:    optional (S, F) from cashflow_design, reused from the fit
     """
     beta = np.asarray(beta, dtype=float)
-    model_prices = []
+    S, F = design if design is not None else cashflow_design(cashflows, times, d, ncoef)
 
-    for i, (t_i, cf_i) in enumerate(zip(times, cashflows)):
-        D = discount(beta, t_i, d, ncoef)
-        
-        P_i_dirty = np.sum(cf_i * D)
-        P_i = P_i_dirty - accrued_interest[i]
-        model_prices.append(P_i)
+    # discount at every cashflow date, then one sparse matvec for all dirty prices
+    D = 1.0 + F @ beta
+    return S @ D - np.asarray(accrued_interest, dtype=float)
 
-    return np.asarray(model_prices, dtype=float)
+def design_system(cashflows, times, prices_clean, ai, d, ncoef, design=None):
+    """Linear system X beta = rhs of the McCulloch fit for one date."""
+    S, F = design if design is not None else cashflow_design(cashflows, times, d, ncoef)
+    X = S @ F                                            # (n_bonds, ncoef)
+    C = S.sum(axis=1)
+    rhs = np.asarray(prices_clean, dtype=float) - (C - np.asarray(ai, dtype=float))
+    return X, rhs
 
-import numpy as np
-
-def fit(cashflows, times, prices_clean, ai, d, ncoef):
+def fit(cashflows, times, prices_clean, ai, d, ncoef, design=None):
     """Compute fit."""
-    X_rows = []
-    rhs = []
-    for cf_i, t_i, P_i, ai_i in zip(cashflows, times, prices_clean, ai):
-        F_i = build_basis_matrix(t_i, d, ncoef)      # (n_cf, ncoef)
-        C_i = np.sum(cf_i)
-        X_i = np.sum(cf_i[:, None] * F_i, axis=0)        # (ncoef,)
-        X_rows.append(X_i)
-        rhs.append(P_i - (C_i - ai_i))
-    X = np.vstack(X_rows)
-    rhs = np.asarray(rhs)
+    X, rhs = design_system(cashflows, times, prices_clean, ai, d, ncoef, design)
     beta_hat, *_ = np.linalg.lstsq(X, rhs, rcond=None)
     return beta_hat
 
+def lstsq_batched(systems):
+    """
+    Solve many least-squares problems X_b beta_b = rhs_b with one batched QR.
+
+    Each X_b is zero-padded to the largest number of bonds and coefficients; padded
+    coefficients get an identity row with zero rhs so they solve to exactly zero and
+    leave the real coefficients untouched. Full-rank systems are finished with a
+    triangular solve on their R factor; systems whose R has a near-zero diagonal
+    (rank-deficient X_b, judged with np.linalg.lstsq's default rcond) are re-solved with
+    np.linalg.lstsq, so every beta_b is what fit would return.
+
+    Returns a list of beta_b with their original lengths.
+    """
+    n_rows = max(X.shape[0] for X, _ in systems)
+    n_cols = max(X.shape[1] for X, _ in systems)
+
+    X_pad = np.zeros((len(systems), n_rows + n_cols, n_cols))
+    y_pad = np.zeros((len(systems), n_rows + n_cols))
+    for b, (X, rhs) in enumerate(systems):
+        m, k = X.shape
+        X_pad[b, :m, :k] = X
+        y_pad[b, :m] = rhs
+        X_pad[b, n_rows + np.arange(k, n_cols), np.arange(k, n_cols)] = 1.0
+
+    Q, R = np.linalg.qr(X_pad)
+    qty = np.einsum("bmk,bm->bk", Q, y_pad)
+
+    betas = []
+    for b, (X, rhs) in enumerate(systems):
+        m, k = X.shape
+        diag = np.abs(np.diagonal(R[b])[:k])
+        if diag.min() <= np.finfo(float).eps * max(m, k) * diag.max():
+            beta_b, *_ = np.linalg.lstsq(X, rhs, rcond=None)
+        else:
+            beta_b = solve_triangular(R[b, :k, :k], qty[b, :k])
+        betas.append(beta_b)
+    return betas
+
 def discount_curve(bonds, beta_hat, d, ncoef):
     """Calculate discount curve using fitted beta"""
     T_grid = np.linspace(0, np.ceil(max(bonds["ttm"])), 1000)
@@ -180,54 +218,124 @@ def discount_curve(bonds, beta_hat, d, ncoef):
     return curve_df, nodes_df
 
 
-def run_mcculloch(sample, pre_trained_results = None):
-    """Run mcculloch using the provided sample data and optional pre-trained results for nodes and beta."""
-    results = {}
+def _mcc_date_inputs(bonds, cashflow_cache=None, pre_trained=None, sample_cashflows=None):
+    """Sort a date's bonds, build its cashflows, nodes and design (fit not yet run).
 
-    dates = sample["date"].unique()
+    sample_cashflows is an optional (offsets, c_all, times_all) built for the whole
+    sample, indexed by the positional index of `bonds` in that sample."""
+    rows = bonds.index.to_numpy()
+    bonds = bonds.reset_index(drop=True)
+
+    bonds["ttm"] = bonds["ttm_days"] / 365
+
+    bonds = bonds.sort_values(by="ttm", ascending=True)
+
+    prices = bonds["mid_price"].to_numpy()
+    acc_int = bonds["accrued_interest"].to_numpy()
+    maturities = bonds["ttm"].to_numpy()
+
+    if sample_cashflows is not None:
+        offsets, c_all, times_all = sample_cashflows
+        pos = rows[bonds.index.to_numpy()]
+        cashflows = [c_all[offsets[i]:offsets[i + 1]] for i in pos]
+        times = [times_all[offsets[i]:offsets[i + 1]] for i in pos]
+    else:
+        cashflows, times = curve_fitting_utils.get_cashflows_from_bonds(bonds, cache=cashflow_cache)
+
+    if pre_trained:
+        beta_hat = pre_trained["beta_hat"]
+        ncoef = beta_hat.shape[0]
+        d = pre_trained["nodes"]["T"].to_numpy()
+    else:
+        beta_hat = None
+        d, ncoef = get_nodes(bonds, maturities)
+
+    return {"bonds": bonds, "prices": prices, "acc_int": acc_int,
+            "cashflows": cashflows, "times": times, "d": d, "ncoef": ncoef,
+            "design": cashflow_design(cashflows, times, d, ncoef), "beta_hat": beta_hat}
+
+def _mcc_date_results(inputs, beta_hat):
+    """Price a date's bonds at beta_hat and build its results entry."""
+    bonds, d, ncoef = inputs["bonds"], inputs["d"], inputs["ncoef"]
+
+    P_hat = predict_prices(beta_hat, inputs["cashflows"], inputs["times"], d, ncoef,
+                           inputs["acc_int"], inputs["design"])
+    resid = P_hat - inputs["prices"]
 
-    for idx, DATE in enumerate(dates):
+    bonds["model_price"] = P_hat
+    bonds["residual"] = resid
+
+    curve_df, nodes_df = discount_curve(bonds, beta_hat, d, ncoef)
+
+    wmae = error_metrics.wmae(bonds["model_price"], bonds["bid"], bonds["ask"], bonds["duration"])
+    hit_rate = error_metrics.hit_rate(bonds["model_price"], bonds["bid"], bonds["ask"])
+
+    return {"beta_hat": beta_hat,
+            "bonds": bonds,
+            "curve": curve_df,
+            "nodes": nodes_df,
+            "wmae": wmae,
+            "hit_rate": hit_rate,
+            }
+
+def iter_mcculloch(panels, pre_trained_results = None, cashflow_cache = None, n_total = None):
+    """Streaming variant of run_mcculloch: consumes (date, bonds) panels, e.g. from
+    curve_fitting_utils.iter_date_slices, and yields (date, result) one date at a time,
+    so callers can write each date out instead of holding the whole history."""
+    for idx, (DATE, bonds) in enumerate(panels):
         if idx % 50 == 0:
-            print(f"{DATE.to_period('M')}: {idx} / {len(dates)} ({int(idx/len(dates)*100)}%)")
+            curve_fitting_utils.print_progress(DATE, idx, n_total)
+
+        pre_trained = pre_trained_results[DATE] if pre_trained_results else None
+        date_inputs = _mcc_date_inputs(bonds, cashflow_cache, pre_trained)
 
-        bonds = sample.loc[sample["date"] == DATE].reset_index(drop=True)
+        beta_hat = date_inputs["beta_hat"]
+        if beta_hat is None:
+            beta_hat = fit(date_inputs["cashflows"], date_inputs["times"], date_inputs["prices"],
+                           date_inputs["acc_int"], date_inputs["d"], date_inputs["ncoef"],
+                           date_inputs["design"])
+        yield DATE, _mcc_date_results(date_inputs, beta_hat)
 
-        bonds["ttm"] = bonds["ttm_days"] / 365
+def run_mcculloch(sample, pre_trained_results = None, cashflow_cache = None, batched = False):
+    """Run mcculloch using the provided sample data and optional pre-trained results for nodes and beta,
+    looking up cashflows in a shared cashflow cache when one is provided.
 
-        bonds = bonds.sort_values(by="ttm", ascending=True)
+    With batched=True the sample's cashflows are built in one pass (unless a cache is
+    given), every date's design is built first and all fits are solved in one batched
+    QR (lstsq_batched); results match the per-date lstsq to round-off."""
+    dates = sample["date"].unique()
 
-        prices = bonds["mid_price"].to_numpy()
-        acc_int = bonds["accrued_interest"].to_numpy()
-        maturities = bonds["ttm"].to_numpy()
+    if not batched:
+        panels = curve_fitting_utils.iter_date_slices(sample, dates)
+        return dict(iter_mcculloch(panels, pre_trained_results, cashflow_cache, n_total=len(dates)))
 
-        cashflows, times = curve_fitting_utils.get_cashflows_from_bonds(bonds)
+    results = {}
 
-        if pre_trained_results:
-            beta_hat = pre_trained_results[DATE]["beta_hat"]
-            ncoef = beta_hat.shape[0]
-            d = pre_trained_results[DATE]["nodes"]["T"].to_numpy()
-        else:
-            d, ncoef = get_nodes(bonds, maturities)
-            beta_hat = fit(cashflows, times, prices, acc_int, d, ncoef)
-        
-        P_hat = predict_prices(beta_hat, cashflows, times, d, ncoef, acc_int)
-        resid = P_hat - prices
-
-        bonds["model_price"] = P_hat
-        bonds["residual"] = resid
-
-        curve_df, nodes_df = discount_curve(bonds, beta_hat, d, ncoef)
-        
-        wmae = error_metrics.wmae(bonds["model_price"], bonds["bid"], bonds["ask"], bonds["duration"])
-        hit_rate = error_metrics.hit_rate(bonds["model_price"], bonds["bid"], bonds["ask"])
-        
-        
-        results[DATE] = {"beta_hat": beta_hat,
-                        "bonds": bonds,
-                        "curve": curve_df,
-                        "nodes": nodes_df,
-                        "wmae": wmae,
-                        "hit_rate": hit_rate,
-                        }
-        
-    return results
\ No newline at end of file
+    sample_cashflows = None
+    if cashflow_cache is None:
+        sample = sample.reset_index(drop=True)
+        c_all, times_all, bond_idx = curve_fitting_utils.build_cashflow_arrays(sample)
+        sample_cashflows = (cashflow_offsets(bond_idx, len(sample)), c_all, times_all)
+
+    inputs = {}
+    for idx, (DATE, bonds) in enumerate(curve_fitting_utils.iter_date_slices(sample, dates)):
+        if idx % 50 == 0:
+            curve_fitting_utils.print_progress(DATE, idx, len(dates))
+
+        pre_trained = pre_trained_results[DATE] if pre_trained_results else None
+        inputs[DATE] = _mcc_date_inputs(bonds, cashflow_cache, pre_trained, sample_cashflows)
+
+    to_fit = [DATE for DATE, inp in inputs.items() if inp["beta_hat"] is None]
+    if to_fit:
+        systems = [
+            design_system(inputs[D]["cashflows"], inputs[D]["times"], inputs[D]["prices"],
+                          inputs[D]["acc_int"], inputs[D]["d"], inputs[D]["ncoef"],
+                          inputs[D]["design"])
+            for D in to_fit
+        ]
+        for DATE, beta_hat in zip(to_fit, lstsq_batched(systems)):
+            inputs[DATE]["beta_hat"] = beta_hat
+    for DATE, inp in inputs.items():
+        results[DATE] = _mcc_date_results(inp, inp["beta_hat"])
+
+    return results
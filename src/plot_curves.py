@@ -7,13 +7,16 @@ create overlays of all methods plus GSW.
 Set (2): For each method, plot discount/spot/forward curves across those
 selected dates.
 
+Curves are read from the common-curve store (DATA_DIR/common_curves.arrow, written by
+build_common_curves.py) and the dates from DATA_DIR/correlation_selected_dates.csv
+(written by correlation_metrics.py).
+
 Outputs: plots saved to _output directory
 
 """
 from pathlib import Path
 
 import matplotlib.pyplot as plt
-import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
@@ -153,14 +156,15 @@ def _selected_date_map(selected_df):
     return out
 
 
-def _build_set_one_plots(curves_by_method, selected_dates):
+def _build_set_one_plots(curves_by_method, selected_dates, gsw_curves):
     """For the selected representative dates, plot all method curves plus GSW overlays."""
     generated = []
-    t_grid = np.linspace(0.0, 30.0, 30 * 48 + 1)
-    dt_fwd = float(np.median(np.diff(t_grid)))
 
     for label, dt in selected_dates.items():
-        actual_gsw_date, gsw_curve = cm.build_gsw_curve_for_date(dt, t_grid=t_grid, dt_fwd=dt_fwd, data_dir=DATA_DIR)
+        gsw_curve = _curve_for_date(gsw_curves, dt)
+        if gsw_curve.empty:
+            continue
+        actual_gsw_date = gsw_curve["asof_date"].iloc[0]
 
         named_method_curves = {}
         for method in cm.METHOD_FILE_MAP:
@@ -236,13 +240,14 @@ def _build_set_two_plots(curves_by_method, selected_dates):
 
 
 def main():
-    curves_by_method = cm.load_all_method_curves(data_dir=DATA_DIR)
-    _, _, selected = cm.compute_and_save_correlation_metrics(curves_by_method=curves_by_method, data_dir=DATA_DIR)
+    curves = cm.common_curve_frames(cm.load_common_curves(data_dir=DATA_DIR))
+    curves_by_method = {m: curves[m] for m in cm.METHOD_FILE_MAP}
+    selected = pd.read_csv(DATA_DIR / "correlation_selected_dates.csv", parse_dates=["date"])
 
     selected_dates = _selected_date_map(selected)
 
     generated = []
-    generated.extend(_build_set_one_plots(curves_by_method, selected_dates))
+    generated.extend(_build_set_one_plots(curves_by_method, selected_dates, curves["gsw"]))
     generated.extend(_build_set_two_plots(curves_by_method, selected_dates))
 
     manifest = pd.DataFrame({"file": [str(p) for p in generated]})
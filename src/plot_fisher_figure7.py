@@ -10,6 +10,7 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+import curve_store
 from settings import config
 
 SRC_DIR = Path(__file__).resolve().parent
@@ -49,19 +50,19 @@ def _annotation_block(curve, x_val, label, ax, ay):
 
 
 def main():
-    curve_path = DATA_DIR / "fisher_forward_curve.parquet"
     in_sample_path = DATA_DIR / "fisher_bond_fits.parquet"
     out_sample_path = DATA_DIR / "fisher_oos_bond_fits.parquet"
 
-    curve_all = pd.read_parquet(curve_path)
+    # only the target date's curve is rebuilt from the coefficient table
+    params = curve_store.load_curve_params("fisher", DATA_DIR)
+    params = params.loc[pd.to_datetime(params["date"]).dt.normalize() == TARGET_DATE]
     in_sample_all = pd.read_parquet(in_sample_path)
     out_sample_all = pd.read_parquet(out_sample_path)
 
-    curve_all["date"] = pd.to_datetime(curve_all["date"]).dt.normalize()
     in_sample_all["date"] = pd.to_datetime(in_sample_all["date"]).dt.normalize()
     out_sample_all["date"] = pd.to_datetime(out_sample_all["date"]).dt.normalize()
 
-    curve = curve_all.loc[curve_all["date"] == TARGET_DATE].copy()
+    curve = curve_store.evaluate_curves(params, "fisher")
     in_sample = in_sample_all.loc[in_sample_all["date"] == TARGET_DATE].copy()
     out_sample = out_sample_all.loc[out_sample_all["date"] == TARGET_DATE].copy()
 
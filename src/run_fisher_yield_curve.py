@@ -5,7 +5,8 @@ Inputs:
   - DATA_DIR/tidy_CRSP_treasury.parquet   (produced by tidy_CRSP_treasury.py)
 
 Outputs (in-sample):
-  - DATA_DIR/fisher_forward_curve.parquet
+  - DATA_DIR/fisher_forward_curve.parquet   (skipped with curve_points=False)
+  - DATA_DIR/fisher_curve_params.parquet    (beta_hat, knots and lambda per date, see curve_store.py)
   - DATA_DIR/fisher_bond_fits.parquet
   - DATA_DIR/fisher_fit_quality_by_date.csv
   - DATA_DIR/fisher_error_metrics.csv
@@ -13,12 +14,24 @@ Outputs (in-sample):
 Outputs (out-of-sample):
   - DATA_DIR/fisher_oos_bond_fits.parquet
   - DATA_DIR/fisher_oos_error_metrics.csv
+
+With incremental=True, only dates that are new or whose inputs changed (per-date
+content hash, kept in DATA_DIR/fisher_fit_state.parquet) are fitted; their rows replace
+those dates in the stored outputs and the error metrics are recomputed from the
+merged bond fits.
+
+With stream=True, dates are fitted one at a time (in the same warm-started chunks of
+chunk_size dates as the in-memory run) and curves and bond fits are written
+to parquet in row-group batches as they are produced, so memory does not grow with
+the length of the sample.
 """
+from itertools import chain
 from pathlib import Path
 import pandas as pd
 import numpy as np
 from settings import config
 import curve_fitting_utils as cfu
+import curve_store
 import fisher1995_yield_curve as fisher
 
 DATA_DIR = Path(config("DATA_DIR"))
@@ -27,39 +40,38 @@ OUTPUT_DIR = Path(config("OUTPUT_DIR"))
 
 def _collect_results(results):
     """Collect model outputs into consolidated result tables."""
-    curves, nodes, bond_fits, fit_quality = [], [], [], []
-    for dt, out in results.items():
-        c = out["curve"].copy()
-        if "T" in c.columns:
-            c = c.rename(columns={"T": "t"})
-        c["date"] = pd.to_datetime(dt)
-        curves.append(c)
-
-        n = out["nodes"].copy()
-        n["date"] = pd.to_datetime(dt)
-        nodes.append(n)
-
-        b = out["bonds"].copy()
-        b["date"] = pd.to_datetime(dt)
-        bond_fits.append(b)
-
-        fit_quality.append({
-            "date": pd.to_datetime(dt),
-            "lambda": float(out.get("lambda", np.nan)),
-            "wmae": float(out["wmae"]),
-            "hit_rate": float(out["hit_rate"]),
-        })
-
-    return (
-        pd.concat(curves, ignore_index=True) if curves else pd.DataFrame(),
-        pd.concat(nodes, ignore_index=True) if nodes else pd.DataFrame(),
-        pd.concat(bond_fits, ignore_index=True) if bond_fits else pd.DataFrame(),
-        pd.DataFrame(fit_quality).sort_values("date") if fit_quality else pd.DataFrame(),
+    return cfu.collect_results(results, quality_keys=("lambda",))
+
+
+def _stream_keep(out):
+    """What a streamed in-sample date keeps: its parameters for out-of-sample pricing and
+    its curve parameter table row."""
+    return {"beta_hat": out["beta_hat"], "knots": out["knots"], "lambda": out["lambda"],
+            "curve_params": curve_store.curve_params(out, "fisher")}
+
+
+def _fit_state(results, in_hashes, oos_hashes):
+    """Per-date input hashes and fitted parameters used by incremental runs."""
+    dates = list(results)
+    return cfu.fit_state(dates, in_hashes, oos_hashes).assign(
+        beta_hat=[np.asarray(results[dt]["beta_hat"], float) for dt in dates],
+        knots=[np.asarray(results[dt]["knots"], float) for dt in dates],
+        **{"lambda": [float(results[dt]["lambda"]) for dt in dates]},
     )
 
 
-def main(start_date=None, end_date=None, output_prefix="", node_ratio=3):
-    df = cfu.load_tidy_CRSP_treasury(DATA_DIR)
+def main(start_date=None, end_date=None, output_prefix="", node_ratio=3, n_jobs=1, chunk_size=cfu.DATE_CHUNK_SIZE,
+         incremental=False, stream=False, curve_points=True):
+    # the curve parameter table is always written; curve_points=False skips the dense curve parquet
+    if stream and (incremental or n_jobs != 1):
+        raise ValueError("stream=True fits dates serially and cannot be combined with incremental or n_jobs")
+
+    # only the requested date range is read (defaults match filter_waggoner_treasury_data)
+    df = cfu.load_tidy_CRSP_treasury(
+        DATA_DIR,
+        start_date if start_date is not None else cfu.START_DATE,
+        end_date if end_date is not None else cfu.END_DATE,
+    )
     filter_kwargs = {}
     if start_date is not None:
         filter_kwargs["start_date"] = start_date
@@ -67,34 +79,124 @@ def main(start_date=None, end_date=None, output_prefix="", node_ratio=3):
         filter_kwargs["end_date"] = end_date
     df_filtered = cfu.filter_waggoner_treasury_data(df, **filter_kwargs)
     in_sample, out_of_sample = cfu.split_in_out_sample_data(df_filtered)
+    cashflow_cache = cfu.load_cashflow_cache(df_filtered, DATA_DIR)
 
     p = output_prefix
+    paths = {
+        "curves": DATA_DIR / f"{p}fisher_forward_curve.parquet",
+        "params": DATA_DIR / f"{p}{curve_store.PARAMS_FILES['fisher']}",
+        "bonds": DATA_DIR / f"{p}fisher_bond_fits.parquet",
+        "fit_quality": DATA_DIR / f"{p}fisher_fit_quality_by_date.csv",
+        "oos_bonds": DATA_DIR / f"{p}fisher_oos_bond_fits.parquet",
+        "state": DATA_DIR / f"{p}fisher_fit_state.parquet",
+    }
+    if not curve_points:
+        del paths["curves"]
+
+    state, beta_warmstart = None, None
+    if incremental:
+        in_hashes = cfu.date_input_hashes(in_sample)
+        oos_hashes = cfu.date_input_hashes(out_of_sample)
+        if all(path.exists() for path in paths.values()):
+            state = pd.read_parquet(paths["state"])
+            refit, removed = cfu.stale_dates(state, in_hashes, oos_hashes)
+            kept = state.loc[~state["date"].isin(refit.union(removed))]
+            earlier = kept.loc[kept["date"] < refit.min()] if len(refit) else kept.iloc[:0]
+            if not earlier.empty:
+                beta_warmstart = np.asarray(earlier["beta_hat"].iloc[-1], float)
+            print(f"Incremental Fisher run: {len(refit)} new/changed dates, {len(removed)} removed.")
+            in_sample = in_sample.loc[in_sample["date"].isin(refit)]
+            out_of_sample = out_of_sample.loc[out_of_sample["date"].isin(refit)]
+
+    if stream:
+        # curves and bond fits go to disk one batch of dates at a time; only fit quality,
+        # error-metric columns and the fitted parameters are kept for the whole history
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        print("Running Fisher in-sample (streaming)...")
+        # same warm-start chunks as run_fisher, so streamed fits match the in-memory run
+        chunks = cfu.date_chunks(in_sample["date"].unique(), chunk_size)
+        starts = np.cumsum([0] + [len(c) for c in chunks[:-1]])
+        in_sample_fits = chain.from_iterable(
+            fisher.iter_fisher(cfu.iter_date_slices(in_sample, c), node_ratio=node_ratio,
+                               cashflow_cache=cashflow_cache, start_idx=start)
+            for c, start in zip(chunks, starts)
+        )
+        stream_paths = {name: paths[name] for name in ("curves", "bonds") if name in paths}
+        fit_quality_df, bonds_df, params = cfu.stream_results(in_sample_fits, stream_paths, _stream_keep,
+                                                              quality_keys=("lambda",))
+        params_df = curve_store.params_frame({dt: kept["curve_params"] for dt, kept in params.items()})
+
+        print("Running Fisher out-of-sample (streaming)...")
+        oos_fits = fisher.iter_fisher(cfu.iter_date_slices(out_of_sample), pre_trained_results=params,
+                                      cashflow_cache=cashflow_cache)
+        _, oos_bonds_df, _ = cfu.stream_results(oos_fits, {"bonds": paths["oos_bonds"]}, lambda out: None,
+                                                quality_keys=("lambda",))
+
+        err_df = cfu.get_full_error_metrics(bonds_df).reset_index().rename(columns={"index": "bucket"})
+        oos_err_df = cfu.get_full_error_metrics(oos_bonds_df).reset_index().rename(columns={"index": "bucket"})
+        cfu.write_atomic(params_df, paths["params"])
+        cfu.write_atomic(fit_quality_df, paths["fit_quality"])
+        cfu.write_atomic(err_df, DATA_DIR / f"{p}fisher_error_metrics.csv")
+        cfu.write_atomic(oos_err_df, DATA_DIR / f"{p}fisher_oos_error_metrics.csv")
+        print("Wrote Fisher outputs to:", DATA_DIR.resolve())
+        return
 
     # --- In-sample ---
     print("Running Fisher in-sample...")
-    in_sample_results = fisher.run_fisher(in_sample, node_ratio=node_ratio)
+    in_sample_results = {}
+    if not in_sample.empty:
+        in_sample_results = fisher.run_fisher(in_sample, node_ratio=node_ratio, cashflow_cache=cashflow_cache,
+                                              n_jobs=n_jobs, chunk_size=chunk_size,
+                                              beta_warmstart=beta_warmstart)
 
     curves_df, _, bonds_df, fit_quality_df = _collect_results(in_sample_results)
-    err_df = cfu.get_full_error_metrics(in_sample_results).reset_index().rename(columns={"index": "bucket"})
-
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    curves_df.to_parquet(DATA_DIR / f"{p}fisher_forward_curve.parquet", index=False)
-    bonds_df.to_parquet(DATA_DIR / f"{p}fisher_bond_fits.parquet", index=False)
-    fit_quality_df.to_csv(DATA_DIR / f"{p}fisher_fit_quality_by_date.csv", index=False)
-    err_df.to_csv(DATA_DIR / f"{p}fisher_error_metrics.csv", index=False)
+    params_df = curve_store.curve_params_table(in_sample_results, "fisher")
 
     # --- Out-of-sample ---
     print("Running Fisher out-of-sample...")
-    oos_results = fisher.run_fisher(out_of_sample, pre_trained_results=in_sample_results)
+    oos_results = {}
+    if not out_of_sample.empty:
+        oos_results = fisher.run_fisher(out_of_sample, pre_trained_results=in_sample_results,
+                                        cashflow_cache=cashflow_cache, n_jobs=n_jobs, chunk_size=chunk_size)
 
     _, _, oos_bonds_df, _ = _collect_results(oos_results)
-    oos_err_df = cfu.get_full_error_metrics(oos_results).reset_index().rename(columns={"index": "bucket"})
 
-    oos_bonds_df.to_parquet(DATA_DIR / f"{p}fisher_oos_bond_fits.parquet", index=False)
-    oos_err_df.to_csv(DATA_DIR / f"{p}fisher_oos_error_metrics.csv", index=False)
+    if incremental:
+        new_state = _fit_state(in_sample_results, in_hashes, oos_hashes)
+        if state is not None:
+            dates = refit.union(removed)
+            if curve_points:
+                curves_df = cfu.replace_dates(pd.read_parquet(paths["curves"]), curves_df, dates)
+            params_df = cfu.replace_dates(pd.read_parquet(paths["params"]), params_df, dates)
+            bonds_df = cfu.replace_dates(pd.read_parquet(paths["bonds"]), bonds_df, dates)
+            fit_quality_df = cfu.replace_dates(
+                pd.read_csv(paths["fit_quality"], parse_dates=["date"]), fit_quality_df, dates)
+            oos_bonds_df = cfu.replace_dates(pd.read_parquet(paths["oos_bonds"]), oos_bonds_df, dates)
+            new_state = cfu.replace_dates(state, new_state, dates)
+        err_df = cfu.get_full_error_metrics(bonds_df)
+        oos_err_df = cfu.get_full_error_metrics(oos_bonds_df)
+    else:
+        err_df = cfu.get_full_error_metrics(in_sample_results)
+        oos_err_df = cfu.get_full_error_metrics(oos_results)
+    err_df = err_df.reset_index().rename(columns={"index": "bucket"})
+    oos_err_df = oos_err_df.reset_index().rename(columns={"index": "bucket"})
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    if curve_points:
+        cfu.write_atomic(curves_df, paths["curves"])
+    cfu.write_atomic(params_df, paths["params"])
+    cfu.write_atomic(bonds_df, paths["bonds"])
+    cfu.write_atomic(fit_quality_df, paths["fit_quality"])
+    cfu.write_atomic(err_df, DATA_DIR / f"{p}fisher_error_metrics.csv")
+    cfu.write_atomic(oos_bonds_df, paths["oos_bonds"])
+    cfu.write_atomic(oos_err_df, DATA_DIR / f"{p}fisher_oos_error_metrics.csv")
+    if incremental:
+        # written last: if anything above fails, the next run refits the same dates
+        cfu.write_atomic(new_state, paths["state"])
 
     print("Wrote Fisher outputs to:", DATA_DIR.resolve())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # the pipeline reads curves from the parameter table (curve_store.load_method_curves)
+    main(curve_points=False)
@@ -0,0 +1,80 @@
+"""
+Runs the Gurkaynak, Sack, and Wright (2006) Nelson-Siegel-Svensson fit on every CRSP
+quote date and saves the parameter time series for comparison with the Fed's published curve
+
+Inputs:
+  - DATA_DIR/TFZ_with_runness.parquet   (produced by pull_CRSP_treasury.py)
+
+Outputs:
+  - DATA_DIR/gsw_yield_curve_all.parquet   (same layout as fed_yield_curve_all.parquet:
+        "Date" index, BETA0-BETA3 and SVENY01-SVENY30 in percent, TAU1 and TAU2 in years)
+  - DATA_DIR/gsw_fit_quality_by_date.csv
+"""
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from settings import config
+import curve_fitting_utils as cfu
+import gsw2006_yield_curve as gsw
+
+DATA_DIR = Path(config("DATA_DIR"))
+OUTPUT_DIR = Path(config("OUTPUT_DIR"))
+
+SVENY_MATURITIES = np.arange(1, 31)
+
+
+def load_gsw_quotes(data_dir=DATA_DIR):
+    """CRSP quotes with the column names used by gsw2006_yield_curve (caldt, tdduratn in years)."""
+    df = pd.read_parquet(Path(data_dir) / "TFZ_with_runness.parquet")
+    df = df.rename(columns={"mcaldt": "caldt"})
+    df["tdduratn"] = df["tmduratn"] / 365.25   # CRSP durations are in days
+    return df.dropna(subset=["price", "tdduratn"]).loc[lambda d: d["tdduratn"] > 0]
+
+
+def _collect_results(results):
+    """Parameter time series in the Fed's fed_yield_curve_all layout, and fit quality by date."""
+    dates = pd.DatetimeIndex(sorted(results), name="Date")
+    params = np.array([results[dt]["params"] for dt in dates], dtype=float).reshape(len(dates), 6)
+
+    curve = pd.DataFrame(index=dates)
+    for i in range(4):
+        curve[f"BETA{i}"] = params[:, 2 + i] * 100
+    _, spot, _ = gsw.nss_curves(params, SVENY_MATURITIES)
+    for j, t in enumerate(SVENY_MATURITIES):
+        curve[f"SVENY{t:02d}"] = spot[:, j] * 100
+    curve["TAU1"] = params[:, 0]
+    curve["TAU2"] = params[:, 1]
+
+    fit_quality = pd.DataFrame({
+        "date": dates,
+        "mse": [float(results[dt]["mse"]) for dt in dates],
+        "n_securities": [int(results[dt]["n_securities"]) for dt in dates],
+        "multi_start": [bool(results[dt]["multi_start"]) for dt in dates],
+        "fit_failed": [bool(results[dt]["fit_failed"]) for dt in dates],
+    })
+    return curve, fit_quality
+
+
+def main(start_date=None, end_date=None, output_prefix="", n_jobs=1, chunk_size=cfu.DATE_CHUNK_SIZE):
+    """Run the module's main workflow."""
+    df = gsw.gurkaynak_sack_wright_filters(load_gsw_quotes(DATA_DIR))
+    if start_date is not None:
+        df = df.loc[df["caldt"] >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        df = df.loc[df["caldt"] <= pd.Timestamp(end_date)]
+
+    p = output_prefix
+
+    print("Running GSW...")
+    results = gsw.run_gsw(df, n_jobs=n_jobs, chunk_size=chunk_size)
+    curve_df, fit_quality_df = _collect_results(results)
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    curve_df.to_parquet(DATA_DIR / f"{p}gsw_yield_curve_all.parquet")
+    fit_quality_df.to_csv(DATA_DIR / f"{p}gsw_fit_quality_by_date.csv", index=False)
+
+    print("Wrote GSW outputs to:", DATA_DIR.resolve())
+
+
+if __name__ == "__main__":
+    main()
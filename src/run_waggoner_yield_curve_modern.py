@@ -6,10 +6,13 @@ Inputs:
   - DATA_DIR/tidy_CRSP_treasury.parquet   (produced by tidy_CRSP_treasury.py)
 
 Outputs (in-sample):
-  - DATA_DIR/modern_waggoner_forward_curve.parquet
+  - DATA_DIR/modern_waggoner_curve_params.parquet
+  - DATA_DIR/modern_waggoner_bond_fits.parquet
+  - DATA_DIR/modern_waggoner_fit_quality_by_date.csv
   - DATA_DIR/modern_waggoner_error_metrics.csv
 
 Outputs (out-of-sample):
+  - DATA_DIR/modern_waggoner_oos_bond_fits.parquet
   - DATA_DIR/modern_waggoner_oos_error_metrics.csv
 """
 from pathlib import Path
@@ -21,7 +24,7 @@ from run_waggoner_yield_curve import main
 DATA_DIR = Path(config("DATA_DIR"))
 
 if __name__ == "__main__":
-    df = cfu.load_tidy_CRSP_treasury(DATA_DIR)
+    df = cfu.load_tidy_CRSP_treasury(DATA_DIR, columns=["date"])
     end_date = df["date"].max()
     start_date = end_date - DateOffset(years=20)
-    main(start_date=start_date, end_date=end_date, output_prefix="modern_", node_ratio=6)
+    main(start_date=start_date, end_date=end_date, output_prefix="modern_", node_ratio=6, curve_points=False)
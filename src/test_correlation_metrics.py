@@ -7,15 +7,23 @@ Tests:
 - _pairwise_matrix: constructs a symmetric pairwise correlation matrix with
   ones on the diagonal.
 - select_representative_dates: returns low/median/high representative dates.
-- _gsw_spot: returns finite values with the expected shape for valid params.
+- GSWParamStore: scalar and vectorized as-of lookups agree with a boolean-mask
+  search over the normalized table.
+- compute_correlation_metrics / compute_method_pairwise_correlations: the dense
+  resample-and-dot-product engine matches per-cell _interp and _safe_corr.
+- build_common_curves / load_common_curves: the memory-mapped store round-trips the
+  resampled curves and gives the same correlations as the long curve frames.
+- build_gsw_curves: as-of parameter lookup on the cached Fed table, percent betas
+  rescaled, and rows matching the single-date builder.
 """
 
 import numpy as np
 import pandas as pd
 import pytest
 
+import correlation_metrics as cm
+import gsw2006_yield_curve as gsw
 from correlation_metrics import (
-    _gsw_spot,
     _pairwise_matrix,
     _safe_corr,
     select_representative_dates,
@@ -90,12 +98,144 @@ def test_select_representative_dates_returns_expected_labels():
     assert out.loc[out["label"] == "high_corr", "overall_corr"].iloc[0] == pytest.approx(0.95)
 
 
-def test_gsw_spot_returns_finite_values_with_expected_shape():
-    """_gsw_spot should return a finite vector of the same length as input maturities."""
-    maturities = np.array([0.25, 1.0, 5.0, 10.0, 30.0])
-    params = (1.5, 4.0, 0.02, -0.01, 0.005, -0.002)
-
-    spot = _gsw_spot(maturities, params)
+def test_build_gsw_curves_uses_asof_params_from_cached_table(tmp_path):
+    """Curves for many dates should use the last parameters on/before each date, read once."""
+    fed = pd.DataFrame(
+        {
+            "TAU1": [1.5, np.nan, 2.0],
+            "TAU2": [4.0, 5.0, 9.0],
+            "BETA0": [2.0, 3.0, 4.0],
+            "BETA1": [-1.0, -1.0, -2.0],
+            "BETA2": [0.5, 0.5, 1.0],
+            "BETA3": [-0.2, -0.2, 0.3],
+        },
+        index=pd.DatetimeIndex(["2020-01-02", "2020-01-03", "2020-01-06"], name="Date"),
+    )
+    fed.to_parquet(tmp_path / "fed_yield_curve_all.parquet")
+    t_grid = np.linspace(0.0, 30.0, 61)
+    dates = pd.to_datetime(["2020-01-02", "2020-01-04", "2020-01-07"])
+
+    actual, curves = cm.build_gsw_curves(dates, t_grid, data_dir=tmp_path)
+    # the Jan 3 row has a missing TAU1, so Jan 4 falls back to Jan 2
+    assert list(actual) == list(pd.to_datetime(["2020-01-02", "2020-01-02", "2020-01-06"]))
+    np.testing.assert_allclose(curves["spot_cc"][2, 1:], gsw.spot(t_grid[1:], np.array([2.0, 9.0, 0.04, -0.02, 0.01, 0.003])))
+
+    (tmp_path / "fed_yield_curve_all.parquet").unlink()
+    actual_date, single = cm.build_gsw_curve_for_date("2020-01-07", t_grid, data_dir=tmp_path)
+    assert actual_date == pd.Timestamp("2020-01-06")
+    for curve_type in cm.CURVE_TYPES:
+        np.testing.assert_array_equal(single[curve_type].to_numpy(), curves[curve_type][2])
+
+    with pytest.raises(ValueError):
+        cm.build_gsw_curves(["2019-12-31"], t_grid, data_dir=tmp_path)
+
+
+def test_gsw_param_store_asof_matches_mask_lookup():
+    """searchsorted lookups should pick the same rows as filtering index <= date."""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2000-01-03", periods=300)[rng.permutation(300)]
+    fed = pd.DataFrame(rng.uniform(0.5, 5.0, (300, 6)), columns=cm.GSW_PARAM_COLS, index=dates)
+    fed.iloc[rng.choice(300, 30, replace=False), 0] = np.nan
+    fed.index = fed.index + pd.Timedelta(hours=12)
+    store = cm.GSWParamStore(fed)
+
+    valid = fed.dropna().set_axis(fed.dropna().index.normalize()).sort_index()
+    assert len(store) == len(valid)
+    queries = pd.to_datetime("2000-01-03") + pd.to_timedelta(rng.integers(0, 450, 50), unit="D")
+    actual, params = store.asof_many(queries)
+    for q, a, p in zip(queries, actual, params):
+        expected_date = valid.index[valid.index <= q][-1]
+        assert a == expected_date
+        np.testing.assert_allclose(p[:2], valid.loc[expected_date].to_numpy()[:2])
+        scalar_date, scalar_params = store.asof(q)
+        assert scalar_date == a
+        np.testing.assert_array_equal(scalar_params, p)
+
+    with pytest.raises(ValueError):
+        store.asof("1999-12-31")
+
+
+def _method_curves(dates, seed=0):
+    """Long-format curves for every method on its own ragged, unsorted maturity grid."""
+    rng = np.random.default_rng(seed)
+    curves = {}
+    for i, method in enumerate(cm.METHOD_FILE_MAP):
+        frames = []
+        for d in dates:
+            T = rng.uniform(0.0, 32.0, 20 + 5 * i)
+            f = 0.03 + 0.01 * np.sin(T / 5 + rng.normal()) + rng.normal(0, 1e-3, T.size)
+            frames.append(pd.DataFrame({"date": d, "T": T, "discount": np.exp(-f * T),
+                                        "spot_cc": f, "forward_instant_cc": f + 0.001 * T}))
+        curves[method] = pd.concat(frames, ignore_index=True)
+    # a flat curve and a curve with too few valid points give NaN correlations
+    fisher = curves["fisher"]
+    fisher.loc[fisher["date"] == dates[1], "forward_instant_cc"] = 0.02
+    fisher.loc[(fisher["date"] == dates[2]) & (fisher["T"] > 1.0), "spot_cc"] = np.nan
+    return curves
+
+
+def test_correlation_engine_matches_per_cell_loop(tmp_path):
+    """Every detail correlation should equal _safe_corr of the _interp-resampled curves."""
+    dates = pd.to_datetime(["2020-01-31", "2020-02-28", "2020-03-31", "2020-04-30"])
+    fed = pd.DataFrame(
+        [[1.5, 9.0, 3.0, -1.0, 0.5, 1.0]] * 4, columns=cm.GSW_PARAM_COLS, index=dates - pd.Timedelta(days=1)
+    )
+    fed.to_parquet(tmp_path / "fed_yield_curve_all.parquet")
+    curves = _method_curves(dates)
+    t_grid = np.linspace(0.25, 30.0, 240)
+
+    detail, summary, _ = cm.compute_correlation_metrics(curves, t_grid=t_grid, data_dir=tmp_path)
+    _, gsw_curves = cm.build_gsw_curves(dates, t_grid, data_dir=tmp_path)
+    assert len(detail) == len(dates) * len(cm.METHOD_FILE_MAP) * len(cm.CURVE_TYPES)
+    assert detail["correlation"].isna().any()
+    for row in detail.itertuples():
+        d = dates.get_loc(row.date)
+        m_curve = curves[row.method].loc[curves[row.method]["date"] == row.date]
+        expected = _safe_corr(cm._interp(m_curve, t_grid, row.curve_type), gsw_curves[row.curve_type][d])
+        np.testing.assert_allclose(row.correlation, expected, rtol=1e-12, atol=1e-14)
+    assert set(summary["date"]) == set(dates)
+
+    pair_detail, overall = cm.compute_method_pairwise_correlations(curves, t_grid=t_grid, data_dir=tmp_path)
+    assert len(pair_detail) == len(dates) * 3 * len(cm.METHOD_PAIR_CURVE_TYPES)
+    for row in pair_detail.itertuples():
+        c1 = curves[row.method_1].loc[curves[row.method_1]["date"] == row.date]
+        c2 = curves[row.method_2].loc[curves[row.method_2]["date"] == row.date]
+        expected = _safe_corr(cm._interp(c1, t_grid, row.curve_type), cm._interp(c2, t_grid, row.curve_type))
+        np.testing.assert_allclose(row.correlation, expected, rtol=1e-12, atol=1e-14)
+    assert len(overall) == 3 * len(cm.METHOD_PAIR_CURVE_TYPES)
+
+
+def test_common_curve_store_round_trip_gives_same_correlations(tmp_path):
+    """Correlations from the memory-mapped store should equal those from the raw frames."""
+    import build_common_curves as bcc
+
+    dates = pd.to_datetime(["2020-01-31", "2020-02-28", "2020-03-31"])
+    fed = pd.DataFrame(
+        [[1.5, 9.0, 3.0, -1.0, 0.5, 1.0]] * 2, columns=cm.GSW_PARAM_COLS,
+        index=pd.to_datetime(["2020-01-30", "2020-03-02"]),
+    )
+    fed.to_parquet(tmp_path / "fed_yield_curve_all.parquet")
+    curves = _method_curves(dates, seed=3)
+
+    common = bcc.build_common_curves(curves, data_dir=tmp_path)
+    bcc.write_common_curves(common, tmp_path / cm.COMMON_CURVES_FILE)
+    store = cm.load_common_curves(tmp_path)
+
+    assert list(store) == [*cm.METHOD_FILE_MAP, "gsw"]
+    assert list(store["gsw"]["asof_date"]) == list(pd.to_datetime(["2020-01-30", "2020-01-30", "2020-03-02"]))
+    for source, (_, _, arr) in common.items():
+        for c, curve_type in enumerate(cm.CURVE_TYPES):
+            np.testing.assert_array_equal(store[source][curve_type], arr[:, c])
+            assert not store[source][curve_type].flags.writeable
+
+    expected = cm.compute_correlation_metrics(curves, data_dir=tmp_path)
+    got = cm.compute_correlation_metrics(data_dir=tmp_path)
+    for e, g in zip(expected, got):
+        pd.testing.assert_frame_equal(e, g)
+    pd.testing.assert_frame_equal(
+        cm.compute_method_pairwise_correlations(curves, data_dir=tmp_path)[0],
+        cm.compute_method_pairwise_correlations(data_dir=tmp_path)[0],
+    )
 
-    assert spot.shape == maturities.shape
-    assert np.isfinite(spot).all()
+    frames = cm.common_curve_frames(store, sources=["mcc"])
+    assert len(frames["mcc"]) == len(dates) * len(cm.COMMON_T_GRID)
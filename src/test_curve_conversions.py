@@ -0,0 +1,60 @@
+"""
+Unit tests for the curve conversions in curve_conversions.py.
+
+Tests:
+- add_spot_and_forwards_panel: one pass over a long (date, T) frame gives the same
+    spot, simple spot, instantaneous and discrete forwards as add_spot_and_forwards
+    date by date, including T = 0 rows and two-point curves.
+- convert_panel(forward=...): the segment-restarting trapezoid discount curve matches
+    a per-date cumulative integral.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import curve_conversions as cc
+
+
+def _panel(seed=0):
+    """Long frame of discount curves on ragged maturity grids, sorted by (date, T)."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for k, d in enumerate(pd.bdate_range("2020-01-01", periods=12, freq="BME")):
+        n = {3: 2, 4: 3}.get(k, 40)
+        T = np.sort(rng.uniform(0.1, 30.0, n))
+        if k % 5 == 0:
+            T[0] = 0.0
+        if k == 7:
+            T = np.linspace(0.0, 30.0, n)
+        f = 0.03 + 0.01 * np.sin(T / 5 + rng.normal())
+        frames.append(pd.DataFrame({"date": d, "T": T, "discount": np.exp(-f * T), "forward": f}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_panel_conversions_match_per_date_wrapper():
+    """Every panel column should equal add_spot_and_forwards applied to each date."""
+    panel = _panel()
+    out = cc.add_spot_and_forwards_panel(panel, dt=0.5, t_col="T", d_col="discount")
+
+    cols = ["spot_cc", "spot_simple", "forward_instant_cc", "forward_0.5y_cc"]
+    for d, grp in panel.groupby("date"):
+        expected = cc.add_spot_and_forwards(grp, dt=0.5, t_col="T", d_col="discount")
+        got = out.loc[out["date"] == d, cols].reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, expected[cols], check_exact=False, rtol=1e-12, atol=1e-14)
+
+
+def test_panel_discount_from_forwards_restarts_each_date():
+    """The forward-rate input should integrate from zero at the start of every date."""
+    panel = _panel(seed=1)
+    starts, lengths = cc.curve_segments(panel["date"].to_numpy())
+    out = cc.convert_panel(panel["T"], panel["date"], 0.25, forward=panel["forward"])
+
+    for s, n in zip(starts, lengths):
+        t = panel["T"].to_numpy()[s:s + n]
+        f = panel["forward"].to_numpy()[s:s + n]
+        integral = np.concatenate([[0.0], np.cumsum(0.5 * (f[1:] + f[:-1]) * np.diff(t))])
+        np.testing.assert_array_equal(out["discount"][s:s + n], np.exp(-integral))
+    np.testing.assert_array_equal(out["forward_instant_cc"], panel["forward"].to_numpy())
+
+    with pytest.raises(ValueError):
+        cc.convert_panel(panel["T"][::-1], panel["date"][::-1], 0.25, forward=panel["forward"][::-1])
@@ -4,21 +4,46 @@ Unit tests for curve fitting utility helpers used in the treasury pipeline
 
 Tests:
 - split_in_out_sample_data: Ensures the longest-maturity bond in each date 
-    bucket is assigned to in-sample
+    bucket is assigned to in-sample, and the split matches the groupby.apply reference
 - get_cashflows_from_bonds: Validates cashflow extraction for zero-coupon 
     and short-stub bonds, including correct timing and amounts
+- build_cashflow_arrays: Checks the vectorized engine matches the per-bond
+    reference schedules exactly (month-end, February clamping, stubs)
+- load_cashflow_cache: Checks cached lookups match direct computation and the
+    cache is invalidated when the schedule parameters change
+- load_tidy_CRSP_treasury: Checks date-range and column pushdown returns the same
+    rows as filtering in memory
+- iter_date_slices: Checks per-date slices match boolean-mask selection
+- date_chunks: Checks fixed-size chunks, and a single chunk with chunk_size=None
+- write_parquet_stream: Checks batched row-group writes equal a single in-memory write
+- stream_results: Checks the streamed curve/bond tables and fit quality equal the
+    collect_results tables of the same runner results
 - get_full_error_metrics: Checks that WMAE and hit rate are computed correctly 
-    across defined time-to-maturity bins and for the overall sample
+    across defined time-to-maturity bins and for the overall sample, and that the
+    single-pass version matches the per-bucket reference overall and per group
 """
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import pytest
+from pandas.tseries.offsets import DateOffset, MonthEnd
 
+import error_metrics
+import tidy_CRSP_treasury
 from curve_fitting_utils import (
+    DATE_CHUNK_SIZE,
+    build_cashflow_arrays,
+    collect_results,
+    date_chunks,
     get_cashflows_from_bonds,
+    iter_date_slices,
+    load_cashflow_cache,
+    load_tidy_CRSP_treasury,
     get_full_error_metrics,
     split_in_out_sample_data,
+    stream_results,
+    write_parquet_stream,
 )
 
 
@@ -63,6 +88,68 @@ def test_split_in_out_sample_keeps_longest_maturity_in_sample_for_each_date():
     assert set(in_sample["cusip"]).isdisjoint(set(out_of_sample["cusip"]))
 
 
+def _split_in_out_sample_data_apply(treasury_filtered):
+    """Reference: split_in_out_sample_data as originally written (per-month
+    groupby.apply), copied verbatim."""
+    # 1) Sort so cumcount follows maturity order within each month
+    treasury_filtered = treasury_filtered.sort_values(["date", "maturity_date"])
+
+    # 2) Rank within month by maturity (0,1,2,...)
+    treasury_filtered["maturity_rank_in_month"] = treasury_filtered.groupby("date").cumcount()
+
+    # 3) Every other security -> parity of the rank
+    treasury_filtered["group"] = (treasury_filtered["maturity_rank_in_month"] % 2)  # 0 or 1
+
+    # Ensure longest maturity each month ends up in the in-sample group
+    def enforce_longest_in_sample(group):
+        """
+        Ensure the longest-maturity security is in group 0.
+        If not, flip the entire month's assignment.
+        """
+        # Longest maturity = last row (already sorted ascending)
+        if group.iloc[-1]["group"] == 1:
+            group["group"] = 1 - group["group"]
+        return group
+
+    treasury_filtered = treasury_filtered.groupby("date", group_keys=False).apply(enforce_longest_in_sample)
+
+    # Create in-sample indicator
+    treasury_filtered["is_in_sample"] = treasury_filtered["group"] == 0
+
+    # Build dataframes of in-sample and out-of-sample data
+    in_sample = treasury_filtered.loc[
+        treasury_filtered.is_in_sample].drop(
+            ["maturity_rank_in_month",
+             "group",
+             "is_in_sample"],
+            axis=1)
+    out_of_sample = treasury_filtered.loc[
+        ~treasury_filtered.is_in_sample].drop(
+            ["maturity_rank_in_month",
+             "group",
+             "is_in_sample"],
+            axis=1)
+
+    return in_sample, out_of_sample
+
+
+# the verbatim reference still calls groupby.apply on the grouping column
+@pytest.mark.filterwarnings("ignore:DataFrameGroupBy.apply operated on the grouping columns")
+def test_split_in_out_sample_matches_groupby_apply_reference():
+    """The vectorized split should return exactly the reference split, including maturity ties."""
+    rng = np.random.default_rng(0)
+    dates = np.repeat(pd.date_range("1990-01-31", periods=24, freq="ME"), rng.integers(1, 30, 24))
+    data = pd.DataFrame({
+        "date": dates,
+        "cusip": np.arange(len(dates)).astype(str),
+        "maturity_date": dates + pd.to_timedelta(rng.integers(1, 20, len(dates)) * 365, unit="D"),
+        "mid_price": rng.uniform(90, 110, len(dates)),
+    }).sample(frac=1.0, random_state=0)
+
+    for got, expected in zip(split_in_out_sample_data(data), _split_in_out_sample_data_apply(data)):
+        pd.testing.assert_frame_equal(got, expected)
+
+
 def test_get_cashflows_from_zero_coupon_returns_single_face_payment():
     """A zero-coupon bond should return one cashflow equal to face value at maturity."""
     bonds = pd.DataFrame(
@@ -104,6 +191,224 @@ def test_get_cashflows_infers_missing_first_coupon_and_applies_stub_adjustment()
     assert cashflows[0][0] < coupon_amt
 
 
+def _get_cashflows_from_bonds_iterrows(bonds, face=100, freq=2, stub_tol_days=3):
+    """Reference per-bond (iterrows) implementation of get_cashflows_from_bonds."""
+    cashflows, times = [], []
+
+    months = int(12 / freq)
+
+    for _, row in bonds.iterrows():
+        settle = row["date"]
+        maturity_date = row["maturity_date"]
+        first_coupon = row.get("first_coupon_date", pd.NaT) #account for missing first_coupon_date (treat as NaT, which will be handled as regular schedule)
+        cpn_rate = row["coupon"] / 100.0
+        coupon_amt = face * cpn_rate / freq
+
+        # Infer first_coupon_date if missing for coupon bonds
+        if coupon_amt > 0 and pd.isna(first_coupon):
+            month_end = (maturity_date == maturity_date + MonthEnd(0))
+            d = maturity_date
+            while d > settle:
+                prev = d - DateOffset(months=months)
+                if month_end:
+                    prev = prev + MonthEnd(0)
+                if prev <= settle < d:
+                    first_coupon = d
+                    break
+                d = prev
+            if pd.isna(first_coupon):
+                raise ValueError(f"Could not determine first coupon date for bond with maturity {maturity_date} and settle {settle}")
+
+        if coupon_amt > 0:
+            # build coupon schedule forward from first_coupon
+            month_end = (first_coupon == first_coupon + MonthEnd(0))
+
+            payment_dates = []
+            d = first_coupon
+            while d.to_period("M") <= maturity_date.to_period("M"):
+                if d > settle:
+                    payment_dates.append(d)
+                d = d + DateOffset(months=months) + MonthEnd(0) if month_end else d + DateOffset(months=months)
+
+            payment_dates = pd.to_datetime(payment_dates)
+            
+            # Handle the case of no payment dates
+            if len(payment_dates) == 0:
+                maturity_t = (maturity_date - settle).days / 365.0
+                payment_times = np.array([maturity_t], dtype=float)
+                cf = np.array([coupon_amt + face], dtype=float)
+            else:
+                payment_times = np.array([(dt - settle).days / 365.0 for dt in payment_dates], dtype=float)
+                cf = np.full(payment_times.shape[0], coupon_amt, dtype=float)
+                cf[-1] += face
+
+                # Stub handling
+                first_pay = payment_dates[0]
+                prev_coupon = first_pay - DateOffset(months=months)
+                if month_end:
+                    prev_coupon = prev_coupon + MonthEnd(0)
+
+                regular_days = (first_pay - prev_coupon).days
+
+                issue_date = row.get("issue_date", pd.NaT)
+                accrual_start = max(issue_date, prev_coupon) if pd.notna(issue_date) else prev_coupon
+                stub_days = (first_pay - accrual_start).days
+
+                if abs(stub_days - regular_days) > stub_tol_days and regular_days != 0:
+                    cf[0] = coupon_amt * (stub_days / regular_days)
+
+        else:
+            maturity_t = (maturity_date - settle).days / 365.0
+            payment_times = np.array([maturity_t], dtype=float)
+            cf = np.array([face], dtype=float)
+
+        cashflows.append(cf)
+        times.append(payment_times)
+
+    return cashflows, times
+
+
+def test_build_cashflow_arrays_matches_per_bond_reference():
+    """The vectorized engine should reproduce the per-bond schedules exactly, including month-end rolls and stubs."""
+    bonds = pd.DataFrame(
+        {
+            "date": pd.to_datetime(
+                ["2020-01-15", "2020-01-15", "2019-11-29", "1985-03-29", "1985-03-29", "1985-03-29"]
+            ),
+            "maturity_date": pd.to_datetime(
+                ["2021-01-31", "2025-08-30", "2029-11-15", "1990-02-28", "1986-03-31", "1995-06-30"]
+            ),
+            "coupon": [6.0, 2.5, 1.75, 11.25, 0.0, 8.0],
+            "first_coupon_date": pd.to_datetime([pd.NaT, pd.NaT, "2020-05-15", pd.NaT, pd.NaT, "1985-12-31"]),
+            "issue_date": pd.to_datetime(["2020-01-15", pd.NaT, "2019-11-15", "1985-02-28", pd.NaT, "1985-03-01"]),
+        }
+    )
+
+    expected_cf, expected_t = _get_cashflows_from_bonds_iterrows(bonds)
+    c_all, times_all, bond_idx = build_cashflow_arrays(bonds)
+
+    assert np.array_equal(bond_idx, np.repeat(np.arange(len(bonds)), [len(c) for c in expected_cf]))
+    assert np.array_equal(c_all, np.concatenate(expected_cf))
+    assert np.array_equal(times_all, np.concatenate(expected_t))
+
+
+def test_load_cashflow_cache_round_trips_and_invalidates(tmp_path):
+    """Cached cashflows should match direct computation and be rebuilt when parameters change."""
+    bonds = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2020-01-31", "2020-01-31", "2020-02-29"]),
+            "cusip": ["A", "B", "A"],
+            "maturity_date": pd.to_datetime(["2022-06-30", "2020-12-31", "2022-06-30"]),
+            "coupon": [4.0, 0.0, 4.0],
+        }
+    )
+    bonds.to_parquet(tmp_path / "tidy_CRSP_treasury.parquet", index=False)
+
+    load_cashflow_cache(bonds.iloc[:2], data_dir=tmp_path)
+    cache = load_cashflow_cache(bonds, data_dir=tmp_path)
+    assert (tmp_path / "cashflow_cache.parquet").exists()
+
+    expected_cf, expected_t = get_cashflows_from_bonds(bonds.iloc[::-1])
+    cached_cf, cached_t = get_cashflows_from_bonds(bonds.iloc[::-1], cache=cache)
+    for exp, got in zip(expected_cf + expected_t, cached_cf + cached_t):
+        assert np.array_equal(exp, got)
+
+    rebuilt = load_cashflow_cache(bonds, data_dir=tmp_path, stub_tol_days=5)
+    assert rebuilt["key"] != cache["key"]
+
+
+def _tidy_panel():
+    """Small date-sorted tidy-like panel spanning a year boundary."""
+    dates = pd.date_range("1994-10-31", periods=6, freq="ME")
+    return pd.DataFrame({
+        "date": np.repeat(dates, 3),
+        "cusip": np.tile(["A", "B", "C"], len(dates)),
+        "mid_price": np.arange(18, dtype=float),
+        "is_bill": np.tile([True, False, False], len(dates)),
+    })
+
+
+def test_load_tidy_CRSP_treasury_pushes_down_date_range_and_columns(tmp_path):
+    """Filtered reads of the tidy file should equal the in-memory date/column filter."""
+    tidy = _tidy_panel()
+    tidy_CRSP_treasury.generate_tidy_CRSP_treasury_data(tidy, tmp_path)
+
+    start, end = pd.Timestamp("1994-12-01"), pd.Timestamp("1995-02-28")
+    expected = tidy.loc[(tidy["date"] >= start) & (tidy["date"] <= end)].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(load_tidy_CRSP_treasury(tmp_path), tidy)
+    pd.testing.assert_frame_equal(load_tidy_CRSP_treasury(tmp_path, start, end), expected)
+    pd.testing.assert_frame_equal(
+        load_tidy_CRSP_treasury(tmp_path, start, end, columns=["date", "mid_price"]),
+        expected[["date", "mid_price"]],
+    )
+
+
+def test_iter_date_slices_matches_boolean_masks():
+    """Slices should hold exactly the rows a per-date boolean mask selects, in the same order."""
+    sample = _tidy_panel().sample(frac=1.0, random_state=0)
+
+    slices = list(iter_date_slices(sample))
+    assert [d for d, _ in slices] == list(sample["date"].unique())
+    for date, rows in slices:
+        pd.testing.assert_frame_equal(rows, sample.loc[sample["date"] == date])
+
+    missing = pd.Timestamp("2001-01-31")
+    (date, rows), = iter_date_slices(sample, [missing])
+    assert date == missing and rows.empty
+
+
+def test_date_chunks_uses_a_fixed_chunk_size():
+    """Chunks have chunk_size dates (DATE_CHUNK_SIZE by default); None gives one chunk."""
+    dates = np.arange(30)
+    assert [list(c) for c in date_chunks(dates[:10], 4)] == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert [len(c) for c in date_chunks(dates)] == [DATE_CHUNK_SIZE, DATE_CHUNK_SIZE, 30 - 2 * DATE_CHUNK_SIZE]
+    assert [len(c) for c in date_chunks(dates, None)] == [30]
+    with pytest.raises(ValueError):
+        date_chunks(dates, 0)
+
+
+def test_write_parquet_stream_matches_single_write(tmp_path):
+    """Row-group batched writes should read back as the concatenated per-date frames."""
+    sample = _tidy_panel()
+    path, empty_path = tmp_path / "stream.parquet", tmp_path / "empty.parquet"
+
+    write_parquet_stream(iter_date_slices(sample), lambda _, rows: [rows, rows.iloc[:0]],
+                         [path, empty_path], batch_dates=4)
+
+    assert pq.ParquetFile(path).num_row_groups == 2
+    pd.testing.assert_frame_equal(pd.read_parquet(path), sample)
+    assert pd.read_parquet(empty_path).empty
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_stream_results_matches_collect_results(tmp_path):
+    """Streamed runner tables should equal the in-memory ones, keeping only keep(result) per date."""
+    results = {}
+    for i, dt in enumerate(pd.date_range("2000-01-31", periods=5, freq="ME")):
+        results[dt] = {
+            "curve": pd.DataFrame({"T": [0.5, 1.0], "forward": [0.03 + i, 0.031]}),
+            "nodes": pd.DataFrame({"node_t": [1.0], "node_forward": [0.031]}),
+            "bonds": pd.DataFrame({"cusip": ["A", "B"], "bid": 99.0, "ask": 101.0, "duration": 1.0,
+                                   "model_price": [100.0 + i, 100.5], "ttm": [0.5, 1.0]}),
+            "lambda": 0.1 * i,
+            "wmae": 0.1,
+            "hit_rate": 0.5,
+        }
+    paths = {"curves": tmp_path / "curves.parquet", "bonds": tmp_path / "bonds.parquet"}
+
+    fit_quality, error_rows, kept = stream_results(results.items(), paths, lambda out: out["lambda"],
+                                                   quality_keys=("lambda",))
+
+    curves, _, bonds, expected_quality = collect_results(results, quality_keys=("lambda",))
+    assert "t" in curves.columns and list(expected_quality.columns) == ["date", "lambda", "wmae", "hit_rate"]
+    pd.testing.assert_frame_equal(pd.read_parquet(paths["curves"]), curves)
+    pd.testing.assert_frame_equal(pd.read_parquet(paths["bonds"]), bonds)
+    pd.testing.assert_frame_equal(fit_quality, expected_quality)
+    pd.testing.assert_frame_equal(error_rows, bonds[["date", "cusip", "bid", "ask", "duration", "model_price", "ttm"]])
+    assert kept == {dt: out["lambda"] for dt, out in results.items()}
+
+
 def test_get_full_error_metrics_returns_expected_bin_values_and_labels():
     """Full error-metrics table should compute per-bin and all-sample WMAE and hit rate correctly."""
     bonds_a = pd.DataFrame(
@@ -140,3 +445,85 @@ def test_get_full_error_metrics_returns_expected_bin_values_and_labels():
     assert metrics.loc[">10", "wmae"] == pytest.approx(10.0)
     assert metrics.loc["All", "wmae"] == pytest.approx(2.8)
     assert metrics.loc["All", "hit_rate"] == pytest.approx(0.4)
+
+
+def _get_full_error_metrics_loop(preds):
+    """Reference per-bucket implementation of get_full_error_metrics on a bond-fits DataFrame."""
+    ttm_bins = [(0, 1), (1, 3), (3, 5), (5, 10), (10, np.inf)]
+    wmae_list = []
+    hit_rate_list = []
+
+    for start, stop in ttm_bins:
+        preds_bin = preds.loc[(preds["ttm"] >= start) & (preds["ttm"] < stop)]
+
+        wmae = error_metrics.wmae(
+            preds_bin["model_price"],
+            preds_bin["bid"],
+            preds_bin["ask"],
+            preds_bin["duration"]
+            )
+        wmae_list.append(wmae)
+
+        hit_rate = error_metrics.hit_rate(
+            preds_bin["model_price"],
+            preds_bin["bid"],
+            preds_bin["ask"]
+            )
+        hit_rate_list.append(hit_rate)
+
+    wmae_list.append(
+        error_metrics.wmae(
+            preds["model_price"],
+            preds["bid"],
+            preds["ask"],
+            preds["duration"]
+        ))
+    
+    hit_rate_list.append(
+        error_metrics.hit_rate(
+            preds["model_price"],
+            preds["bid"],
+            preds["ask"]
+        ))
+
+    labels = [f"{start}-{stop}"
+              if stop < np.inf
+              else f">{start}"
+              for start, stop in ttm_bins
+              ] + ["All"]
+
+    return pd.DataFrame({
+        "wmae": wmae_list,
+        "hit_rate": hit_rate_list},
+        index=labels)
+
+
+def test_get_full_error_metrics_matches_per_bucket_loop_overall_and_by_group():
+    """Single-pass bucket sums should match the per-bucket reference, including bucket
+    edges, NaN inputs and rows outside the buckets, and per (method, year) group."""
+    rng = np.random.default_rng(3)
+    n = 3000
+    bonds = pd.DataFrame({
+        "date": rng.choice(pd.date_range("1990-01-31", periods=30, freq="ME"), n),
+        "cusip": [f"C{i}" for i in range(n)],
+        "bid": 99.0 + rng.normal(0, 0.1, n),
+        "ask": 100.0 + rng.normal(0, 0.1, n),
+        "duration": rng.uniform(0.1, 20.0, n),
+        "model_price": 99.5 + rng.normal(0, 1.0, n),
+        "ttm": rng.choice([0.0, 1.0, 3.0, 5.0, 10.0], n) + rng.choice([0.0, 0.7, 20.0], n),
+        "method": rng.choice(["fisher", "mcc"], n),
+    })
+    bonds.loc[::97, "ttm"] = np.nan
+    bonds.loc[::89, "model_price"] = np.nan
+    bonds.loc[5, "ttm"] = -0.5
+
+    pd.testing.assert_frame_equal(get_full_error_metrics(bonds), _get_full_error_metrics_loop(bonds),
+                                  rtol=1e-12)
+
+    panel = get_full_error_metrics(bonds, by=["method", "year"])
+    assert list(panel.columns) == ["method", "year", "bucket", "wmae", "hit_rate"]
+    assert len(panel) == 2 * 3 * 6
+    for (method, year), group in bonds.groupby(["method", bonds["date"].dt.year]):
+        expected = _get_full_error_metrics_loop(group)
+        got = panel.loc[(panel["method"] == method) & (panel["year"] == year)].set_index("bucket")
+        np.testing.assert_allclose(got[["wmae", "hit_rate"]], expected, rtol=1e-12)
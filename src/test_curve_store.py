@@ -0,0 +1,139 @@
+"""
+Unit tests for the coefficient curve store in curve_store.py.
+
+Tests:
+- evaluate_curves: rebuilding curves from a written parameter table reproduces the
+    McCulloch discount_curve and Fisher fisher_curve_points_to_dfs rows, and evaluates
+    on any other grid.
+- CurveEvaluator: queries at (date, maturity) pairs match the stored curve, forwards
+    are the slope of -log D, par yields price a par bond, and curves are built once.
+- write_grid_cache/load_grid_cache: the float32 cache keeps the native grid and the
+    values to float32 precision.
+- correlation_metrics.load_method_curve: common-format curves from the parameter
+    table match those from the dense curve parquet.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation_metrics as cm
+import curve_store
+import fisher1995_yield_curve as fisher
+import mcc1975_yield_curve as mcc
+
+
+def _results(method, n_dates=4, seed=0):
+    """Runner-style results entries with the curve and node frames the fitters produce."""
+    rng = np.random.default_rng(seed)
+    results = {}
+    for dt in pd.date_range("2001-01-31", periods=n_dates, freq="ME"):
+        ttm = np.sort(rng.uniform(0.1, 25.0, 49))
+        if method == "mcc":
+            d, ncoef = mcc.get_nodes(ttm, ttm)
+            beta_hat = np.r_[rng.normal(0.0, 0.002, ncoef - 1), -0.03]   # D(T) ~ 1 - 3% T
+            curve, nodes = mcc.discount_curve(pd.DataFrame({"ttm": ttm}), beta_hat, d, ncoef)
+            results[dt] = {"beta_hat": beta_hat, "curve": curve, "nodes": nodes}
+        else:
+            knots = fisher.bspline_knots_from_nodes(fisher.fisher_nodes_equal_counts(ttm), degree=3)
+            beta_hat = 0.03 + rng.normal(0.0, 0.005, fisher.n_basis_from_knots(knots))
+            curve, nodes = fisher.fisher_curve_points_to_dfs({"beta": beta_hat, "knots": knots, "degree": 3})
+            results[dt] = {"beta_hat": beta_hat, "knots": knots, "lambda": 0.1, "curve": curve, "nodes": nodes}
+    return results
+
+
+@pytest.mark.parametrize("method", ["mcc", "fisher"])
+def test_curves_rebuilt_from_params_match_runner_curves(method, tmp_path):
+    """A written and re-read parameter table should reproduce the dense curve rows."""
+    results = _results(method)
+    curve_store.curve_params_table(results, method).to_parquet(tmp_path / curve_store.PARAMS_FILES[method])
+    params = curve_store.load_curve_params(method, tmp_path)
+
+    _, value_col, t_col = curve_store.CURVE_METHODS[method]
+    expected = pd.concat(
+        [out["curve"].rename(columns={"T": t_col}).assign(date=dt) for dt, out in results.items()],
+        ignore_index=True)
+    rebuilt = curve_store.load_method_curves(method, tmp_path)
+    assert list(rebuilt.columns) == [t_col, value_col, "date"]
+    assert (rebuilt["date"] == expected["date"]).all()
+    np.testing.assert_array_equal(rebuilt[t_col], expected[t_col])
+    np.testing.assert_allclose(rebuilt[value_col], expected[value_col], rtol=1e-12, atol=1e-14)
+
+    # any other grid: one curve per date, NaN outside a spline's domain
+    t_grid = np.array([0.25, 1.0, 7.5, 40.0])
+    on_grid = curve_store.evaluate_curves(params, method, t_grid)
+    assert len(on_grid) == len(results) * len(t_grid)
+    for (dt, out), values in zip(results.items(), on_grid[value_col].to_numpy().reshape(-1, len(t_grid))):
+        row = params.loc[params["date"] == dt].iloc[0]
+        basis = row["d"] if method == "mcc" else row["knots"]
+        np.testing.assert_allclose(values, curve_store.evaluate_curve(method, out["beta_hat"], basis, t_grid))
+    if method == "fisher":
+        assert np.isnan(on_grid[value_col].to_numpy()[3::4]).all()
+
+
+def test_grid_cache_round_trip(tmp_path):
+    """The float32 cache should rebuild the native grid and values to float32 precision."""
+    results = _results("fisher", seed=1)
+    params = curve_store.curve_params_table(results, "fisher")
+    path = tmp_path / curve_store.GRID_CACHE_FILES["fisher"]
+    curve_store.write_grid_cache(params, "fisher", path)
+
+    cached = curve_store.load_grid_cache("fisher", path)
+    full = curve_store.evaluate_curves(params, "fisher")
+    np.testing.assert_array_equal(cached["t"], full["t"])
+    assert (cached["date"] == full["date"]).all()
+    np.testing.assert_allclose(cached["forward"], full["forward"], rtol=1e-6)
+
+
+@pytest.mark.parametrize("method", ["mcc", "fisher"])
+def test_curve_evaluator_answers_date_maturity_queries(method):
+    """Vectorized queries should agree with the stored curve and with each other."""
+    results = _results(method, n_dates=3, seed=2)
+    params = curve_store.curve_params_table(results, method)
+    evaluator = curve_store.CurveEvaluator(params, method, maxsize=8)
+
+    dates = np.repeat(params["date"].to_numpy(), 5)[::-1]
+    T = np.tile([0.0, 0.4, 3.3, 10.0, 19.5], 3)
+    basis_col, value_col, _ = curve_store.CURVE_METHODS[method]
+    stored = np.concatenate([
+        curve_store.evaluate_curve(method, row["beta_hat"], row[basis_col], T[i:i + 5])
+        for i, row in zip(range(0, 15, 5), params.iloc[::-1].to_dict("records"))
+    ])
+    quantity = "discount" if value_col == "discount" else "forward"
+    np.testing.assert_allclose(evaluator.evaluate(dates, T, quantity), stored, rtol=1e-12, atol=1e-14)
+
+    t, h = T + 0.01, 1e-5
+    slope = (np.log(evaluator.discount(dates, t + h)) - np.log(evaluator.discount(dates, t - h))) / (2 * h)
+    np.testing.assert_allclose(evaluator.forward(dates, t), -slope, atol=1e-7)
+
+    spot = evaluator.spot(dates, T)
+    np.testing.assert_allclose(spot[T == 0], evaluator.forward(dates, T)[T == 0])
+    np.testing.assert_allclose(spot[T > 0], -np.log(evaluator.discount(dates, T)[T > 0]) / T[T > 0])
+
+    # a 2-year par bond: semiannual coupons plus principal price to 1
+    dt = params["date"].iloc[0]
+    y = evaluator.par_yield(dt, 2.0)
+    coupon_times = np.array([0.5, 1.0, 1.5, 2.0])
+    assert np.isclose(y / 2 * evaluator.discount(dt, coupon_times).sum() + evaluator.discount(dt, 2.0), 1.0)
+
+    info = evaluator.curve.cache_info()
+    assert info.misses == len(params) and info.hits > 0
+    with pytest.raises(KeyError):
+        evaluator.spot("1990-01-31", 1.0)
+
+
+@pytest.mark.parametrize("method", ["mcc", "fisher"])
+def test_load_method_curve_reads_params_table_like_dense_parquet(method, tmp_path):
+    """The common-format curves built from the parameter table should match those built
+    from the dense curve parquet, which is only read when no table exists."""
+    results = _results(method, seed=3)
+    _, _, t_col = curve_store.CURVE_METHODS[method]
+    dense = pd.concat(
+        [out["curve"].rename(columns={"T": t_col}).assign(date=dt) for dt, out in results.items()],
+        ignore_index=True)
+    dense.to_parquet(tmp_path / cm.METHOD_FILE_MAP[method])
+    from_dense = cm.load_method_curve(method, data_dir=tmp_path)
+
+    curve_store.curve_params_table(results, method).to_parquet(tmp_path / curve_store.PARAMS_FILES[method])
+    (tmp_path / cm.METHOD_FILE_MAP[method]).unlink()
+    from_params = cm.load_method_curve(method, data_dir=tmp_path)
+    pd.testing.assert_frame_equal(from_params, from_dense, rtol=1e-9)
@@ -0,0 +1,139 @@
+"""
+Unit tests for the Fisher (1995) fitting routines in fisher1995_yield_curve.py.
+
+Tests:
+- integrated_basis_banded: the banded form expands to the dense matrix and
+    prices/Jacobians agree with the dense path.
+- price_and_jac: the segment-sum kernel matches the per-column bincount loop,
+    including bonds with no cashflows.
+- roughness_matrix: the exact banded K agrees with dense-grid quadrature.
+- select_lambda_gcv: K is eigendecomposed once per date and no λ is refit.
+- run_fisher: results are identical whether date chunks are fitted serially
+    or across worker processes.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fisher1995_yield_curve as fisher
+from curve_fitting_utils import DATE_CHUNK_SIZE, get_cashflows_from_bonds
+
+
+def test_run_fisher_parallel_chunks_match_serial_bitwise(treasury_sample):
+    """Results with the default chunking must not depend on the number of worker processes."""
+    dates = pd.date_range("2000-01-31", periods=DATE_CHUNK_SIZE + 2, freq="ME")
+    sample = treasury_sample(dates=dates)
+
+    serial = fisher.run_fisher(sample, n_jobs=1)
+    parallel = fisher.run_fisher(sample, n_jobs=2)
+
+    assert list(serial) == list(parallel) == list(sample["date"].unique())
+    for dt in serial:
+        assert np.array_equal(serial[dt]["beta_hat"], parallel[dt]["beta_hat"])
+        assert serial[dt]["lambda"] == parallel[dt]["lambda"]
+        assert np.array_equal(serial[dt]["curve"]["forward"], parallel[dt]["curve"]["forward"])
+
+
+def test_select_lambda_gcv_decomposes_K_once_and_never_refits(treasury_sample, monkeypatch):
+    """The GCV search should share one sqrt(K) and fit each distinct λ exactly once."""
+    sample = treasury_sample(dates=("2000-01-31",), n_bonds=20)
+    sample["mid_price"] += np.random.default_rng(0).normal(0.0, 0.1, len(sample))
+    cashflows, times = get_cashflows_from_bonds(sample)
+    bonds = [
+        {"P": p, "times": t, "c": c}
+        for p, t, c in zip(sample["mid_price"], times, cashflows)
+    ]
+    knots = fisher.bspline_knots_from_nodes(
+        fisher.fisher_nodes_equal_counts(sample["ttm_days"].to_numpy() / 365)
+    )
+
+    n_sqrt = {"calls": 0}
+    sqrt_penalty_from_K = fisher.sqrt_penalty_from_K
+
+    def counting_sqrt(*args, **kwargs):
+        n_sqrt["calls"] += 1
+        return sqrt_penalty_from_K(*args, **kwargs)
+
+    fitted = []
+    fit_fixed = fisher.fit_fisher_forward_fixed_lambda
+
+    def recording_fit(*args, **kwargs):
+        fitted.append(kwargs["lam"])
+        return fit_fixed(*args, **kwargs)
+
+    monkeypatch.setattr(fisher, "sqrt_penalty_from_K", counting_sqrt)
+    monkeypatch.setattr(fisher, "fit_fisher_forward_fixed_lambda", recording_fit)
+
+    out = fisher.select_lambda_gcv(bonds, knots)
+
+    assert n_sqrt["calls"] == 1
+    assert len(fitted) == len(set(fitted))
+    assert out["best_lambda"] in fitted
+
+
+def test_roughness_matrix_exact_matches_quadrature():
+    """The exact K should be banded and agree with a very fine trapezoid rule."""
+    knots = fisher.bspline_knots_from_nodes(np.array([0.0, 0.5, 1.3, 2.7, 5.0, 9.5, 12.0, 20.0, 29.5]))
+
+    K = fisher.roughness_matrix(knots)
+    K_quad = fisher.roughness_matrix(knots, grid_size=200_000)
+
+    rows, cols = np.nonzero(K)
+    assert np.abs(rows - cols).max() <= 3
+    assert np.allclose(K, K.T)
+    assert np.abs(K - K_quad).max() <= 1e-6 * np.abs(K).max()
+
+
+def test_integrated_basis_banded_matches_dense_pricing():
+    """Banded A_all should equal the antiderivative-based dense matrix and price identically."""
+    rng = np.random.default_rng(0)
+    knots = fisher.bspline_knots_from_nodes(np.array([0.0, 0.5, 1.3, 2.7, 5.0, 9.5, 12.0, 20.0, 29.5]))
+    times = np.sort(np.concatenate([[0.0, 0.5, 29.5], rng.uniform(0.0, 29.5, 400)]))
+    bond_idx = np.sort(rng.integers(0, 40, times.size))
+    c_all = rng.uniform(1.0, 100.0, times.size)
+    beta = rng.normal(0.0, 0.05, fisher.n_basis_from_knots(knots))
+
+    A_dense = fisher.integrated_basis_matrix(times, fisher.bspline_basis_list(knots))
+    A_banded = fisher.integrated_basis_banded(times, knots)
+
+    assert np.allclose(fisher.banded_to_dense(A_banded), A_dense, rtol=0, atol=1e-12)
+
+    P_dense, J_dense = fisher.price_and_jac(beta, c_all, bond_idx, A_dense, 40)
+    P_banded, J_banded = fisher.price_and_jac(beta, c_all, bond_idx, A_banded, 40)
+    assert np.allclose(P_banded, P_dense, rtol=1e-12)
+    assert np.allclose(J_banded, J_dense, rtol=1e-12)
+
+
+def _price_and_jac_bincount(beta, c_all, bond_idx, A_all, N):
+    """Reference dense price_and_jac with one np.bincount per basis column ."""
+    p = len(beta)
+    wd = c_all * np.exp(-(A_all @ beta))
+
+    P_hat = np.bincount(bond_idx, weights=wd, minlength=N).astype(float)
+
+    wd_A = wd[:, np.newaxis] * A_all   # (total_cf, p)
+    J = np.empty((N, p))
+    for k in range(p):
+        J[:, k] = np.bincount(bond_idx, weights=wd_A[:, k], minlength=N)
+    return P_hat, -J
+
+
+def test_price_and_jac_segment_sum_matches_bincount_loop():
+    """CSR segment sums over contiguous cashflows should reproduce the bincount reference."""
+    rng = np.random.default_rng(1)
+    N, p = 30, 12
+    bond_idx = np.sort(rng.choice(np.delete(np.arange(N), [0, 7, N - 1]), 500))  # some empty bonds
+    A_all = rng.uniform(0.0, 3.0, (bond_idx.size, p))
+    c_all = rng.uniform(1.0, 100.0, bond_idx.size)
+    beta = rng.normal(0.0, 0.05, p)
+
+    P_ref, J_ref = _price_and_jac_bincount(beta, c_all, bond_idx, A_all, N)
+    P, J = fisher.price_and_jac(beta, c_all, bond_idx, A_all, N)
+
+    assert np.allclose(P, P_ref, rtol=1e-13, atol=0)
+    assert np.allclose(J, J_ref, rtol=1e-13, atol=0)
+    assert P[0] == 0.0 and not J[7].any()
+
+    with pytest.raises(ValueError):
+        fisher.cashflow_offsets(bond_idx[::-1], N)
@@ -0,0 +1,155 @@
+"""
+Unit tests for the Gurkaynak, Sack, and Wright (2006) routines in gsw2006_yield_curve.py.
+
+Tests:
+- cashflow_matrix / calc_cashflows: the vectorized schedule is identical to the
+    per-row get_coupon_dates loop, including month-end maturities and zero coupons.
+- predict_prices: the sparse cashflows reproduce the dense-matrix prices.
+- discount_jac / fit: the analytic Jacobian matches central differences, and the
+    gradient and least-squares fits recover the parameters behind noiseless prices.
+- nss_curves: the broadcast curves match spot()/discount() row by row, and the
+    closed-form forward is -d log(discount) / dt.
+- profile_betas / fit(method="variable_projection"): the profiled betas are exact at
+    the true taus, the tau search from a poor start finds the optimum and returns
+    the betas it scored, and RuntimeError is raised when nothing scores finite.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import gsw2006_yield_curve as gsw
+
+
+def _calc_cashflows_loop(quote_data, filter_maturity_dates=False):
+    """Reference (per-row .loc) version of calc_cashflows."""
+    CF = pd.DataFrame(
+        dtype=float,
+        data=0,
+        index=quote_data.index,
+        columns=quote_data["tmatdt"].unique(),
+    )
+
+    for i in quote_data.index:
+        coupon_dates = gsw.get_coupon_dates(
+            quote_data.loc[i, "caldt"], quote_data.loc[i, "tmatdt"]
+        )
+
+        if coupon_dates is not None:
+            CF.loc[i, coupon_dates] = quote_data.loc[i, "tcouprt"] / 2
+
+        CF.loc[i, quote_data.loc[i, "tmatdt"]] += 100
+
+    # Sort columns by maturity date
+    CF = CF.fillna(0).sort_index(axis=1)
+    # Drop columns (dates) that are all zeros
+    CF.drop(columns=CF.columns[(CF == 0).all()], inplace=True)
+
+    if filter_maturity_dates:
+        CF = gsw.filter_treasury_cashflows(CF, filter_maturity_dates=True)
+
+    return CF
+
+
+def test_cashflow_matrix_matches_per_row_loop(gsw_quotes):
+    """Every payment date and amount should match the get_coupon_dates loop."""
+    for quote_date in ["2020-01-15", "2020-02-29", "2019-08-31"]:
+        quotes = gsw_quotes(quote_date)
+        pd.testing.assert_frame_equal(gsw.calc_cashflows(quotes), _calc_cashflows_loop(quotes))
+
+
+def test_predict_prices_accepts_sparse_cashflows(gsw_quotes):
+    """Prices from the sparse (CF, payment_dates) pair should equal the dense product."""
+    quotes = gsw_quotes("2020-02-29", seed=1)
+    quote_date = pd.Timestamp("2020-02-29")
+    params = np.array([1.2, 9.0, 0.04, -0.01, 0.02, 0.01])
+
+    dense = gsw.calc_cashflows(quotes)
+    times = (dense.columns - quote_date).days / 365.25
+    expected = dense.to_numpy() @ gsw.discount(times, params)
+
+    prices = gsw.predict_prices(quote_date, quotes, params, cashflows=gsw.cashflow_matrix(quotes))
+    assert list(prices.index) == list(quotes["tcusip"])
+    np.testing.assert_allclose(prices.to_numpy(), expected, rtol=1e-13)
+
+
+def test_discount_jac_matches_central_differences():
+    """Each analytic column should match a central difference of discount()."""
+    t = np.linspace(0.1, 30.0, 60)
+    params = np.array([1.3, 8.5, 0.05, -0.02, 0.015, 0.01])
+    disc, jac = gsw.discount_jac(t, params)
+
+    np.testing.assert_allclose(disc, gsw.discount(t, params), rtol=1e-14)
+    h = 1e-6
+    numeric = np.column_stack(
+        [(gsw.discount(t, params + e) - gsw.discount(t, params - e)) / (2 * h) for e in np.eye(6) * h]
+    )
+    np.testing.assert_allclose(jac, numeric, atol=1e-8)
+
+
+def test_nss_curves_match_per_date_spot_and_forward_derivative():
+    """Each row should equal the single-parameter spot/discount, and the forward the log-slope."""
+    t = np.linspace(0.0, 30.0, 121)
+    params = np.array([
+        [1.3, 8.5, 0.05, -0.02, 0.015, 0.01],
+        [0.6, 12.0, 0.03, 0.01, -0.02, 0.04],
+        [2.5, 20.0, 0.045, -0.04, 0.0, -0.01],
+    ])
+    disc, spot, fwd = gsw.nss_curves(params, t)
+
+    assert disc.shape == spot.shape == fwd.shape == (3, t.size)
+    for i, p in enumerate(params):
+        np.testing.assert_allclose(spot[i, 1:], gsw.spot(t[1:], p), rtol=1e-13)
+        np.testing.assert_allclose(disc[i, 1:], gsw.discount(t[1:], p), rtol=1e-13)
+        h = 1e-5
+        slope = (np.log(gsw.discount(t[1:] + h, p)) - np.log(gsw.discount(t[1:] - h, p))) / (2 * h)
+        np.testing.assert_allclose(fwd[i, 1:], -slope, atol=1e-8)
+    # at t = 0 the spot and forward both equal beta1 + beta2, and discount is 1
+    np.testing.assert_allclose(spot[:, 0], params[:, 2] + params[:, 3], atol=1e-7)
+    np.testing.assert_allclose(fwd[:, 0], params[:, 2] + params[:, 3], atol=1e-7)
+    np.testing.assert_array_equal(disc[:, 0], 1.0)
+
+
+def test_fit_with_analytic_derivatives_recovers_parameters(gsw_quotes):
+    """Gradient and least-squares fits should reprice noiseless quotes to within a few cents."""
+    quote_date = pd.Timestamp("2020-02-29")
+    quotes = gsw_quotes(quote_date, n=60, seed=2)
+    quotes["tcouprt"] = quotes["tcouprt"].where(quotes["tcouprt"] > 0, 2.0)
+    true = np.array([1.5, 8.0, 0.04, -0.02, 0.01, 0.02])
+    CF, payment_dates = gsw.cashflow_matrix(quotes)
+    quotes["price"] = CF @ gsw.discount((payment_dates - quote_date).days / 365.25, true)
+    quotes["tdduratn"] = (quotes["tmatdt"] - quote_date).dt.days / 365.25
+
+    for method in ["gradient", "least_squares"]:
+        params, mse = gsw.fit(quote_date, quotes, true * 1.1, method=method)
+        assert mse < 1e-4
+        prices = gsw.predict_prices(quote_date, quotes, params)
+        np.testing.assert_allclose(prices.to_numpy(), quotes["price"].to_numpy(), atol=0.05)
+
+
+def test_variable_projection_finds_optimum_from_poor_start(gsw_quotes):
+    """Profiling out the betas should recover them exactly and reach the joint optimum."""
+    quote_date = pd.Timestamp("2020-02-29")
+    quotes = gsw_quotes(quote_date, n=60, seed=3)
+    true = np.array([1.5, 8.0, 0.04, -0.02, 0.01, 0.02])
+    CF, payment_dates = gsw.cashflow_matrix(quotes)
+    times = np.asarray((payment_dates - quote_date).days / 365.25)
+    quotes["price"] = CF @ gsw.discount(times, true)
+    quotes["tdduratn"] = (quotes["tmatdt"] - quote_date).dt.days / 365.25
+
+    beta, mse = gsw.profile_betas(1.5, 8.0, CF, times, quotes["price"].to_numpy(), quotes["tdduratn"].to_numpy())
+    np.testing.assert_allclose(beta, true[2:], atol=1e-10)
+    assert mse < 1e-20
+
+    params, mse = gsw.fit(quote_date, quotes, np.array([1.0, 10.0, 0.0, 0.0, 0.0, 0.0]),
+                          method="variable_projection")
+    assert mse < 1e-12
+    prices = gsw.predict_prices(quote_date, quotes, params)
+    np.testing.assert_allclose(prices.to_numpy(), quotes["price"].to_numpy(), atol=1e-5)
+    # the returned betas are the ones scored: re-profiling from them keeps them in place
+    beta_again, _ = gsw.profile_betas(*params[:2], CF, times, quotes["price"].to_numpy(),
+                                      quotes["tdduratn"].to_numpy(), beta0=params[2:])
+    np.testing.assert_allclose(beta_again, params[2:], atol=1e-10)
+
+    with pytest.raises(RuntimeError):
+        gsw.fit_variable_projection(CF, times, np.full(len(quotes), np.nan), quotes["tdduratn"].to_numpy())
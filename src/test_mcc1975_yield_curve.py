@@ -0,0 +1,213 @@
+"""
+Unit tests for the McCulloch (1975) fitting routines in mcc1975_yield_curve.py.
+
+Tests:
+- build_basis_matrix: the searchsorted evaluation is identical to the per-column
+    (A.2)-(A.6) loop, including repeated knots, points on the knots and k=2.
+- fit / predict_prices: the sparse design matches the per-bond reference.
+- lstsq_batched / run_mcculloch(batched=True): padded batched QR solves match
+    per-date lstsq (min-norm for rank-deficient dates), and the batched run writes
+    the same results.
+"""
+
+import numpy as np
+import pandas as pd
+
+import mcc1975_yield_curve as mcc
+
+
+def _build_basis_matrix_loop(m_grid, d, k):
+    """
+    Reference per-column implementation of build_basis_matrix.
+
+    Build the McCulloch (Appendix A) cubic spline basis matrix F where
+    F[:, j-1] = f_j(m) for j=1..k, using formulas (A.2)-(A.6).
+
+    Parameters
+    ----------
+    m_grid : array-like
+        Points m at which to evaluate the basis (e.g., cashflow times).
+    d : array-like
+        Knot points d_1,...,d_{k-1}. Must be length k-1.
+    k : int
+        Number of coefficients/basis functions.
+
+    Returns
+    -------
+    F : np.ndarray shape (len(m_grid), k)
+        Basis matrix with columns f_1,...,f_k evaluated at m_grid.
+    """
+    m = np.asarray(m_grid, dtype=float)
+    d = np.asarray(d, dtype=float)
+
+    if len(d) != k - 1:
+        raise ValueError(f"Need {k-1} knots for k={k}, got {len(d)}.")
+    if np.any(np.diff(d) < 0):
+        raise ValueError("Knots d must be nondecreasing.")
+
+    F = np.zeros((m.size, k), dtype=float)
+
+    def f_j(mvals, j):
+        """
+        Evaluate f_j(m) for j=1..k-1 using A.2-A.5 (paper indexing, 1-based).
+        """
+        # Special-case note in paper: set d_{j-1} = d_j = 0 when j=1.
+        if j == 1:
+            d_jm1 = 0.0      # d_0 = 0
+            d_j   = d[0]     # d_1 (should be 0 if you want the classic setup)
+            d_jp1 = d[1] if k > 2 else d[-1]     # d_2 (d_1 again when k=2)
+        else:
+            d_jm1 = d[j-2]
+            d_j   = d[j-1]
+            d_jp1 = d[j] if (j < k-1) else d[-1]
+
+        out = np.zeros_like(mvals, dtype=float)
+
+        # (A.2) m < d_{j-1} => 0 (already)
+
+        # (A.3) d_{j-1} <= m < d_j
+        mask2 = (mvals >= d_jm1) & (mvals < d_j)
+        if np.any(mask2):
+            denom = 6.0 * (d_j - d_jm1)
+            if denom != 0.0:
+                out[mask2] = ((mvals[mask2] - d_jm1) ** 3) / denom
+
+        # (A.4) d_j <= m < d_{j+1}
+        mask3 = (mvals >= d_j) & (mvals < d_jp1)
+        if np.any(mask3):
+            c = d_j - d_jm1
+            e = mvals[mask3] - d_j
+            denom = 6.0 * (d_jp1 - d_j)
+            if denom != 0.0:
+                out[mask3] = (c**2)/6.0 + (c*e)/2.0 + (e**2)/2.0 - (e**3)/denom
+            else:
+                out[mask3] = (c**2)/6.0 + (c*e)/2.0 + (e**2)/2.0
+
+        # (A.5) d_{j+1} <= m
+        mask4 = (mvals >= d_jp1)
+        if np.any(mask4):
+            out[mask4] = (d_jp1 - d_jm1) * (
+                (2.0 * d_jp1 - d_j - d_jm1) / 6.0 + (mvals[mask4] - d_jp1) / 2.0
+            )
+
+        return out
+
+    # Columns 1..k-1: f_1..f_{k-1}
+    for j in range(1, k):
+        F[:, j - 1] = f_j(m, j)
+
+    # Last column: (A.6) f_k(m) = m
+    F[:, k - 1] = m
+    return F
+
+
+def _predict_prices_per_bond(beta, cashflows, times, d, ncoef, accrued_interest):
+    """
+    Reference per-bond predict_prices.
+
+    cashflows: list (or iterable) of 1D arrays, cf_i[j] cashflow at time t_i[j]
+    times:     list (or iterable) of 1D arrays, t_i[j] cashflow time in years for bond i
+    """
+    beta = np.asarray(beta, dtype=float)
+    model_prices = []
+
+    for i, (t_i, cf_i) in enumerate(zip(times, cashflows)):
+        D = 1.0 + _build_basis_matrix_loop(t_i, d, ncoef) @ beta
+        
+        P_i_dirty = np.sum(cf_i * D)
+        P_i = P_i_dirty - accrued_interest[i]
+        model_prices.append(P_i)
+
+    return np.asarray(model_prices, dtype=float)
+
+def _fit_per_bond(cashflows, times, prices_clean, ai, d, ncoef):
+    """Reference per-bond fit."""
+    X_rows = []
+    rhs = []
+    for cf_i, t_i, P_i, ai_i in zip(cashflows, times, prices_clean, ai):
+        F_i = _build_basis_matrix_loop(t_i, d, ncoef)      # (n_cf, ncoef)
+        C_i = np.sum(cf_i)
+        X_i = np.sum(cf_i[:, None] * F_i, axis=0)        # (ncoef,)
+        X_rows.append(X_i)
+        rhs.append(P_i - (C_i - ai_i))
+    X = np.vstack(X_rows)
+    rhs = np.asarray(rhs)
+    beta_hat, *_ = np.linalg.lstsq(X, rhs, rcond=None)
+    return beta_hat
+
+
+def test_build_basis_matrix_matches_per_column_loop():
+    """Every column and region should agree bit for bit with the reference loop."""
+    rng = np.random.default_rng(0)
+    for k in (4, 8, 15):
+        d = np.sort(np.r_[0.0, rng.uniform(0.0, 30.0, k - 2)])
+        d[-2] = d[-3]   # repeated knot
+        m = np.r_[rng.uniform(0.0, 32.0, 400), d, -0.5]
+
+        assert np.array_equal(mcc.build_basis_matrix(m, d, k), _build_basis_matrix_loop(m, d, k))
+
+    # k=2: a single cubic column whose d_{j+1} is d_1 itself
+    d, m = np.array([4.0]), np.r_[rng.uniform(0.0, 8.0, 50), 4.0]
+    assert np.array_equal(mcc.build_basis_matrix(m, d, 2), _build_basis_matrix_loop(m, d, 2))
+
+
+def test_fit_and_predict_match_per_bond_reference():
+    """One sparse product per date should reproduce the per-bond X, beta and prices."""
+    rng = np.random.default_rng(1)
+    n = 80
+    ttm = np.sort(rng.uniform(0.1, 30.0, n))
+    cpn = rng.uniform(2.0, 14.0, n)
+    times = [np.arange(t % 0.5 or 0.5, t + 1e-9, 0.5) for t in ttm]
+    cashflows = [np.r_[np.full(len(t) - 1, c / 2), 100 + c / 2] for t, c in zip(times, cpn)]
+    ai = rng.uniform(0.0, 3.0, n)
+    prices = np.array([np.sum(c * np.exp(-0.07 * t)) for c, t in zip(cashflows, times)]) - ai
+    d, ncoef = mcc.get_nodes(ttm, ttm)
+
+    beta_ref = _fit_per_bond(cashflows, times, prices, ai, d, ncoef)
+    beta = mcc.fit(cashflows, times, prices, ai, d, ncoef)
+    assert np.allclose(beta, beta_ref, rtol=1e-10, atol=1e-12)
+
+    P_ref = _predict_prices_per_bond(beta_ref, cashflows, times, d, ncoef, ai)
+    P = mcc.predict_prices(beta_ref, cashflows, times, d, ncoef, ai)
+    assert np.allclose(P, P_ref, rtol=1e-13, atol=0)
+
+
+def test_lstsq_batched_matches_per_system_lstsq():
+    """Systems of different sizes padded into one batch should solve as if alone."""
+    rng = np.random.default_rng(2)
+    systems = [(rng.normal(size=(m, k)), rng.normal(size=m)) for m, k in [(40, 7), (90, 10), (25, 5)]]
+
+    for beta, (X, rhs) in zip(mcc.lstsq_batched(systems), systems):
+        expected, *_ = np.linalg.lstsq(X, rhs, rcond=None)
+        assert beta.shape == expected.shape
+        assert np.allclose(beta, expected, rtol=1e-10, atol=1e-12)
+
+
+def test_lstsq_batched_falls_back_to_lstsq_for_rank_deficient_systems():
+    """A zero or collinear column in one date should give that date the min-norm lstsq
+    solution without disturbing the other dates."""
+    rng = np.random.default_rng(4)
+    zero_col = rng.normal(size=(30, 6))
+    zero_col[:, 2] = 0.0
+    collinear = rng.normal(size=(30, 6))
+    collinear[:, 4] = 2.0 * collinear[:, 1]
+    systems = [(X, rng.normal(size=30)) for X in (rng.normal(size=(30, 6)), zero_col, collinear)]
+
+    for beta, (X, rhs) in zip(mcc.lstsq_batched(systems), systems):
+        expected, *_ = np.linalg.lstsq(X, rhs, rcond=None)
+        assert np.allclose(beta, expected, rtol=1e-8, atol=1e-10)
+
+
+def test_run_mcculloch_batched_matches_per_date(treasury_sample):
+    """The batched run should produce the same dates, bond order and fits as the per-date loop."""
+    sample = treasury_sample(dates=pd.date_range("2000-01-31", periods=3, freq="ME"), n_bonds=40)
+    sample["mid_price"] += np.random.default_rng(3).normal(0.0, 0.1, len(sample))
+
+    serial = mcc.run_mcculloch(sample)
+    batched = mcc.run_mcculloch(sample, batched=True)
+
+    assert list(batched) == list(serial)
+    for date in serial:
+        assert list(batched[date]["bonds"]["cusip"]) == list(serial[date]["bonds"]["cusip"])
+        assert np.allclose(batched[date]["beta_hat"], serial[date]["beta_hat"], rtol=1e-10, atol=1e-12)
+        assert np.isclose(batched[date]["wmae"], serial[date]["wmae"], rtol=1e-8)
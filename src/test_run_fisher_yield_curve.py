@@ -4,12 +4,18 @@ Unit tests for run_fisher_yield_curve.py.
 Tests:
 - _collect_results: verifies expected output schemas and t/T normalization.
 - main: verifies expected in-sample and out-of-sample artifacts are written.
+- main(incremental=True): only new or changed dates are refit and merged into
+    the stored outputs.
+- main(stream=True): streamed artifacts match the in-memory run for the same chunk_size.
 """
 
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pytest
 
+import curve_fitting_utils
 import run_fisher_yield_curve as fisher_run
 
 
@@ -29,6 +35,8 @@ def _fake_fisher_results():
     """Build a minimal Fisher-style results dictionary for one date."""
     return {
         pd.Timestamp("2000-01-31"): {
+            "beta_hat": np.array([0.03, 0.031, 0.032, 0.033]),
+            "knots": np.array([0.5] * 4 + [1.0] * 4),
             "curve": pd.DataFrame({"T": [0.5, 1.0], "forward": [0.03, 0.032]}),
             "nodes": pd.DataFrame({"node_t": [1.0], "node_forward": [0.032]}),
             "bonds": pd.DataFrame({"cusip": ["A"], "model_price": [100.1]}),
@@ -73,6 +81,9 @@ def test_main_writes_expected_fisher_artifacts(tmp_path, monkeypatch):
     monkeypatch.setattr(
         fisher_run.cfu, "split_in_out_sample_data", lambda df: (df.iloc[[0]], df.iloc[[1]])
     )
+    monkeypatch.setattr(
+        fisher_run.cfu, "load_cashflow_cache", lambda *_args, **_kwargs: None
+    )
     monkeypatch.setattr(
         fisher_run.cfu, "get_full_error_metrics", lambda *_: _fake_error_metrics_df()
     )
@@ -90,6 +101,7 @@ def test_main_writes_expected_fisher_artifacts(tmp_path, monkeypatch):
 
     expected = [
         "ut_fisher_forward_curve.parquet",
+        "ut_fisher_curve_params.parquet",
         "ut_fisher_bond_fits.parquet",
         "ut_fisher_fit_quality_by_date.csv",
         "ut_fisher_error_metrics.csv",
@@ -98,3 +110,70 @@ def test_main_writes_expected_fisher_artifacts(tmp_path, monkeypatch):
     ]
     for fname in expected:
         assert (tmp_path / fname).exists(), f"Missing expected artifact: {fname}"
+
+
+def test_main_incremental_refits_only_new_or_changed_dates(treasury_sample, tmp_path, monkeypatch):
+    """Incremental runs should fit only new/changed dates and keep the other dates' outputs."""
+    monkeypatch.setattr(fisher_run, "DATA_DIR", Path(tmp_path))
+    tidy = {"df": treasury_sample(dates=("2000-01-31", "2000-02-29"), n_bonds=12)}
+
+    monkeypatch.setattr(fisher_run.cfu, "load_tidy_CRSP_treasury", lambda *_: tidy["df"])
+    monkeypatch.setattr(fisher_run.cfu, "filter_waggoner_treasury_data", lambda df, **_: df.copy())
+    monkeypatch.setattr(fisher_run.cfu, "load_cashflow_cache", lambda *_args, **_kwargs: None)
+
+    fitted = []
+    run_fisher = fisher_run.fisher.run_fisher
+
+    def _recording_run_fisher(sample, *args, **kwargs):
+        fitted.append(sorted(sample["date"].unique()))
+        return run_fisher(sample, *args, **kwargs)
+
+    monkeypatch.setattr(fisher_run.fisher, "run_fisher", _recording_run_fisher)
+
+    fisher_run.main(output_prefix="ut_", incremental=True)
+    assert [len(d) for d in fitted] == [2, 2]
+    first_quality = pd.read_csv(tmp_path / "ut_fisher_fit_quality_by_date.csv", parse_dates=["date"])
+
+    # one new month-end arrives
+    tidy["df"] = treasury_sample(dates=("2000-01-31", "2000-02-29", "2000-03-31"), n_bonds=12)
+    fitted.clear()
+    fisher_run.main(output_prefix="ut_", incremental=True)
+    assert fitted == [[pd.Timestamp("2000-03-31")]] * 2
+
+    quality = pd.read_csv(tmp_path / "ut_fisher_fit_quality_by_date.csv", parse_dates=["date"])
+    assert list(quality["date"]) == list(pd.to_datetime(["2000-01-31", "2000-02-29", "2000-03-31"]))
+    pd.testing.assert_frame_equal(quality.iloc[:2], first_quality)
+    bonds = pd.read_parquet(tmp_path / "ut_fisher_bond_fits.parquet")
+    assert bonds["date"].nunique() == 3 and bonds["date"].is_monotonic_increasing
+
+    # a restated price on the first date refits only that date
+    tidy["df"].loc[tidy["df"]["date"] == "2000-01-31", "mid_price"] += 0.01
+    fitted.clear()
+    fisher_run.main(output_prefix="ut_", incremental=True)
+    assert fitted == [[pd.Timestamp("2000-01-31")]] * 2
+
+    err = pd.read_csv(tmp_path / "ut_fisher_error_metrics.csv")
+    expected = curve_fitting_utils.get_full_error_metrics(
+        pd.read_parquet(tmp_path / "ut_fisher_bond_fits.parquet"))
+    assert np.allclose(err["wmae"], expected["wmae"], equal_nan=True)
+
+
+@pytest.mark.parametrize("chunk_size", [curve_fitting_utils.DATE_CHUNK_SIZE, 2])
+def test_main_stream_matches_in_memory_outputs(chunk_size, treasury_sample, tmp_path, monkeypatch):
+    """stream=True should write the same artifacts as the in-memory run, chunk for chunk."""
+    monkeypatch.setattr(fisher_run, "DATA_DIR", Path(tmp_path))
+    tidy = treasury_sample(dates=("2000-01-31", "2000-02-29", "2000-03-31"), n_bonds=12)
+
+    monkeypatch.setattr(fisher_run.cfu, "load_tidy_CRSP_treasury", lambda *_: tidy)
+    monkeypatch.setattr(fisher_run.cfu, "filter_waggoner_treasury_data", lambda df, **_: df.copy())
+    monkeypatch.setattr(fisher_run.cfu, "load_cashflow_cache", lambda *_args, **_kwargs: None)
+
+    fisher_run.main(output_prefix="mem_", chunk_size=chunk_size)
+    fisher_run.main(output_prefix="stream_", stream=True, chunk_size=chunk_size)
+
+    for name in ["fisher_forward_curve.parquet", "fisher_bond_fits.parquet", "fisher_oos_bond_fits.parquet"]:
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / f"stream_{name}"),
+                                      pd.read_parquet(tmp_path / f"mem_{name}"))
+    for name in ["fisher_fit_quality_by_date.csv", "fisher_error_metrics.csv", "fisher_oos_error_metrics.csv"]:
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / f"stream_{name}"),
+                                      pd.read_csv(tmp_path / f"mem_{name}"))
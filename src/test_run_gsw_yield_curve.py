@@ -0,0 +1,104 @@
+"""
+Unit tests for run_gsw_yield_curve.py.
+
+Tests:
+- main: writes the parameter series in the fed_yield_curve_all layout and recovers
+    the parameters behind noiseless prices.
+- run_gsw: a date whose warm-started fit jumps is refitted from multiple starts,
+    chunked runs on an executor or a process pool match the serial run with the same
+    chunking; a date where every start fails
+    gets NaN parameters and a fit_failed flag without stopping the run.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from curve_fitting_utils import DATE_CHUNK_SIZE
+import gsw2006_yield_curve as gsw
+import run_gsw_yield_curve as gsw_run
+
+
+def _gsw_panel(gsw_quotes, params_by_date, n=40):
+    """Filtered GSW-style quotes priced off the given parameters on each date."""
+    frames = []
+    for i, (quote_date, params) in enumerate(params_by_date.items()):
+        quotes = gsw_quotes(quote_date, n=n, seed=10 + i)
+        quotes["tcouprt"] = quotes["tcouprt"].where(quotes["tcouprt"] > 0, 2.0)
+        CF, payment_dates = gsw.cashflow_matrix(quotes)
+        quotes["price"] = CF @ gsw.discount((payment_dates - quotes["caldt"].iloc[0]).days / 365.25, params)
+        quotes["tdduratn"] = (quotes["tmatdt"] - quotes["caldt"]).dt.days / 365.25
+        frames.append(quotes)
+    return pd.concat(frames, ignore_index=True)
+
+
+TRUE = np.array([1.5, 8.0, 0.04, -0.02, 0.01, 0.02])
+
+
+def test_main_writes_fed_layout_parameter_series(gsw_quotes, tmp_path, monkeypatch):
+    """main should write Fed-layout parameters (percent betas) that match the truth."""
+    monkeypatch.setattr(gsw_run, "DATA_DIR", Path(tmp_path))
+    panel = _gsw_panel(gsw_quotes, {pd.Timestamp("2020-01-31"): TRUE, pd.Timestamp("2020-02-28"): TRUE * 1.02})
+    monkeypatch.setattr(gsw_run, "load_gsw_quotes", lambda *_: panel)
+    monkeypatch.setattr(gsw_run.gsw, "gurkaynak_sack_wright_filters", lambda df: df)
+
+    gsw_run.main(output_prefix="ut_")
+
+    curve = pd.read_parquet(tmp_path / "ut_gsw_yield_curve_all.parquet")
+    assert curve.index.name == "Date"
+    assert {"BETA0", "BETA3", "TAU1", "TAU2", "SVENY01", "SVENY30"}.issubset(curve.columns)
+    np.testing.assert_allclose(curve[["TAU1", "TAU2"]].iloc[0], TRUE[:2], rtol=1e-3)
+    np.testing.assert_allclose(curve[[f"BETA{i}" for i in range(4)]].iloc[0], TRUE[2:] * 100, atol=1e-3)
+    np.testing.assert_allclose(curve["SVENY10"].iloc[1], gsw.spot(10, TRUE * 1.02) * 100, atol=1e-4)
+    assert (tmp_path / "ut_gsw_fit_quality_by_date.csv").exists()
+
+
+def test_run_gsw_multi_starts_on_jump_and_chunks_in_parallel(gsw_quotes):
+    """A curve shift should trigger the multi-start fallback; parallel chunks match serial ones."""
+    shifted = np.array([0.4, 3.0, 0.07, 0.03, -0.05, 0.04])
+    panel = _gsw_panel(gsw_quotes, {pd.Timestamp("2020-01-31"): TRUE, pd.Timestamp("2020-02-28"): TRUE,
+                        pd.Timestamp("2020-03-31"): shifted, pd.Timestamp("2020-04-30"): shifted})
+
+    results = gsw.run_gsw(panel, params0=TRUE)
+    mse = [results[d]["mse"] for d in sorted(results)]
+    assert max(mse) < 1e-8
+    assert results[pd.Timestamp("2020-03-31")]["multi_start"]
+
+    serial = gsw.run_gsw(panel, params0=TRUE, chunk_size=2)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        parallel = gsw.run_gsw(panel, params0=TRUE, chunk_size=2, executor=pool)
+    for d in serial:
+        np.testing.assert_array_equal(parallel[d]["params"], serial[d]["params"])
+
+    # the default chunking is fixed, so worker processes give the same series as n_jobs=1
+    dates = pd.date_range("2020-01-31", periods=DATE_CHUNK_SIZE + 2, freq="ME")
+    panel = _gsw_panel(gsw_quotes, {d: TRUE * (1 + 0.01 * i) for i, d in enumerate(dates)})
+    serial = gsw.run_gsw(panel, params0=TRUE, n_jobs=1)
+    parallel = gsw.run_gsw(panel, params0=TRUE, n_jobs=2)
+    assert list(serial) == list(parallel) == list(dates)
+    for d in serial:
+        np.testing.assert_array_equal(parallel[d]["params"], serial[d]["params"])
+
+
+def test_run_gsw_flags_dates_where_every_start_fails(gsw_quotes, monkeypatch):
+    """Errors from every start on one date should give that date NaN parameters and
+    fit_failed=True, and the following dates should still be fitted."""
+    bad_date = pd.Timestamp("2020-02-28")
+    panel = _gsw_panel(gsw_quotes, {pd.Timestamp("2020-01-31"): TRUE, bad_date: TRUE, pd.Timestamp("2020-03-31"): TRUE})
+    fit = gsw.fit
+
+    def _failing_fit(quote_date, *args, **kwargs):
+        if quote_date == bad_date:
+            raise ValueError("Residuals are not finite in the initial point.")
+        return fit(quote_date, *args, **kwargs)
+
+    monkeypatch.setattr(gsw, "fit", _failing_fit)
+    results = gsw.run_gsw(panel, params0=TRUE)
+
+    assert results[bad_date]["fit_failed"] and np.isnan(results[bad_date]["params"]).all()
+    assert not results[pd.Timestamp("2020-03-31")]["fit_failed"]
+    assert results[pd.Timestamp("2020-03-31")]["mse"] < 1e-8
+    _, fit_quality = gsw_run._collect_results(results)
+    assert list(fit_quality["fit_failed"]) == [False, True, False]
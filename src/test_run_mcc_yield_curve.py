@@ -4,12 +4,17 @@ Unit tests for run_mcc_yield_curve.py.
 Tests:
 - _collect_results: verifies expected output schemas and row counts.
 - main: verifies expected in-sample and out-of-sample artifacts are written.
+- main(incremental=True): only new or changed dates are refit and merged into
+    the stored outputs.
 """
 
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+import curve_fitting_utils
+
 import run_mcc_yield_curve as mcc_run
 
 
@@ -29,8 +34,9 @@ def _fake_mcc_results():
     """Build a minimal McCulloch-style results dictionary for one date."""
     return {
         pd.Timestamp("2000-01-31"): {
-            "curve": pd.DataFrame({"t": [0.5, 1.0], "discount": [0.99, 0.97]}),
-            "nodes": pd.DataFrame({"node_t": [1.0], "node_discount": [0.97]}),
+            "beta_hat": np.array([-0.03, 0.001]),
+            "curve": pd.DataFrame({"T": [0.5, 1.0], "discount": [0.99, 0.97]}),
+            "nodes": pd.DataFrame({"T": [0.0, 1.0], "discount": [1.0, 0.97]}),
             "bonds": pd.DataFrame({"cusip": ["A"], "model_price": [100.1]}),
             "wmae": 0.11,
             "hit_rate": 0.51,
@@ -70,6 +76,7 @@ def test_main_writes_expected_mcc_artifacts(tmp_path, monkeypatch):
     monkeypatch.setattr(
         mcc_run.cfu, "split_in_out_sample_data", lambda df: (df.iloc[[0]], df.iloc[[1]])
     )
+    monkeypatch.setattr(mcc_run.cfu, "load_cashflow_cache", lambda *_args, **_kwargs: None)
     monkeypatch.setattr(mcc_run.cfu, "get_full_error_metrics", lambda *_: _fake_error_metrics_df())
     monkeypatch.setattr(
         mcc_run.mcc,
@@ -81,8 +88,62 @@ def test_main_writes_expected_mcc_artifacts(tmp_path, monkeypatch):
 
     expected = [
         "ut_mcc_discount_curve.parquet",
+        "ut_mcc_curve_params.parquet",
+        "ut_mcc_bond_fits.parquet",
+        "ut_mcc_fit_quality_by_date.csv",
         "ut_mcc_error_metrics.csv",
+        "ut_mcc_oos_bond_fits.parquet",
         "ut_mcc_oos_error_metrics.csv",
     ]
     for fname in expected:
         assert (tmp_path / fname).exists(), f"Missing expected artifact: {fname}"
+
+
+def test_main_incremental_refits_only_new_or_changed_dates(treasury_sample, tmp_path, monkeypatch):
+    """Incremental runs should fit only new/changed dates and keep the other dates' outputs."""
+    monkeypatch.setattr(mcc_run, "DATA_DIR", Path(tmp_path))
+    tidy = {"df": treasury_sample(dates=("2000-01-31", "2000-02-29"), n_bonds=12)}
+
+    monkeypatch.setattr(mcc_run.cfu, "load_tidy_CRSP_treasury", lambda *_: tidy["df"])
+    monkeypatch.setattr(mcc_run.cfu, "filter_waggoner_treasury_data", lambda df, **_: df.copy())
+    monkeypatch.setattr(mcc_run.cfu, "load_cashflow_cache", lambda *_args, **_kwargs: None)
+
+    fitted = []
+    run_mcculloch = mcc_run.mcc.run_mcculloch
+
+    def _recording_run_mcculloch(sample, *args, **kwargs):
+        fitted.append(sorted(sample["date"].unique()))
+        return run_mcculloch(sample, *args, **kwargs)
+
+    monkeypatch.setattr(mcc_run.mcc, "run_mcculloch", _recording_run_mcculloch)
+
+    mcc_run.main(output_prefix="ut_", incremental=True)
+    assert [len(d) for d in fitted] == [2, 2]
+    first_quality = pd.read_csv(tmp_path / "ut_mcc_fit_quality_by_date.csv", parse_dates=["date"])
+    first_params = pd.read_parquet(tmp_path / "ut_mcc_curve_params.parquet")
+
+    # one new month-end arrives
+    tidy["df"] = treasury_sample(dates=("2000-01-31", "2000-02-29", "2000-03-31"), n_bonds=12)
+    fitted.clear()
+    mcc_run.main(output_prefix="ut_", incremental=True)
+    assert fitted == [[pd.Timestamp("2000-03-31")]] * 2
+
+    quality = pd.read_csv(tmp_path / "ut_mcc_fit_quality_by_date.csv", parse_dates=["date"])
+    assert list(quality["date"]) == list(pd.to_datetime(["2000-01-31", "2000-02-29", "2000-03-31"]))
+    pd.testing.assert_frame_equal(quality.iloc[:2], first_quality)
+    params = pd.read_parquet(tmp_path / "ut_mcc_curve_params.parquet")
+    for old, new in zip(first_params["beta_hat"], params["beta_hat"].iloc[:2]):
+        np.testing.assert_array_equal(old, new)
+    bonds = pd.read_parquet(tmp_path / "ut_mcc_bond_fits.parquet")
+    assert bonds["date"].nunique() == 3 and bonds["date"].is_monotonic_increasing
+
+    # a restated price on the first date refits only that date
+    tidy["df"].loc[tidy["df"]["date"] == "2000-01-31", "mid_price"] += 0.01
+    fitted.clear()
+    mcc_run.main(output_prefix="ut_", incremental=True)
+    assert fitted == [[pd.Timestamp("2000-01-31")]] * 2
+
+    err = pd.read_csv(tmp_path / "ut_mcc_error_metrics.csv")
+    expected = curve_fitting_utils.get_full_error_metrics(
+        pd.read_parquet(tmp_path / "ut_mcc_bond_fits.parquet"))
+    assert np.allclose(err["wmae"], expected["wmae"], equal_nan=True)
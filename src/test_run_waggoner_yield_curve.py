@@ -4,12 +4,17 @@ Unit tests for run_waggoner_yield_curve.py.
 Tests:
 - _collect_results: verifies expected output schemas and t/T normalization.
 - main: verifies expected in-sample and out-of-sample artifacts are written.
+- main(incremental=True): only new or changed dates are refit and merged into
+    the stored outputs.
 """
 
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+import curve_fitting_utils
+
 import run_waggoner_yield_curve as waggoner_run
 
 
@@ -29,6 +34,8 @@ def _fake_waggoner_results():
     """Build a minimal Waggoner-style results dictionary for one date."""
     return {
         pd.Timestamp("2000-01-31"): {
+            "beta_hat": np.array([0.03, 0.031, 0.032, 0.033]),
+            "knots": np.array([0.5] * 4 + [1.0] * 4),
             "curve": pd.DataFrame({"T": [0.5, 1.0], "forward": [0.029, 0.031]}),
             "nodes": pd.DataFrame({"node_t": [1.0], "node_forward": [0.031]}),
             "bonds": pd.DataFrame({"cusip": ["A"], "model_price": [100.1]}),
@@ -72,6 +79,9 @@ def test_main_writes_expected_waggoner_artifacts(tmp_path, monkeypatch):
     monkeypatch.setattr(
         waggoner_run.cfu, "split_in_out_sample_data", lambda df: (df.iloc[[0]], df.iloc[[1]])
     )
+    monkeypatch.setattr(
+        waggoner_run.cfu, "load_cashflow_cache", lambda *_args, **_kwargs: None
+    )
     monkeypatch.setattr(
         waggoner_run.cfu, "get_full_error_metrics", lambda *_: _fake_error_metrics_df()
     )
@@ -89,8 +99,62 @@ def test_main_writes_expected_waggoner_artifacts(tmp_path, monkeypatch):
 
     expected = [
         "ut_waggoner_forward_curve.parquet",
+        "ut_waggoner_curve_params.parquet",
+        "ut_waggoner_bond_fits.parquet",
+        "ut_waggoner_fit_quality_by_date.csv",
         "ut_waggoner_error_metrics.csv",
+        "ut_waggoner_oos_bond_fits.parquet",
         "ut_waggoner_oos_error_metrics.csv",
     ]
     for fname in expected:
         assert (tmp_path / fname).exists(), f"Missing expected artifact: {fname}"
+
+
+def test_main_incremental_refits_only_new_or_changed_dates(treasury_sample, tmp_path, monkeypatch):
+    """Incremental runs should fit only new/changed dates and keep the other dates' outputs."""
+    monkeypatch.setattr(waggoner_run, "DATA_DIR", Path(tmp_path))
+    tidy = {"df": treasury_sample(dates=("2000-01-31", "2000-02-29"), n_bonds=12)}
+
+    monkeypatch.setattr(waggoner_run.cfu, "load_tidy_CRSP_treasury", lambda *_: tidy["df"])
+    monkeypatch.setattr(waggoner_run.cfu, "filter_waggoner_treasury_data", lambda df, **_: df.copy())
+    monkeypatch.setattr(waggoner_run.cfu, "load_cashflow_cache", lambda *_args, **_kwargs: None)
+
+    fitted = []
+    run_waggoner = waggoner_run.waggoner.run_waggoner
+
+    def _recording_run_waggoner(sample, *args, **kwargs):
+        fitted.append(sorted(sample["date"].unique()))
+        return run_waggoner(sample, *args, **kwargs)
+
+    monkeypatch.setattr(waggoner_run.waggoner, "run_waggoner", _recording_run_waggoner)
+
+    waggoner_run.main(output_prefix="ut_", incremental=True)
+    assert [len(d) for d in fitted] == [2, 2]
+    first_quality = pd.read_csv(tmp_path / "ut_waggoner_fit_quality_by_date.csv", parse_dates=["date"])
+    first_params = pd.read_parquet(tmp_path / "ut_waggoner_curve_params.parquet")
+
+    # one new month-end arrives
+    tidy["df"] = treasury_sample(dates=("2000-01-31", "2000-02-29", "2000-03-31"), n_bonds=12)
+    fitted.clear()
+    waggoner_run.main(output_prefix="ut_", incremental=True)
+    assert fitted == [[pd.Timestamp("2000-03-31")]] * 2
+
+    quality = pd.read_csv(tmp_path / "ut_waggoner_fit_quality_by_date.csv", parse_dates=["date"])
+    assert list(quality["date"]) == list(pd.to_datetime(["2000-01-31", "2000-02-29", "2000-03-31"]))
+    pd.testing.assert_frame_equal(quality.iloc[:2], first_quality)
+    params = pd.read_parquet(tmp_path / "ut_waggoner_curve_params.parquet")
+    for old, new in zip(first_params["beta_hat"], params["beta_hat"].iloc[:2]):
+        np.testing.assert_array_equal(old, new)
+    bonds = pd.read_parquet(tmp_path / "ut_waggoner_bond_fits.parquet")
+    assert bonds["date"].nunique() == 3 and bonds["date"].is_monotonic_increasing
+
+    # a restated price on the first date refits only that date
+    tidy["df"].loc[tidy["df"]["date"] == "2000-01-31", "mid_price"] += 0.01
+    fitted.clear()
+    waggoner_run.main(output_prefix="ut_", incremental=True)
+    assert fitted == [[pd.Timestamp("2000-01-31")]] * 2
+
+    err = pd.read_csv(tmp_path / "ut_waggoner_error_metrics.csv")
+    expected = curve_fitting_utils.get_full_error_metrics(
+        pd.read_parquet(tmp_path / "ut_waggoner_bond_fits.parquet"))
+    assert np.allclose(err["wmae"], expected["wmae"], equal_nan=True)
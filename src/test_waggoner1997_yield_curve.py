@@ -0,0 +1,22 @@
+"""
+Unit tests for the Waggoner (1997) variable roughness penalty in waggoner1997_yield_curve.py.
+
+Tests:
+- vrp_roughness_matrix: the exact λ(t)-weighted K agrees with dense-grid quadrature.
+"""
+
+import numpy as np
+
+import waggoner1997_yield_curve as waggoner
+from fisher1995_yield_curve import bspline_knots_from_nodes
+
+
+def test_vrp_roughness_matrix_exact_matches_quadrature():
+    """The exact VRP matrix should agree with a very fine trapezoid rule across the λ(t) breaks."""
+    knots = bspline_knots_from_nodes(np.array([0.0, 0.5, 1.3, 2.7, 5.0, 9.5, 12.0, 20.0, 29.5]))
+
+    K = waggoner.vrp_roughness_matrix(knots)
+    K_quad = waggoner.vrp_roughness_matrix(knots, grid_size=200_000)
+
+    assert np.allclose(K, K.T)
+    assert np.abs(K - K_quad).max() <= 1e-4 * np.abs(K).max()
@@ -22,6 +22,9 @@ from settings import config
 DATA_DIR = Path(config("DATA_DIR"))
 OUTPUT_DIR = Path(config("OUTPUT_DIR"))
 
+# Rows per parquet row group; small enough that date filters skip most of the file
+ROW_GROUP_SIZE = 65_536
+
 def load_CRSP_treasury_data(data_dir):
     "Load CRSP Treasury data from the given directory, and return a tidy DataFrame."
     path = data_dir / "TFZ_with_runness.parquet"
@@ -149,10 +152,9 @@ def generate_tidy_CRSP_treasury_data(tidy_df, output_dir):
     "Generates the tidy CRSP Treasury data set"
     output_dir.mkdir(parents=True, exist_ok=True)
     output_path = output_dir / "tidy_CRSP_treasury.parquet"
-    tidy_df.to_parquet(output_path, index=False)
+    tidy_df.to_parquet(output_path, index=False, row_group_size=ROW_GROUP_SIZE)
     return output_path
 
-
 def main(data_dir = DATA_DIR, output_dir = DATA_DIR):
     data_dir = Path(data_dir)
     output_dir = Path(output_dir)
@@ -16,13 +16,17 @@ from scipy.optimize import least_squares
 import curve_fitting_utils
 import error_metrics
 from fisher1995_yield_curve import (
-    bspline_basis_list, integrated_basis_matrix,
-    sqrt_penalty_from_K, price_and_jac,
+    bspline_basis_list, integrated_basis_banded, n_basis_from_knots,
+    sqrt_penalty_from_K, price_and_jac, cashflow_offsets,
     fisher_nodes_equal_counts, bspline_knots_from_nodes,
     fisher_curve_points_to_dfs, fisher_predict_prices,
+    _exact_roughness_matrix,
 )
 
-def vrp_roughness_matrix(knots, degree: int = 3, grid_size: int = 1000):
+VRP_BREAKS = (1.0, 10.0)
+VRP_LEVELS = (0.1, 100.0, 100_000.0)
+
+def vrp_roughness_matrix(knots, degree: int = 3, grid_size: int | None = None):
     """
     Waggoner (1997) Variable Roughness Penalty matrix:
 
@@ -32,7 +36,18 @@ def vrp_roughness_matrix(knots, degree: int = 3, grid_size: int = 1000):
         lambda(t) = 0.1       for 0 <= t <= 1
         lambda(t) = 100       for 1  < t <= 10
         lambda(t) = 100,000   for t  > 10
+
+    Computed exactly per knot interval; passing grid_size instead uses the
+    trapezoid approximation on a dense grid.
     """
+    if grid_size is not None:
+        return vrp_roughness_matrix_quadrature(knots, degree=degree, grid_size=grid_size)
+    knots = tuple(np.asarray(knots, float))
+    return _exact_roughness_matrix(knots, int(degree), VRP_BREAKS, VRP_LEVELS).copy()
+
+
+def vrp_roughness_matrix_quadrature(knots, degree: int = 3, grid_size: int = 1000):
+    """Trapezoid approximation of vrp_roughness_matrix on a dense grid."""
     knots = np.asarray(knots, float)
     basis = bspline_basis_list(knots, degree)
     d2 = [b.derivative(2) for b in basis]
@@ -71,8 +86,7 @@ def fit_fisher_forward_variable_lambda(
     """
 
     knots = np.asarray(knots, float)
-    basis = bspline_basis_list(knots, degree)
-    p = len(basis)
+    p = n_basis_from_knots(knots, degree)
 
     # Build shared structures if not passed
     if A_all is None or idx_slices is None:
@@ -83,7 +97,7 @@ def fit_fisher_forward_variable_lambda(
             n = len(b["times"])
             idx_slices.append(slice(start, start + n))
             start += n
-        A_all = integrated_basis_matrix(times_all, basis, t0=0.0)
+        A_all = integrated_basis_banded(times_all, knots, degree)
 
     if K is None:
         K = vrp_roughness_matrix(knots, degree=degree)
@@ -105,10 +119,11 @@ def fit_fisher_forward_variable_lambda(
     # Cache price_and_jac between fun() and jac() — scipy calls both with the
     # same beta on each iteration, so we avoid computing it twice.
     _cache = {"beta": None, "P_hat": None, "Jp": None}
+    offsets = cashflow_offsets(bond_idx, N)
 
     def _eval(beta):
         if _cache["beta"] is None or not np.array_equal(beta, _cache["beta"]):
-            _cache["P_hat"], _cache["Jp"] = price_and_jac(beta, c_all, bond_idx, A_all, N)
+            _cache["P_hat"], _cache["Jp"] = price_and_jac(beta, c_all, bond_idx, A_all, N, offsets)
             _cache["beta"] = beta.copy()
 
     def fun(beta):
@@ -126,7 +141,8 @@ def fit_fisher_forward_variable_lambda(
     res = least_squares(fun, beta0, jac=jac, method="trf")
 
     beta_hat = res.x
-    P_hat, J_price = price_and_jac(beta_hat, c_all, bond_idx, A_all, N)
+    _eval(beta_hat)   # usually a cache hit: the solver's last evaluation is at res.x
+    P_hat, J_price = _cache["P_hat"], _cache["Jp"]
     r_price = P_obs - P_hat
     RSS = float(r_price @ r_price)
 
@@ -151,26 +167,23 @@ def fit_fisher_forward_variable_lambda(
 # Full wrapper for Waggoner
 # ----------------
 
-def run_waggoner(sample, pre_trained_results=None, node_ratio:int = 3):
-    """Runs the Waggoner (1997) variable roughness penalty yield curve fitting procedure 
-    on the provided sample data, with optional pre-trained results for nodes and beta."""
-    results = {}
-
-    dates = sample["date"].unique()
-
+def iter_waggoner(panels, pre_trained_results=None, node_ratio:int = 3, cashflow_cache=None,
+                  n_total=None):
+    """Streaming variant of run_waggoner: consumes (date, bonds) panels in date order and
+    yields (date, result) one date at a time, warm-starting each date from the previous one."""
     prev_beta = None   # warm-start: reuse previous date's solution as beta0
 
-    for idx, DATE in enumerate(dates):
+    for idx, (DATE, bonds) in enumerate(panels):
         if idx % 50 == 0:
-            print(f"{DATE.to_period('M')}: {idx} / {len(dates)} ({int(idx/len(dates)*100)}%)")
+            curve_fitting_utils.print_progress(DATE, idx, n_total)
 
-        bonds = sample.loc[sample["date"] == DATE].reset_index(drop=True)
+        bonds = bonds.reset_index(drop=True)
 
         bonds["ttm"] = bonds["ttm_days"] / 365
         bonds.sort_values(by="ttm", inplace=True)
         n_bonds = bonds.shape[0]
 
-        cashflows, times = curve_fitting_utils.get_cashflows_from_bonds(bonds)
+        cashflows, times = curve_fitting_utils.get_cashflows_from_bonds(bonds, cache=cashflow_cache)
 
         maturities = bonds["ttm"].to_numpy()
         prices = bonds["mid_price"].to_numpy()
@@ -207,7 +220,7 @@ def run_waggoner(sample, pre_trained_results=None, node_ratio:int = 3):
         wmae = error_metrics.wmae(bonds["model_price"], bonds["bid"], bonds["ask"], bonds["duration"])
         hit_rate = error_metrics.hit_rate(bonds["model_price"], bonds["bid"], bonds["ask"])
 
-        results[DATE] = {
+        yield DATE, {
             "beta_hat": beta_hat,
             "knots": knots,
             "bonds": bonds,
@@ -217,4 +230,11 @@ def run_waggoner(sample, pre_trained_results=None, node_ratio:int = 3):
             "hit_rate": hit_rate,
         }
 
-    return results
\ No newline at end of file
+def run_waggoner(sample, pre_trained_results=None, node_ratio:int = 3, cashflow_cache=None):
+    """Runs the Waggoner (1997) variable roughness penalty yield curve fitting procedure 
+    on the provided sample data, with optional pre-trained results for nodes and beta
+    and a shared cashflow cache (see curve_fitting_utils.load_cashflow_cache)."""
+    dates = sample["date"].unique()
+    date_slices = curve_fitting_utils.iter_date_slices(sample, dates)
+    return dict(iter_waggoner(date_slices, pre_trained_results, node_ratio, cashflow_cache,
+                              n_total=len(dates)))
\ No newline at end of file